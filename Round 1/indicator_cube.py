@@ -0,0 +1,238 @@
+"""
+Country x indicator x year cube of the Round 1 indicators.
+
+The five preprocessed indicator tables are aligned on Country Code and
+year into one dense float32 array, saved as a .npy file next to a JSON
+file with the axis labels. IndicatorCube.open memory-maps the array, so
+opening is instant and a query only touches the pages it slices:
+
+    cube = IndicatorCube.open('indicator_cube')
+    cube.series('DEU', 'CO2 Emission Per Capita', years=(2000, 2020))
+    cube.country('IND')
+    cube.correlations(years=(1990, 2015))
+
+Build it from the Round 1 datasets directory:
+
+    python ../indicator_cube.py build
+
+With --store, the preprocessed tables are read from the columnar store
+(as written by preprocess.py --store) instead of re-parsing their CSVs.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocess import datasets as DATASETS, store_key
+from wdi_loader import load_wdi_csv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.manifest import MANIFEST_FILENAME, BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+
+CUBE_DIR = './indicator_cube'
+VALUES_FILE = 'values.npy'
+AXES_FILE = 'axes.json'
+
+
+def load_indicator(dataset, base_dir='.', store=None):
+    """
+    A dataset's preprocessed table indexed by Country Code, from its CSV or
+    from a DataStore. The preprocessed tables only carry country names, so
+    the codes come from the raw WDI file, whose rows are in the same order.
+    """
+    if store is not None:
+        table = store.read(store_key(dataset))
+    else:
+        table = pd.read_csv(os.path.normpath(os.path.join(base_dir, dataset['output'])))
+    raw = load_wdi_csv(os.path.normpath(os.path.join(base_dir, dataset['path'])), year_dtype='float64')
+    if len(raw) != len(table) or (raw['Country Name'].to_numpy() != table['Country Name'].to_numpy()).any():
+        raise ValueError(f"{dataset['output']} no longer lines up with {dataset['path']}")
+
+    table.insert(1, 'Country Code', raw['Country Code'].astype(str).to_numpy())
+    return table.set_index('Country Code')
+
+
+def build_cube(datasets=DATASETS, base_dir='.', cube_dir=CUBE_DIR, store=None):
+    """Align every dataset on Country Code x year and write the memory-mappable cube"""
+    tables = [load_indicator(dataset, base_dir, store) for dataset in datasets]
+
+    countries = sorted(set().union(*(table.index for table in tables)))
+    years = sorted(set().union(*(
+        {int(col) for col in table.columns if col not in ('Country Name', 'Indicator Name')} for table in tables
+    )))
+    names = pd.concat([table['Country Name'] for table in tables])
+    names = names[~names.index.duplicated()].reindex(countries)
+
+    os.makedirs(cube_dir, exist_ok=True)
+    staging = os.path.join(cube_dir, VALUES_FILE + '.tmp')
+    values = np.lib.format.open_memmap(staging, mode='w+', dtype=np.float32,
+                                       shape=(len(countries), len(datasets), len(years)))
+    values[:] = np.nan
+    country_pos = pd.Index(countries)
+    year_pos = {year: i for i, year in enumerate(years)}
+    for i, table in enumerate(tables):
+        year_columns = [col for col in table.columns if col not in ('Country Name', 'Indicator Name')]
+        rows = country_pos.get_indexer(table.index)
+        cols = np.array([year_pos[int(col)] for col in year_columns])
+        values[rows[:, None], i, cols[None, :]] = table[year_columns].to_numpy(dtype=np.float32)
+    values.flush()
+    del values
+    os.replace(staging, os.path.join(cube_dir, VALUES_FILE))
+
+    axes = {
+        'countries': countries,
+        'country_names': names.tolist(),
+        'indicators': [dataset['name'] for dataset in datasets],
+        'indicator_names': [str(table['Indicator Name'].iloc[0]) for table in tables],
+        'years': years,
+    }
+    with open(os.path.join(cube_dir, AXES_FILE), 'w', encoding='utf-8') as f:
+        json.dump(axes, f, ensure_ascii=False, indent=1)
+
+    print(f"Cube of {len(countries)} countries x {len(datasets)} indicators x {len(years)} years "
+          f"({years[0]}-{years[-1]}) saved to: {cube_dir}")
+    return IndicatorCube.open(cube_dir)
+
+
+def pairwise_correlations(matrix):
+    """
+    Pearson correlation between the columns of a 2-D array with NaN gaps,
+    each pair over the rows where both are present (like DataFrame.corr)
+    """
+    present = ~np.isnan(matrix)
+    x = np.where(present, matrix, 0.0)
+    weights = present.astype(np.float64)
+
+    n = weights.T @ weights
+    sum_x = x.T @ weights                  # [i, j]: sum of column i over rows where j is present
+    sum_xx = (x * x).T @ weights
+    sum_xy = x.T @ x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = var_x.T
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[n < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+class IndicatorCube:
+    """Labelled, memory-mapped country x indicator x year array"""
+
+    def __init__(self, values, axes):
+        self.values = values
+        self.countries = pd.Index(axes['countries'], name='Country Code')
+        self.country_names = pd.Series(axes['country_names'], index=self.countries, name='Country Name')
+        self.indicators = pd.Index(axes['indicators'], name='Indicator')
+        self.indicator_names = dict(zip(axes['indicators'], axes['indicator_names']))
+        self.years = pd.Index(axes['years'], name='Year')
+        self._country_pos = {code: i for i, code in enumerate(self.countries)}
+        self._indicator_pos = {name: i for i, name in enumerate(self.indicators)}
+
+    @classmethod
+    def open(cls, cube_dir=CUBE_DIR):
+        with open(os.path.join(cube_dir, AXES_FILE), encoding='utf-8') as f:
+            axes = json.load(f)
+        return cls(np.load(os.path.join(cube_dir, VALUES_FILE), mmap_mode='r'), axes)
+
+    def _year_slice(self, years):
+        if years is None:
+            return slice(None)
+        first, last = years
+        return slice(self.years.searchsorted(first, 'left'), self.years.searchsorted(last, 'right'))
+
+    def _positions(self, labels, lookup):
+        if labels is None:
+            return slice(None)
+        if isinstance(labels, str):
+            return lookup[labels]
+        return [lookup[label] for label in labels]
+
+    def slice(self, countries=None, indicators=None, years=None):
+        """Raw array for the selected countries, indicators and (first, last) year range"""
+        block = self.values[:, :, self._year_slice(years)]
+        block = block[self._positions(countries, self._country_pos)]
+        if isinstance(countries, str):
+            return block[self._positions(indicators, self._indicator_pos)]
+        return block[:, self._positions(indicators, self._indicator_pos)]
+
+    def value(self, country, indicator, year):
+        return float(self.values[self._country_pos[country], self._indicator_pos[indicator],
+                                 self.years.get_loc(year)])
+
+    def series(self, country, indicator, years=None):
+        """One country's yearly values of one indicator"""
+        year_slice = self._year_slice(years)
+        return pd.Series(self.values[self._country_pos[country], self._indicator_pos[indicator], year_slice],
+                         index=self.years[year_slice], name=indicator)
+
+    def country(self, country, years=None):
+        """Indicators x years for one country"""
+        year_slice = self._year_slice(years)
+        return pd.DataFrame(self.values[self._country_pos[country], :, year_slice],
+                            index=self.indicators, columns=self.years[year_slice])
+
+    def indicator(self, indicator, years=None):
+        """Countries x years for one indicator"""
+        year_slice = self._year_slice(years)
+        return pd.DataFrame(self.values[:, self._indicator_pos[indicator], year_slice],
+                            index=self.countries, columns=self.years[year_slice])
+
+    def correlations(self, countries=None, years=None):
+        """
+        Indicator x indicator Pearson correlations over every (country, year)
+        observation in the selection, each pair over the cells where both exist
+        """
+        block = np.asarray(self.values[:, :, self._year_slice(years)], dtype=np.float64)
+        if countries is not None:
+            block = block[[self._country_pos[code] for code in ([countries] if isinstance(countries, str)
+                                                                 else countries)]]
+        observations = block.transpose(0, 2, 1).reshape(-1, len(self.indicators))
+        return pd.DataFrame(pairwise_correlations(observations), index=self.indicators, columns=self.indicators)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the Round 1 country x indicator x year cube")
+    parser.add_argument('command', choices=['build', 'info'], help="build the cube, or summarise an existing one")
+    parser.add_argument('--base-dir', default='.', help="Directory the dataset paths are relative to")
+    parser.add_argument('--cube-dir', default=None, help="Cube location (default: <base-dir>/indicator_cube)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the inputs are unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Read the preprocessed tables from the columnar store (default location: datastore/)")
+    args = parser.parse_args(argv)
+    cube_dir = args.cube_dir or os.path.normpath(os.path.join(args.base_dir, CUBE_DIR))
+
+    if args.command == 'build':
+        manifest = BuildManifest(os.path.join(args.base_dir, MANIFEST_FILENAME))
+        store = DataStore(args.store) if args.store else None
+        inputs = [os.path.join(args.base_dir, dataset['path']) for dataset in DATASETS]
+        for dataset in DATASETS:
+            if store is not None:
+                inputs.extend(store.files(store_key(dataset)))
+            else:
+                inputs.append(os.path.join(args.base_dir, dataset['output']))
+        version = script_version(__file__, ['preprocess', 'wdi_loader', 'common.manifest', 'common.store'])
+        params = {'store': args.store}
+        if not args.force and manifest.is_current('round1_cube', inputs, version, params):
+            print(f"{cube_dir} is up to date, nothing to do.")
+        else:
+            build_cube(DATASETS, args.base_dir, cube_dir, store)
+            manifest.record('round1_cube', inputs,
+                            [os.path.join(cube_dir, VALUES_FILE), os.path.join(cube_dir, AXES_FILE)],
+                            version, params)
+        manifest.save()
+
+    start = time.perf_counter()
+    cube = IndicatorCube.open(cube_dir)
+    print(f"Opened {cube.values.shape} cube in {(time.perf_counter() - start) * 1000:.2f} ms")
+    print("\nCross-indicator correlations (all countries and years):")
+    print(cube.correlations().round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
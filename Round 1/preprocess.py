@@ -1,9 +1,26 @@
 import pandas as pd
 import numpy as np
+import argparse
+import contextlib
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from wdi_loader import load_wdi_csv, to_indicator_table
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.instrument import RunReport, add_report_arguments, stage, worker_report
+from common.store import DEFAULT_STORE_DIR, DataStore
 
 def replace_zeros_with_mean(df, dataset_name):
-    """Replace zero values with column means for numeric columns"""
+    """Replace zero values with column means for numeric columns
+
+    The whole numeric block is handled as a single 2-D array: one zero mask
+    drives the zero counts, the per-column non-zero means and the write-back.
+    """
     print(f"\n{'='*50}")
     print(f"Processing: {dataset_name}")
     print(f"{'='*50}")
@@ -11,12 +28,14 @@ def replace_zeros_with_mean(df, dataset_name):
     
     # Check which columns have zero values (excluding Country Name and Country Code)
     numeric_columns = df.select_dtypes(include=[np.number]).columns
-    zero_counts = {}
     
-    for col in numeric_columns:
-        zero_count = (df[col] == 0).sum()
-        if zero_count > 0:
-            zero_counts[col] = zero_count
+    # One row per numeric column so every per-column reduction is contiguous
+    values = df[numeric_columns].to_numpy(dtype=np.float64).T.copy()
+    zero_mask = values == 0
+    column_zero_counts = zero_mask.sum(axis=1)
+    zero_counts = {
+        col: count for col, count in zip(numeric_columns, column_zero_counts) if count > 0
+    }
     
     print(f"Columns with zero values: {len(zero_counts)}")
     if zero_counts:
@@ -27,23 +46,31 @@ def replace_zeros_with_mean(df, dataset_name):
     # Create a copy of the dataframe to preserve original
     df_cleaned = df.copy()
     
-    # Replace zeros with column means for numeric columns only
-    for col in numeric_columns:
-        if col in zero_counts:
-            # Calculate mean excluding zeros and NaN values
-            non_zero_mean = df_cleaned[df_cleaned[col] != 0][col].mean()
-            
-            # Replace zeros with the mean
-            df_cleaned.loc[df_cleaned[col] == 0, col] = non_zero_mean
-            
+    # Mean excluding zeros and NaN values; reduced over the same compacted
+    # values pandas would see, so the means match the column-wise result bit for bit
+    has_zeros = column_zero_counts > 0
+    non_zero_means = np.full(len(numeric_columns), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i in np.flatnonzero(has_zeros):
+            non_zero = values[i][~zero_mask[i]]
+            non_zero_means[i] = np.nansum(non_zero) / np.count_nonzero(~np.isnan(non_zero))
+    
+    # Replace zeros with the means in a single write-back
+    if has_zeros.any():
+        cleaned = np.where(zero_mask, non_zero_means[:, None], values)
+        zero_columns = numeric_columns[has_zeros]
+        df_cleaned[zero_columns] = pd.DataFrame(
+            cleaned[has_zeros].T, index=df.index, columns=zero_columns
+        )
+        for col, non_zero_mean in zip(zero_columns, non_zero_means[has_zeros]):
             print(f"Replaced {zero_counts[col]} zeros in '{col}' with mean: {non_zero_mean:.6f}")
     
-    # Verify no zeros remain in numeric columns
-    remaining_zeros = {}
-    for col in numeric_columns:
-        zero_count = (df_cleaned[col] == 0).sum()
-        if zero_count > 0:
-            remaining_zeros[col] = zero_count
+    # Zeros can only remain where the non-zero mean is itself zero
+    remaining_zeros = {
+        col: zero_counts[col]
+        for col, non_zero_mean in zip(numeric_columns, non_zero_means)
+        if col in zero_counts and non_zero_mean == 0
+    }
     
     if remaining_zeros:
         print("\nRemaining zeros:")
@@ -55,56 +82,200 @@ def replace_zeros_with_mean(df, dataset_name):
     return df_cleaned
 
 # Define all datasets to process
+# Raw World Bank downloads are read directly; 'years' selects the range the
+# dashboards use and 'output' keeps the established *_preprocess.csv names
 datasets = [
     {
-        'path': './agricultural land(%)/Agriculture_land_percentage.csv',
+        'path': './agricultural land(%)/API_AG.LND.AGRI.ZS_DS2_en_csv_v2_3416072.csv',
+        'format': 'wdi',
+        'years': [1961, 2023],
+        'output': './agricultural land(%)/Agriculture_land_percentage_preprocess.csv',
         'name': 'Agricultural Land Percentage'
     },
     {
-        'path': './CO2 emission per capita/CO2 Emission Per Country.csv',
+        'path': './CO2 emission per capita/API_EN.ATM.CO2E.PC_DS2_en_csv_v2_3403796.csv',
+        'format': 'wdi',
+        'years': [1990, 2020],
+        'output': './CO2 emission per capita/CO2 Emission Per Country_preprocess.csv',
         'name': 'CO2 Emission Per Capita'
     },
     {
-        'path': './electic power consumption per capita/Electric_Power_Consumption.csv',
+        'path': './electic power consumption per capita/API_EG.USE.ELEC.KH.PC_DS2_en_csv_v2_3428121.csv',
+        'format': 'wdi',
+        'years': [1971, 2014],
+        'output': './electic power consumption per capita/Electric_Power_Consumption_preprocess.csv',
         'name': 'Electric Power Consumption'
     },
     {
-        'path': './Renewable electricity output (% of total electricity output)/Renewable_electricity.csv',
+        'path': './Renewable electricity output (% of total electricity output)/API_EG.ELC.RNEW.ZS_DS2_en_csv_v2_3436367.csv',
+        'format': 'wdi',
+        'years': [1990, 2015],
+        'output': './Renewable electricity output (% of total electricity output)/Renewable_electricity_preprocess.csv',
         'name': 'Renewable Electricity Output'
     },
     {
-        'path': './Total greenhouse gas emissions (kt of CO2 equivalent)/Total_Greenhouse_gas.csv',
+        'path': './Total greenhouse gas emissions (kt of CO2 equivalent)/API_EN.ATM.GHGT.KT.CE_DS2_en_csv_v2_3419642.csv',
+        'format': 'wdi',
+        'years': [1990, 2020],
+        'output': './Total greenhouse gas emissions (kt of CO2 equivalent)/Total_Greenhouse_gas_preprocess.csv',
         'name': 'Total Greenhouse Gas Emissions'
     }
 ]
 
-print("Starting preprocessing of all datasets...")
-print(f"Total datasets to process: {len(datasets)}")
+def load_manifest(manifest_path):
+    """
+    Load a JSON job manifest: a list of {"path": ..., "name": ...} entries.
+    Raw WDI files take "format": "wdi" plus optional "years" and "output".
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        jobs = json.load(f)
+    
+    for job in jobs:
+        if 'path' not in job:
+            raise ValueError(f"Manifest entry without 'path': {job}")
+        job.setdefault('name', os.path.splitext(os.path.basename(job['path']))[0])
+    return jobs
+
+def preprocess_output_path(input_path):
+    """Generate output filename with preprocess tag"""
+    directory = os.path.dirname(input_path)
+    filename = os.path.basename(input_path)
+    name, ext = os.path.splitext(filename)
+    output_filename = f"{name}_preprocess{ext}"
+    return os.path.join(directory, output_filename)
+
+def store_key(dataset):
+    """Columnar-store key of a job, e.g. 'CO2 Emission Per Capita' -> round1/wdi/co2_emission_per_capita"""
+    return 'round1/wdi/' + '_'.join(dataset['name'].lower().split())
+
+def process_dataset(dataset, base_dir='.', store_dir=None):
+    """
+    Run one manifest job (read -> impute -> write) and report on it.
+    Errors are caught here so one bad indicator file never takes down the batch.
+    With a store_dir, the cleaned table is also written to the columnar store.
+    The job's stage timings are returned under 'stages'.
+    """
+    result = {
+        'name': dataset['name'],
+        'output_path': None,
+        'rows': 0,
+        'seconds': 0.0,
+        'error': None,
+    }
+    log = io.StringIO()
+    start = time.perf_counter()
+    
+    with contextlib.redirect_stdout(log), worker_report(dataset['name']) as job_report:
+        try:
+            input_path = os.path.normpath(os.path.join(base_dir, dataset['path']))
+            
+            # Load the dataset
+            with stage('read') as s:
+                if dataset.get('format') == 'wdi':
+                    first_year, last_year = dataset.get('years') or (None, None)
+                    df_raw = load_wdi_csv(input_path, year_dtype='float64')
+                    df = to_indicator_table(df_raw, first_year, last_year)
+                else:
+                    df = pd.read_csv(input_path)
+                s.rows_out = len(df)
+            result['rows'] = len(df)
+            
+            # Process the dataset
+            with stage('replace_zeros', len(df)) as s:
+                df_cleaned = replace_zeros_with_mean(df, dataset['name'])
+                s.rows_out = len(df_cleaned)
+            
+            # Save the cleaned dataset
+            if 'output' in dataset:
+                output_path = os.path.normpath(os.path.join(base_dir, dataset['output']))
+            else:
+                output_path = preprocess_output_path(input_path)
+            with stage('write', len(df_cleaned)):
+                df_cleaned.to_csv(output_path, index=False)
+            result['output_path'] = output_path
+            print(f"✓ Saved preprocessed data to: {output_path}")
+            
+            if store_dir:
+                with stage('store', len(df_cleaned)):
+                    DataStore(store_dir).write(df_cleaned, store_key(dataset))
+            
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"✗ Error processing {dataset['name']}: {str(e)}")
+    
+    result['seconds'] = time.perf_counter() - start
+    result['log'] = log.getvalue()
+    result['stages'] = job_report.stages
+    return result
+
+def run_jobs(jobs, workers=None, base_dir='.', store_dir=None):
+    """
+    Execute manifest jobs on a process pool and return their results in manifest order.
+    Each job's report is printed as a block when it finishes.
+    """
+    results = {}
+    
+    if workers == 1:
+        for index, job in enumerate(jobs):
+            results[index] = process_dataset(job, base_dir, store_dir)
+            print(results[index]['log'], end='')
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(process_dataset, job, base_dir, store_dir): index
+                for index, job in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                print(results[index]['log'], end='')
+    
+    return [results[index] for index in range(len(jobs))]
+
+def print_job_report(results):
+    """Per-job timing and row counts"""
+    print(f"\n{'Dataset':<35} {'Rows':>8} {'Seconds':>9}  Status")
+    for result in results:
+        status = "ok" if result['error'] is None else f"failed: {result['error']}"
+        print(f"{result['name']:<35} {result['rows']:>8} {result['seconds']:>9.3f}  {status}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replace zeros with column means in Round 1 indicator files")
+    parser.add_argument('--manifest', help="JSON job manifest (defaults to the built-in Round 1 datasets)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: one per CPU, 1 runs in-process)")
+    parser.add_argument('--base-dir', default='.',
+                        help="Directory the manifest paths are relative to")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the cleaned tables to the columnar store (default location: datastore/)")
+    add_report_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    jobs = load_manifest(args.manifest) if args.manifest else datasets
+    
+    print("Starting preprocessing of all datasets...")
+    print(f"Total datasets to process: {len(jobs)}")
+    
+    with RunReport.from_args('round1_preprocess', args) as report:
+        start = time.perf_counter()
+        with stage('run_jobs', len(jobs)) as s:
+            results = run_jobs(jobs, workers=args.workers, base_dir=args.base_dir, store_dir=args.store)
+            s.rows_out = sum(result['rows'] for result in results)
+        elapsed = time.perf_counter() - start
+        for result in results:
+            report.add_stages(result['stages'], prefix=result['name'])
+        report.extra['jobs'] = [{key: result[key] for key in ('name', 'rows', 'seconds', 'error')}
+                                for result in results]
+    
+    print_job_report(results)
+    failed = sum(result['error'] is not None for result in results)
+    
+    print(f"\n{'='*60}")
+    print("PREPROCESSING COMPLETE!")
+    print(f"{'='*60}")
+    print(f"Processed {len(results) - failed}/{len(results)} datasets in {elapsed:.2f}s.")
+    print("All datasets have been processed and saved with '_preprocess' suffix.")
 
-# Process each dataset
-for dataset in datasets:
-    try:
-        # Load the dataset
-        df = pd.read_csv(dataset['path'])
-        
-        # Process the dataset
-        df_cleaned = replace_zeros_with_mean(df, dataset['name'])
-        
-        # Generate output filename with preprocess tag
-        directory = os.path.dirname(dataset['path'])
-        filename = os.path.basename(dataset['path'])
-        name, ext = os.path.splitext(filename)
-        output_filename = f"{name}_preprocess{ext}"
-        output_path = os.path.join(directory, output_filename)
-        
-        # Save the cleaned dataset
-        df_cleaned.to_csv(output_path, index=False)
-        print(f"✓ Saved preprocessed data to: {output_path}")
-        
-    except Exception as e:
-        print(f"✗ Error processing {dataset['name']}: {str(e)}")
 
-print(f"\n{'='*60}")
-print("PREPROCESSING COMPLETE!")
-print(f"{'='*60}")
-print("All datasets have been processed and saved with '_preprocess' suffix.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.manifest import file_sha256
+
+# Raw World Bank downloads (API_<indicator>_DS2_en_csv_v2_<id>.csv) start with
+# "Data Source" / "Last Updated Date" lines before the real header
+WDI_PREAMBLE_LINES = 4
+WDI_LABEL_COLUMNS = ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code']
+CACHE_DIR_NAME = '.wdi_cache'
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pkl'
+
+def read_wdi_csv(path, year_dtype='float32'):
+    """
+    Parse a raw WDI indicator file.
+    Skips the metadata preamble and BOM, drops the trailing empty column,
+    types the year columns as year_dtype and the code columns as categoricals.
+    """
+    df = pd.read_csv(path, skiprows=WDI_PREAMBLE_LINES, encoding='utf-8-sig')
+
+    # Every data line ends with a comma, which pandas reads as an "Unnamed: N" column
+    df = df.loc[:, ~df.columns.str.startswith('Unnamed')]
+
+    year_columns = [col for col in df.columns if col not in WDI_LABEL_COLUMNS]
+    df[year_columns] = df[year_columns].astype(year_dtype)
+    for col in ['Country Code', 'Indicator Name', 'Indicator Code']:
+        df[col] = df[col].astype('category')
+
+    return df
+
+def cache_path_for(path, digest, year_dtype, cache_dir=None):
+    """Sidecar location for a parsed source file, keyed by its content hash"""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}.{digest[:16]}.{np.dtype(year_dtype).name}.{CACHE_FORMAT}")
+
+def load_wdi_csv(path, year_dtype='float32', cache_dir=None, use_cache=True):
+    """
+    Load a raw WDI indicator file, going through a columnar sidecar cache.
+    The sidecar is Feather when pyarrow is installed, a pandas pickle otherwise;
+    a changed source file gets a new hash, and stale sidecars are removed.
+    """
+    if not use_cache:
+        return read_wdi_csv(path, year_dtype)
+
+    digest = file_sha256(path)
+    cache_path = cache_path_for(path, digest, year_dtype, cache_dir)
+
+    if os.path.exists(cache_path):
+        if CACHE_FORMAT == 'feather':
+            return pd.read_feather(cache_path)
+        return pd.read_pickle(cache_path)
+
+    df = read_wdi_csv(path, year_dtype)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    dtype_name = np.dtype(year_dtype).name
+    for stale in glob.glob(os.path.join(os.path.dirname(cache_path), glob.escape(stem) + '.*')):
+        if stale.endswith(f".{dtype_name}.{CACHE_FORMAT}"):
+            os.remove(stale)
+
+    if CACHE_FORMAT == 'feather':
+        df.to_feather(cache_path)
+    else:
+        df.to_pickle(cache_path)
+
+    return df
+
+def to_indicator_table(df, first_year=None, last_year=None, fill_value=0):
+    """
+    Reshape a parsed WDI frame into the Round 1 indicator layout:
+    Country Name, Indicator Name and the selected year range.
+    Gaps are set to fill_value in every year that has at least one observation
+    (the imputation step treats zeros as missing); empty years stay NaN.
+    """
+    year_columns = [
+        col for col in df.columns
+        if col not in WDI_LABEL_COLUMNS
+        and (first_year is None or int(col) >= first_year)
+        and (last_year is None or int(col) <= last_year)
+    ]
+
+    table = df[['Country Name', 'Indicator Name'] + year_columns].copy()
+    table['Indicator Name'] = table['Indicator Name'].astype(str)
+
+    if fill_value is not None:
+        observed = [col for col in year_columns if table[col].notna().any()]
+        table[observed] = table[observed].fillna(fill_value)
+
+    return table
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from temperature_trends import BASELINE, INPUT_FILE, ROLLING_WINDOW
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.trends import TrendMatrix, baseline_anomalies, ols_trend, period_change, rolling_mean
+
+
+def trends_groupby_apply(df):
+    """Reference implementation: one polyfit, rolling mean and baseline per country via groupby-apply"""
+    def per_country(group):
+        group = group.sort_values('Year')
+        years = group['Year'].to_numpy(dtype=np.float64)
+        values = group['AverageTemperature'].to_numpy()
+        slope, intercept = np.polyfit(years, values, 1)
+        in_baseline = group['Year'].between(*BASELINE)
+        return pd.DataFrame({
+            'Year': group['Year'].to_numpy(),
+            'slope': slope,
+            'rolling': group['AverageTemperature'].rolling(ROLLING_WINDOW).mean().to_numpy(),
+            'change': group['AverageTemperature'].diff().to_numpy(),
+            'anomaly': values - group.loc[in_baseline, 'AverageTemperature'].mean(),
+        })
+
+    return df.groupby('Country', sort=True)[['Year', 'AverageTemperature']].apply(per_country)
+
+
+def trends_vectorized(df):
+    matrix = TrendMatrix.from_long(df, 'Country', 'Year', 'AverageTemperature')
+    years = matrix.periods.to_numpy()
+    return {
+        'slope': ols_trend(matrix.values, years)['slope'],
+        'rolling': rolling_mean(matrix.values, ROLLING_WINDOW),
+        'change': period_change(matrix.values),
+        'anomaly': baseline_anomalies(matrix.values, years, BASELINE)[0],
+    }
+
+
+def blow_up(df, factor, seed=0):
+    """factor copies of every country under new names with jittered temperatures, rows shuffled"""
+    rng = np.random.default_rng(seed)
+    copies = []
+    for copy in range(factor):
+        part = df.copy()
+        part['Country'] = part['Country'] + f" #{copy}"
+        part['AverageTemperature'] += rng.normal(0, 0.5, len(part))
+        copies.append(part)
+    big = pd.concat(copies, ignore_index=True)
+    return big.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return time.perf_counter() - start, result
+
+
+def main(factor=50, reference_countries=1_000):
+    df = pd.read_csv(INPUT_FILE, usecols=['Country', 'Date', 'AverageTemperature']).rename(columns={'Date': 'Year'})
+    datasets = [('original', df), (f"{factor}x", blow_up(df, factor))]
+
+    print(f"{'Dataset':<10} {'Countries':>9} {'Rows':>8} {'Vectorized':>11} {'groupby-apply':>14} {'Speed-up':>9}")
+    for label, data in datasets:
+        fast_time, fast = timed(trends_vectorized, data)
+
+        # groupby-apply is too slow for the full blow-up; check it on a slice of the countries
+        countries = np.sort(data['Country'].unique())
+        sample = data
+        if len(countries) > reference_countries:
+            sample = data[data['Country'].isin(countries[:reference_countries])]
+        slow_time, slow = timed(trends_groupby_apply, sample)
+
+        n = sample['Country'].nunique()
+        for key in ('slope', 'rolling', 'change', 'anomaly'):
+            expected = slow[key].to_numpy()
+            if key == 'slope':
+                expected = slow[key].groupby(level=0).first().to_numpy()
+                actual = fast[key][:n]
+            else:
+                actual = fast[key][:n].reshape(-1)
+            np.testing.assert_allclose(actual, expected, rtol=1e-7, atol=1e-9, err_msg=key)
+
+        if sample is not data:
+            slow_time *= len(countries) / n
+        note = '' if sample is data else '*'
+        print(f"{label:<10} {len(countries):>9} {len(data):>8} {fast_time:>10.3f}s {slow_time:>12.2f}s{note}"
+              f" {slow_time / fast_time:>8.1f}x")
+    print("* groupby-apply time extrapolated from a subset of countries; results checked on that subset")
+
+
+if __name__ == "__main__":
+    main()
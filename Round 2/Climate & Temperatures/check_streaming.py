@@ -0,0 +1,88 @@
+"""
+Checks that the streaming cleaner writes the same bytes as the in-memory one.
+
+Every input (default: the files in dataset/Cleaned plus a synthetic file
+with mixed date formats, missing values and country groups) is cleaned by
+clean_file and by clean_file_streaming at several chunk sizes, and the
+output files are compared byte for byte. Exits with 1 on any difference.
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import DEFAULT_INPUTS, clean_file, clean_file_streaming, discover_csv_files
+
+CHUNKSIZES = [1, 7, 128, 1000, 65_536]
+
+
+def write_synthetic_input(path, rows=200_000, seed=0):
+    """Monthly country temperatures in three date formats, with missing values and keys"""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1750, 2020, rows)
+    months = rng.integers(1, 13, rows)
+    formats = rng.integers(0, 3, rows)
+    dates = np.where(formats == 0, [f"{y}-{m:02d}-01" for y, m in zip(years, months)],
+                     np.where(formats == 1, [f"01-{m:02d}-{y}" for y, m in zip(years, months)], years.astype(str)))
+    df = pd.DataFrame({
+        'dt': dates,
+        'Country': rng.choice(['Albania', 'Benin', 'Korea, Rep. of', 'Peru'], rows),
+        'AverageTemperature': rng.normal(15, 10, rows) * 10 ** rng.uniform(-2, 4, rows),
+        'AverageTemperatureUncertainty': rng.random(rows),
+    })
+    df.loc[rng.random(rows) < 0.1, 'AverageTemperature'] = np.nan
+    df.loc[rng.random(rows) < 0.001, 'dt'] = np.nan
+    df.loc[rng.random(rows) < 0.001, 'Country'] = np.nan
+    df.to_csv(path, index=False)
+
+
+def check_file(file_path, work_dir, chunksizes=CHUNKSIZES):
+    """Chunk sizes whose streaming output differs from the in-memory output"""
+    expected = os.path.join(work_dir, 'in_memory.csv')
+    streamed = os.path.join(work_dir, 'streaming.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = clean_file(file_path, expected)
+    mismatches = []
+    for chunksize in chunksizes:
+        # One-row chunks are only worth it on small files
+        if chunksize < 100 and rows > 10_000:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean_file_streaming(file_path, streamed, chunksize)
+        same = filecmp.cmp(expected, streamed, shallow=False)
+        print(f"{os.path.basename(file_path):<75} {chunksize:>9} {'identical' if same else 'DIFFERENT'}")
+        if not same:
+            mismatches.append(chunksize)
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare streaming and in-memory cleaner outputs byte for byte")
+    parser.add_argument('inputs', nargs='*', help="Input directories or glob patterns (default: dataset/Cleaned)")
+    parser.add_argument('--no-synthetic', action='store_true', help="Skip the synthetic input")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        files = discover_csv_files(args.inputs or DEFAULT_INPUTS)
+        if not args.no_synthetic:
+            synthetic = os.path.join(work_dir, 'synthetic_country_temperatures.csv')
+            write_synthetic_input(synthetic)
+            files.append(synthetic)
+
+        print(f"{'File':<75} {'Chunksize':>9} Output")
+        for file_path in files:
+            failed += bool(check_file(file_path, work_dir))
+
+    print(f"\n{failed} of {len(files)} file(s) differ between streaming and in-memory cleaning")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,21 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import contextlib
+import glob
+import io
+import itertools
 import re
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.instrument import RunReport, add_report_arguments, stage, worker_report
+from common.manifest import MANIFEST_FILENAME, BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
 
 def parse_date_to_year(date_str):
     """
@@ -37,64 +50,104 @@ def parse_date_to_year(date_str):
     
     return np.nan
 
-def clean_csv_files():
+# Formats recognised without per-row parsing; each alternative captures the year
+DATE_FORMAT_PATTERN = re.compile(
+    r'^(?:(?P<yyyy>\d{4})|(?P<yyyy_mm_dd>\d{4})-\d{2}-\d{2}|\d{2}-\d{2}-(?P<dd_mm_yyyy>\d{4}))$'
+)
+
+def dates_to_years(dates):
+    """
+    Vectorized parse_date_to_year over a whole column.
+    Distinct values are classified by format in one str.extract pass and the
+    years broadcast back through the factorized codes; only values matching no
+    known format go through parse_date_to_year.
+    Returns the year series and a per-format hit count (in rows).
+    """
+    codes, uniques = pd.factorize(dates)
+    text = pd.Series(uniques, dtype=object).astype('string').str.strip()
+
+    extracted = text.str.extract(DATE_FORMAT_PATTERN)
+    unique_years = np.full(len(uniques), np.nan)
+    unique_formats = np.full(len(uniques), len(extracted.columns))
+    for position, fmt in enumerate(extracted.columns):
+        matched = extracted[fmt].notna().to_numpy()
+        unique_years[matched] = extracted.loc[matched, fmt].astype(int).to_numpy()
+        unique_formats[matched] = position
+
+    residual = unique_formats == len(extracted.columns)
+    unique_years[residual] = [parse_date_to_year(value) for value in uniques[residual]]
+
+    # factorize gives missing values code -1, which lands on the trailing NaN slot
+    years = pd.Series(np.append(unique_years, np.nan)[codes], index=dates.index, name=dates.name)
+
+    format_rows = np.bincount(unique_formats[codes[codes >= 0]], minlength=len(extracted.columns) + 1)
+    hit_counts = {fmt: int(count) for fmt, count in zip(extracted.columns, format_rows)}
+    hit_counts['fallback'] = int(format_rows[-1])
+    hit_counts['missing'] = int((codes < 0).sum())
+
+    # Match Series.apply(parse_date_to_year): integer years unless something failed
+    if years.notna().all():
+        years = years.astype(np.int64)
+    return years, hit_counts
+
+def find_date_columns(columns):
+    """Columns holding dates, by name"""
+    date_columns = []
+    for col in columns:
+        if 'date' in col.lower() or col.lower() == 'date':
+            date_columns.append(col)
+    return date_columns
+
+def clean_file(file_path, output_path):
     """
-    Clean all CSV files in the Cleaned folder
+    Clean one CSV file in memory: dates to years, nulls to column means,
+    then yearly averages per year and categorical columns.
+    Returns the number of input rows.
     """
-    cleaned_folder = r"c:\Users\vinay\projects\climate-o-metric\Round 2\Climate & Temperatures\Cleaned"
-    preprocessed_folder = r"c:\Users\vinay\projects\climate-o-metric\Round 2\Climate & Temperatures\Preprocessed"
+    # Read the CSV file
+    with stage('read') as s:
+        df = pd.read_csv(file_path)
+        s.rows_out = len(df)
+    rows = len(df)
+    print(f"Original shape: {df.shape}")
     
-    # Create preprocessed folder if it doesn't exist
-    os.makedirs(preprocessed_folder, exist_ok=True)
+    # Check for null values
+    null_counts = df.isnull().sum()
+    print(f"Null values per column:\n{null_counts[null_counts > 0]}")
     
-    csv_files = [
-        "Climate_Indicators_Annual_Mean_Global_Surface_Temperature_Cleaned.csv",
-        "GlobalLandTemperaturesByCountry_cleaned.csv", 
-        "GlobalTemperatures_Cleaned.csv"
-    ]
+    # Handle date columns
+    date_columns = find_date_columns(df.columns)
     
-    for filename in csv_files:
-        print(f"\n=== Processing {filename} ===")
-        file_path = os.path.join(cleaned_folder, filename)
-        
-        # Read the CSV file
-        df = pd.read_csv(file_path)
-        print(f"Original shape: {df.shape}")
-        
-        # Check for null values
-        null_counts = df.isnull().sum()
-        print(f"Null values per column:\n{null_counts[null_counts > 0]}")
-        
-        # Handle date columns
-        date_columns = []
-        for col in df.columns:
-            if 'date' in col.lower() or col.lower() == 'date':
-                date_columns.append(col)
-        
-        if date_columns:
-            print(f"Found date columns: {date_columns}")
+    if date_columns:
+        print(f"Found date columns: {date_columns}")
+        with stage('normalize_dates', len(df)) as s:
             for date_col in date_columns:
                 print(f"Converting {date_col} to year...")
-                df[date_col] = df[date_col].apply(parse_date_to_year)
-        
-        # Fill null values with column means for numeric columns
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
+                df[date_col], hit_counts = dates_to_years(df[date_col])
+                print("Date formats matched: " + ", ".join(f"{fmt}={count}" for fmt, count in hit_counts.items()))
+            s.rows_out = len(df)
+    
+    # Fill null values with column means for numeric columns
+    numeric_columns = df.select_dtypes(include=[np.number]).columns
+    with stage('fill_means', len(df)) as s:
         for col in numeric_columns:
             if df[col].isnull().sum() > 0:
                 mean_val = df[col].mean()
-                df[col].fillna(mean_val, inplace=True)
+                df[col] = df[col].fillna(mean_val)
                 print(f"Filled {null_counts[col]} null values in {col} with mean: {mean_val:.4f}")
+        s.rows_out = len(df)
+    
+    # For files with date columns, group by year and calculate averages
+    if date_columns and len(date_columns) > 0:
+        date_col = date_columns[0]  # Use first date column
+        print(f"Grouping by year and calculating averages...")
         
-        # For files with date columns, group by year and calculate averages
-        if date_columns and len(date_columns) > 0:
-            date_col = date_columns[0]  # Use first date column
-            print(f"Grouping by year and calculating averages...")
-            
-            # Group by year and other non-numeric columns, then average numeric columns
-            non_numeric_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
-            if date_col in non_numeric_cols:
-                non_numeric_cols.remove(date_col)
-            
+        # Group by year and other non-numeric columns, then average numeric columns
+        non_numeric_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
+        if date_col in non_numeric_cols:
+            non_numeric_cols.remove(date_col)
+        
+        with stage('groupby_year', len(df)) as s:
             if non_numeric_cols:
                 # Group by year and other categorical columns
                 group_cols = [date_col] + non_numeric_cols
@@ -102,19 +155,459 @@ def clean_csv_files():
             else:
                 # Group by year only
                 df_grouped = df.groupby(date_col, as_index=False)[numeric_columns].mean()
-            
-            df = df_grouped
-            print(f"After grouping by year, shape: {df.shape}")
+            s.rows_out = len(df_grouped)
         
-        # Save the processed file
-        output_path = os.path.join(preprocessed_folder, filename.replace('_Cleaned', '_Preprocessed'))
+        df = df_grouped
+        print(f"After grouping by year, shape: {df.shape}")
+    
+    # Save the processed file
+    with stage('write', len(df)):
         df.to_csv(output_path, index=False)
-        print(f"Saved processed file: {output_path}")
+    print(f"Saved processed file: {output_path}")
+    
+    # Show final statistics
+    print(f"Final shape: {df.shape}")
+    final_nulls = df.isnull().sum().sum()
+    print(f"Total null values remaining: {final_nulls}")
+    
+    return rows
+
+# numpy's pairwise summation sums runs of up to this many values with 8 accumulators
+PAIRWISE_BLOCK = 128
+
+def pairwise_leaf_lengths(n):
+    """Lengths of the runs numpy's pairwise sum splits n values into, in order"""
+    if n <= PAIRWISE_BLOCK:
+        yield n
+        return
+    half = n // 2
+    half -= half % 8
+    yield from pairwise_leaf_lengths(half)
+    yield from pairwise_leaf_lengths(n - half)
+
+def pairwise_leaf_sums(values, starts, length):
+    """numpy's sum of each run values[start:start + length], for many equal-length runs at once"""
+    runs = values[starts[:, None] + np.arange(length)]
+    if length < 8:
+        sums = np.zeros(len(starts))
+        for i in range(length):
+            sums += runs[:, i]
+        return sums
+    lanes = runs[:, :8].copy()
+    end = length - length % 8
+    for i in range(8, end, 8):
+        lanes += runs[:, i:i + 8]
+    sums = ((lanes[:, 0] + lanes[:, 1]) + (lanes[:, 2] + lanes[:, 3])) + \
+           ((lanes[:, 4] + lanes[:, 5]) + (lanes[:, 6] + lanes[:, 7]))
+    for i in range(end, length):
+        sums += runs[:, i]
+    return sums
+
+class StreamingColumnSum:
+    """
+    Sum of a column of n values fed in chunks, equal to the bit to numpy's
+    (and so pandas') sum of the whole column. The run sums are taken as soon
+    as a run is complete and combined along numpy's split tree at the end.
+    Missing values count as 0, as in Series.sum.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.lengths = pairwise_leaf_lengths(n)
+        self.pending = np.empty(0)
+        self.leaf_sums = []
+
+    def add(self, values):
+        pending = np.concatenate([self.pending, np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)])
+        starts, lengths, position = [], [], 0
+        for length in self.lengths:
+            if position + length > len(pending):
+                # Not complete yet: put it back in front of the remaining runs
+                self.lengths = itertools.chain([length], self.lengths)
+                break
+            starts.append(position)
+            lengths.append(length)
+            position += length
+        starts, lengths = np.array(starts, dtype=np.int64), np.array(lengths, dtype=np.int64)
+        sums = np.empty(len(starts))
+        for length in np.unique(lengths):
+            same = lengths == length
+            sums[same] = pairwise_leaf_sums(pending, starts[same], length)
+        self.leaf_sums.extend(sums)
+        self.pending = pending[position:]
+
+    def total(self):
+        leaf_sums = iter(self.leaf_sums)
+
+        def combine(n):
+            if n <= PAIRWISE_BLOCK:
+                return next(leaf_sums)
+            half = n // 2
+            half -= half % 8
+            left = combine(half)
+            return left + combine(n - half)
+
+        return 0.0 + combine(self.n)
+
+class StreamingGroupMeans:
+    """
+    Per-group means of value columns fed in chunks, equal to the bit to
+    groupby().mean() over the whole file: like pandas, each group keeps a
+    Kahan-compensated running sum that takes its rows in file order.
+    Within a chunk the rows are applied in rounds, the i-th row of every
+    group in round i, so the work is vectorized over groups.
+    """
+
+    def __init__(self, n_columns):
+        self.group_ids = {}
+        self.sums = np.zeros((0, n_columns))
+        self.compensation = np.zeros((0, n_columns))
+        self.counts = np.zeros((0, n_columns), dtype=np.int64)
+
+    def add(self, keys, values):
+        """keys: frame of the group columns; values: matching rows x columns float array"""
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+        labels = np.array([self.group_ids.setdefault(key, len(self.group_ids)) for key in uniques],
+                          dtype=np.int64)[codes]
+        grow = len(self.group_ids) - len(self.sums)
+        if grow:
+            self.sums = np.vstack([self.sums, np.zeros((grow, self.sums.shape[1]))])
+            self.compensation = np.vstack([self.compensation, np.zeros((grow, self.sums.shape[1]))])
+            self.counts = np.vstack([self.counts, np.zeros((grow, self.sums.shape[1]), dtype=np.int64)])
+        
+        # Position of each row within its group, then the rows round by round
+        order = np.argsort(labels, kind='stable')
+        run_starts = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1]])
+        rank = np.empty(len(labels), dtype=np.int64)
+        rank[order] = np.arange(len(labels)) - np.repeat(run_starts, np.diff(np.r_[run_starts, len(labels)]))
+        by_rank = np.argsort(rank, kind='stable')
+        bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2 if len(rank) else 1))
         
-        # Show final statistics
-        print(f"Final shape: {df.shape}")
+        for i in range(len(bounds) - 1):
+            rows = by_rank[bounds[i]:bounds[i + 1]]
+            group = labels[rows]
+            value = values[rows]
+            present = ~np.isnan(value)
+            total = self.sums[group]
+            y = value - self.compensation[group]
+            t = total + y
+            compensation = (t - total) - y
+            # An infinite value makes the compensation NaN; pandas resets it
+            compensation[np.isnan(compensation)] = 0.0
+            self.compensation[group] = np.where(present, compensation, self.compensation[group])
+            self.sums[group] = np.where(present, t, total)
+            self.counts[group] += present
+
+    def keys(self):
+        return list(self.group_ids)
+
+    def means(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.counts > 0, self.sums / self.counts, np.nan)
+
+def convert_date_columns(chunk, date_columns):
+    """Dates to years for one chunk, returning the per-format hit counts"""
+    hit_totals = {}
+    for date_col in date_columns:
+        chunk[date_col], hit_counts = dates_to_years(chunk[date_col])
+        for fmt, count in hit_counts.items():
+            hit_totals[fmt] = hit_totals.get(fmt, 0) + count
+    return hit_totals
+
+def clean_file_streaming(file_path, output_path, chunksize=100_000):
+    """
+    Chunked equivalent of clean_file with memory bounded by chunksize.
+    Returns the number of input rows.
+    Pass 1 collects null counts, dtypes and non-null counts. Columns with
+    nulls then get their fill means from a pass over just those columns.
+    Pass 2 fills nulls chunk by chunk and either appends the rows to the
+    output or folds them into per-group running sums, which are divided out
+    once the last chunk is in. The sums are taken in the same order as
+    pandas takes them on the whole file, so the output is byte-identical
+    to clean_file's for any chunksize.
+    """
+    columns = pd.read_csv(file_path, nrows=0).columns
+    date_columns = find_date_columns(columns)
+    # A chunk of bare years would otherwise be read as numbers ("1992.0")
+    date_dtypes = {col: object for col in date_columns}
+    
+    # Pass 1: shape, nulls, column kinds and non-null counts
+    rows = 0
+    null_counts = None
+    non_numeric_cols = set()
+    float_cols = set()
+    counts = {}
+    hit_totals = {}
+    
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=date_dtypes):
+        if null_counts is None:
+            null_counts = chunk.isnull().sum()
+        else:
+            null_counts += chunk.isnull().sum()
+        rows += len(chunk)
+        
+        for fmt, count in convert_date_columns(chunk, date_columns).items():
+            hit_totals[fmt] = hit_totals.get(fmt, 0) + count
+        
+        for col in chunk.columns:
+            # A column that is entirely empty in this chunk says nothing about its type
+            if chunk[col].isnull().all():
+                continue
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                non_numeric_cols.add(col)
+            elif pd.api.types.is_float_dtype(chunk[col]):
+                float_cols.add(col)
+        
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            counts[col] = counts.get(col, 0) + chunk[col].count()
+    
+    print(f"Original shape: {(rows, len(columns))}")
+    print(f"Null values per column:\n{null_counts[null_counts > 0]}")
+    
+    if date_columns:
+        print(f"Found date columns: {date_columns}")
+        print("Date formats matched: " + ", ".join(f"{fmt}={count}" for fmt, count in hit_totals.items()))
+    
+    non_numeric_cols -= set(date_columns)
+    numeric_columns = [col for col in columns if col not in non_numeric_cols]
+    # Columns with nulls anywhere are float in the whole-file read
+    float_cols |= {col for col in numeric_columns if null_counts[col] > 0}
+    
+    # Means of the columns with nulls, summed exactly as Series.mean sums them
+    fill_columns = [col for col in numeric_columns if counts.get(col, 0) < rows]
+    if fill_columns:
+        column_sums = {col: StreamingColumnSum(rows) for col in fill_columns}
+        fill_dtypes = {col: (object if col in date_columns else np.float64) for col in fill_columns}
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=fill_columns, dtype=fill_dtypes):
+            convert_date_columns(chunk, [col for col in date_columns if col in fill_columns])
+            for col in fill_columns:
+                column_sums[col].add(chunk[col].to_numpy(dtype=np.float64))
+    
+    fill_values = {}
+    for col in fill_columns:
+        mean_val = column_sums[col].total() / counts[col] if counts.get(col) else np.nan
+        fill_values[col] = mean_val
+        print(f"Filled {null_counts[col]} null values in {col} with mean: {mean_val:.4f}")
+    
+    # Pass 2: fill, then write rows through or fold them into group aggregates
+    read_dtypes = {col: object for col in non_numeric_cols | set(date_columns)}
+    group_cols = [date_columns[0]] + [col for col in columns if col in non_numeric_cols] if date_columns else None
+    value_cols = [col for col in numeric_columns if not group_cols or col not in group_cols]
+    group_means = StreamingGroupMeans(len(value_cols)) if group_cols else None
+    integer_years = True
+    first_chunk = True
+    
+    if group_cols:
+        print(f"Grouping by year and calculating averages...")
+    
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=read_dtypes):
+        convert_date_columns(chunk, date_columns)
+        for col in float_cols:
+            chunk[col] = chunk[col].astype(np.float64)
+        chunk = chunk.fillna(fill_values)
+        
+        if group_cols is None:
+            chunk.to_csv(output_path, index=False, header=first_chunk, mode='w' if first_chunk else 'a')
+            first_chunk = False
+            continue
+        
+        integer_years &= pd.api.types.is_integer_dtype(chunk[group_cols[0]])
+        # groupby drops rows with a missing key
+        keys = chunk[group_cols]
+        complete = keys.notna().all(axis=1).to_numpy()
+        group_means.add(keys[complete], chunk.loc[complete, value_cols].to_numpy(dtype=np.float64))
+    
+    if group_cols is None:
+        if first_chunk:
+            pd.DataFrame(columns=columns).to_csv(output_path, index=False)
+        shape = (rows, len(columns))
+        final_nulls = sum(
+            null_counts[col] for col in columns if col not in fill_values
+        )
+    else:
+        means = pd.DataFrame(group_means.keys(), columns=group_cols)
+        # Years are integers in the whole-file read unless some failed to parse
+        means[group_cols[0]] = means[group_cols[0]].astype(np.int64 if integer_years else np.float64)
+        means[value_cols] = group_means.means()
+        means = means.sort_values(group_cols, ignore_index=True)
+        # Same layout as groupby(as_index=False)[numeric_columns].mean():
+        # key columns outside the selection first, then the selection itself
+        df = means[[col for col in group_cols if col not in numeric_columns]].copy()
+        for col in numeric_columns:
+            df[col] = means[col].astype(np.float64)
+        df.to_csv(output_path, index=False)
+        print(f"After grouping by year, shape: {df.shape}")
+        shape = df.shape
         final_nulls = df.isnull().sum().sum()
-        print(f"Total null values remaining: {final_nulls}")
+    
+    print(f"Saved processed file: {output_path}")
+    
+    # Show final statistics
+    print(f"Final shape: {shape}")
+    print(f"Total null values remaining: {final_nulls}")
+    
+    return rows
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUTS = [os.path.join(SCRIPT_DIR, 'dataset', 'Cleaned')]
+# Not dataset/Preprocessed: the dashboard's tracked GlobalTemperatures_Preprocessed.csv
+# there is a curated 1961+ table this script would overwrite with the full 1850+ series
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'dataset', 'Generated')
+
+def discover_csv_files(inputs):
+    """Expand directories (every *.csv inside) and glob patterns into a sorted file list"""
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            files.extend(glob.glob(os.path.join(glob.escape(entry), '*.csv')))
+        else:
+            files.extend(glob.glob(entry))
+    return sorted(set(os.path.normpath(path) for path in files))
+
+def output_path_for(file_path, output_dir):
+    """Preprocessed file name for an input, never the input itself"""
+    filename = os.path.basename(file_path)
+    output_name = filename.replace('_Cleaned', '_Preprocessed')
+    output_path = os.path.join(output_dir, output_name)
+    if os.path.abspath(output_path) == os.path.abspath(file_path):
+        name, ext = os.path.splitext(output_name)
+        output_path = os.path.join(output_dir, f"{name}_Preprocessed{ext}")
+    return output_path
+
+def store_key_for(output_path):
+    """Columnar-store key of a preprocessed file, e.g. round2/climate/globaltemperatures_preprocessed"""
+    return 'round2/climate/' + os.path.splitext(os.path.basename(output_path))[0].lower()
+
+def process_csv_file(file_path, output_dir, chunksize=None, store_dir=None):
+    """
+    Clean one file and report on it; the printed report is captured so
+    concurrent files do not interleave their output.
+    With a store_dir, the output is also loaded into the columnar store.
+    The file's stage timings are returned under 'stages'.
+    """
+    result = {
+        'file': file_path,
+        'output_path': output_path_for(file_path, output_dir),
+        'rows': 0,
+        'seconds': 0.0,
+        'error': None,
+    }
+    log = io.StringIO()
+    start = time.perf_counter()
+    
+    with contextlib.redirect_stdout(log), worker_report(os.path.basename(file_path)) as job_report:
+        print(f"\n=== Processing {os.path.basename(file_path)} ===")
+        try:
+            if chunksize:
+                # Both passes interleave reading and processing chunks, so they are one stage
+                with stage('clean_streaming') as s:
+                    result['rows'] = s.rows_in = clean_file_streaming(file_path, result['output_path'], chunksize)
+            else:
+                result['rows'] = clean_file(file_path, result['output_path'])
+            if store_dir:
+                with stage('store'):
+                    DataStore(store_dir).write_csv(result['output_path'], store_key_for(result['output_path']),
+                                                   chunksize=chunksize)
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error processing {file_path}: {e}")
+    
+    result['seconds'] = time.perf_counter() - start
+    result['log'] = log.getvalue()
+    result['stages'] = job_report.stages
+    return result
+
+def clean_csv_files(inputs=None, output_dir=None, workers=None, chunksize=None, executor='process', force=False,
+                    store_dir=None):
+    """
+    Clean every CSV file found in the inputs (directories or glob patterns)
+    and write the results to output_dir, several files at a time.
+    With a chunksize, files are streamed so they never load fully into memory.
+    Files whose input and script are unchanged since the last run are skipped
+    unless force is set. With a store_dir, outputs also go to the columnar store.
+    """
+    inputs = inputs or DEFAULT_INPUTS
+    output_dir = output_dir or DEFAULT_OUTPUT_DIR
+    
+    # Create preprocessed folder if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    
+    csv_files = discover_csv_files(inputs)
+    print(f"Found {len(csv_files)} CSV files")
+    
+    manifest = BuildManifest(os.path.join(output_dir, MANIFEST_FILENAME))
+    version = script_version(__file__, ['common.instrument', 'common.manifest', 'common.store'])
+    params = {'store': store_dir}
+    if not force:
+        stale_files = []
+        for file_path in csv_files:
+            if manifest.is_current(f"temperature:{os.path.basename(file_path)}", [file_path], version, params):
+                print(f"Skipping {os.path.basename(file_path)}: up to date")
+            else:
+                stale_files.append(file_path)
+        csv_files = stale_files
+    
+    results = {}
+    if workers == 1:
+        for file_path in csv_files:
+            results[file_path] = process_csv_file(file_path, output_dir, chunksize, store_dir)
+            print(results[file_path]['log'], end='')
+    else:
+        pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+        with pool_class(max_workers=workers) as pool:
+            futures = {
+                pool.submit(process_csv_file, file_path, output_dir, chunksize, store_dir): file_path
+                for file_path in csv_files
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                print(results[futures[future]]['log'], end='')
+    
+    results = [results[file_path] for file_path in csv_files]
+    
+    for result in results:
+        if result['error'] is None:
+            manifest.record(f"temperature:{os.path.basename(result['file'])}",
+                            [result['file']], [result['output_path']], version, params)
+    manifest.save()
+    
+    if not results:
+        return results
+    
+    print(f"\n{'File':<75} {'Rows':>9} {'Seconds':>8} {'Rows/sec':>11}")
+    for result in results:
+        rows_per_second = result['rows'] / result['seconds'] if result['seconds'] else 0.0
+        status = "" if result['error'] is None else f"  failed: {result['error']}"
+        print(f"{os.path.basename(result['file']):<75} {result['rows']:>9} "
+              f"{result['seconds']:>8.2f} {rows_per_second:>11.0f}{status}")
+    
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert temperature series to yearly, null-free tables")
+    parser.add_argument('inputs', nargs='*',
+                        help="Input directories or glob patterns (default: dataset/Cleaned)")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="Where preprocessed files are written (default: dataset/Generated)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Files processed concurrently (default: one per CPU, 1 runs sequentially)")
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process',
+                        help="Pool type used for concurrent files")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream each file in chunks of this many rows")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild every file even if its input is unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also load the outputs into the columnar store (default location: datastore/)")
+    add_report_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    with RunReport.from_args('temperature_cleaner', args) as report:
+        results = clean_csv_files(args.inputs, args.output_dir, args.workers, args.chunksize,
+                                  args.executor, args.force, args.store)
+        for result in results:
+            report.add_stages(result['stages'], prefix=os.path.basename(result['file']))
+    return 1 if any(result['error'] for result in results) else 0
 
 if __name__ == "__main__":
-    clean_csv_files()
+    raise SystemExit(main())
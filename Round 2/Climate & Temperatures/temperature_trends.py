@@ -0,0 +1,96 @@
+"""
+Per-country temperature trends and anomalies for the Climate & Temperatures
+dashboard.
+
+The yearly country temperatures (GlobalLandTemperaturesByCountry_cleaned.csv)
+are scattered into one country x year matrix, and every statistic is
+computed for all countries at once by common.trends:
+
+- Temperature_Trends_By_Country.csv: warming per decade (OLS slope) with
+  its R^2, the 1961-1990 baseline mean and the latest anomaly against it
+- Temperature_Anomalies_By_Country.csv: per country and year, the
+  temperature, its 10-year trailing mean, the change from the previous year
+  and the anomaly against the baseline
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.manifest import MANIFEST_FILENAME, BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+from common.trends import TrendMatrix
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PREPROCESSED_DIR = os.path.join(SCRIPT_DIR, 'dataset', 'Preprocessed')
+INPUT_FILE = os.path.join(PREPROCESSED_DIR, 'GlobalLandTemperaturesByCountry_cleaned.csv')
+TRENDS_FILE = os.path.join(PREPROCESSED_DIR, 'Temperature_Trends_By_Country.csv')
+ANOMALIES_FILE = os.path.join(PREPROCESSED_DIR, 'Temperature_Anomalies_By_Country.csv')
+
+# WMO climate normal period; the country series start in 1961
+BASELINE = (1961, 1990)
+ROLLING_WINDOW = 10
+
+
+def load_temperature_matrix(input_file=INPUT_FILE):
+    df = pd.read_csv(input_file, usecols=['Country', 'Date', 'AverageTemperature'])
+    return TrendMatrix.from_long(df.rename(columns={'Date': 'Year'}), 'Country', 'Year', 'AverageTemperature')
+
+
+def temperature_trends(matrix, baseline=BASELINE, window=ROLLING_WINDOW):
+    """(per-country trend summary, per-country-year anomaly table)"""
+    summary = matrix.summary(baseline=baseline, slope_scale=10).rename(columns={
+        'n_periods': 'Years',
+        'first_period': 'FirstYear',
+        'last_period': 'LastYear',
+        'first_value': 'FirstTemperature',
+        'last_value': 'LastTemperature',
+        'slope': 'WarmingPerDecade',
+        'intercept': 'Intercept',
+        'r2': 'R2',
+        'baseline_mean': f'Baseline{baseline[0]}_{baseline[1]}',
+        'latest_anomaly': 'LatestAnomaly',
+    })
+    summary = summary.drop(columns='Intercept').sort_values('WarmingPerDecade', ascending=False, ignore_index=True)
+    anomalies = matrix.series_table(window, baseline=baseline, value_name='AverageTemperature')
+    return summary, anomalies
+
+
+def main(input_file=INPUT_FILE, trends_file=TRENDS_FILE, anomalies_file=ANOMALIES_FILE):
+    matrix = load_temperature_matrix(input_file)
+    print(f"Temperature matrix: {len(matrix.entities)} countries x {len(matrix.periods)} years "
+          f"({matrix.periods[0]}-{matrix.periods[-1]})")
+    summary, anomalies = temperature_trends(matrix)
+
+    summary.round(6).to_csv(trends_file, index=False)
+    print(f"Per-country trends saved as: {trends_file}")
+    anomalies.round(6).to_csv(anomalies_file, index=False)
+    print(f"Per-country anomalies saved as: {anomalies_file}")
+
+    print("\nFastest warming countries (degrees C per decade):")
+    print(summary.head(10)[['Country', 'WarmingPerDecade', 'R2', 'LatestAnomaly']].to_string(index=False))
+    return summary, anomalies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-country temperature trends and anomalies")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the input is unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the tables to the columnar store (default location: datastore/)")
+    args = parser.parse_args()
+
+    manifest = BuildManifest(os.path.join(PREPROCESSED_DIR, MANIFEST_FILENAME))
+    version = script_version(__file__, ['common.manifest', 'common.store', 'common.trends'])
+    params = {'store': args.store}
+    if not args.force and manifest.is_current('temperature_trends', [INPUT_FILE], version, params):
+        print("Temperature trends are up to date, nothing to do.")
+    else:
+        summary, anomalies = main()
+        if args.store:
+            store = DataStore(args.store)
+            store.write(summary, 'round2/climate/temperature_trends')
+            store.write(anomalies, 'round2/climate/temperature_anomalies')
+        manifest.record('temperature_trends', [INPUT_FILE], [TRENDS_FILE, ANOMALIES_FILE], version, params)
+    manifest.save()
@@ -0,0 +1,111 @@
+"""
+Consumption and renewable generation trends for the Consumption & Generation
+dashboard.
+
+Both inputs are year x series tables (Country_Consumption_TWH.csv has one
+column per country, renewablePowerGeneration97-17.csv one per renewable
+source). Each becomes a series x year matrix and common.trends computes,
+for every series at once, the OLS growth in TWh per year, the change
+against the 1990s baseline, a 5-year trailing mean and year-over-year
+growth in percent.
+
+top20CountriesPowerGeneration.csv and nonRenewablesTotalPowerGeneration.csv
+are single-year snapshots with no time axis, so they have no trend.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.manifest import MANIFEST_FILENAME, BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+from common.trends import TrendMatrix
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(SCRIPT_DIR, 'dataset')
+CONSUMPTION_FILE = os.path.join(DATASET_DIR, 'Country_Consumption_TWH.csv')
+RENEWABLES_FILE = os.path.join(DATASET_DIR, 'renewablePowerGeneration97-17.csv')
+
+# (name, input, entity label, summary output, yearly output)
+TABLES = [
+    ('consumption', CONSUMPTION_FILE, 'Country',
+     os.path.join(DATASET_DIR, 'Consumption_Trends_By_Country.csv'),
+     os.path.join(DATASET_DIR, 'Consumption_Growth_By_Country.csv')),
+    ('renewables', RENEWABLES_FILE, 'Source',
+     os.path.join(DATASET_DIR, 'Renewable_Generation_Trends.csv'),
+     os.path.join(DATASET_DIR, 'Renewable_Generation_Growth.csv')),
+]
+
+BASELINE = (1990, 1999)
+ROLLING_WINDOW = 5
+
+
+def load_series_matrix(input_file, entity_name):
+    """Year x series table as a series x year matrix; series names lose their ' (TWh)' suffix"""
+    df = pd.read_csv(input_file)
+    df.columns = [col.replace('(TWh)', '').strip() for col in df.columns]
+    return TrendMatrix.from_wide(df, 'Year', entity_name)
+
+
+def growth_trends(matrix, baseline=BASELINE, window=ROLLING_WINDOW):
+    """(per-series trend summary, per-series-year growth table), in TWh"""
+    summary = matrix.summary(baseline=baseline).rename(columns={
+        'n_periods': 'Years',
+        'first_period': 'FirstYear',
+        'last_period': 'LastYear',
+        'first_value': 'FirstTWh',
+        'last_value': 'LastTWh',
+        'slope': 'TrendTWhPerYear',
+        'intercept': 'Intercept',
+        'r2': 'R2',
+        'baseline_mean': f'Baseline{baseline[0]}_{baseline[1]}TWh',
+        'latest_anomaly': 'ChangeVsBaselineTWh',
+    }).drop(columns='Intercept')
+    span = summary['LastYear'] - summary['FirstYear']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cagr = ((summary['LastTWh'] / summary['FirstTWh']) ** (1 / span) - 1) * 100
+    summary['CAGRPercent'] = cagr.where((span > 0) & (summary['FirstTWh'] > 0))
+    summary = summary.sort_values('TrendTWhPerYear', ascending=False, ignore_index=True)
+
+    growth = matrix.series_table(window, baseline=baseline, relative_change=True, value_name='TWh')
+    return summary, growth
+
+
+def main(tables=TABLES, store_dir=None):
+    store = DataStore(store_dir) if store_dir else None
+    for name, input_file, entity_name, summary_file, growth_file in tables:
+        matrix = load_series_matrix(input_file, entity_name)
+        print(f"{os.path.basename(input_file)}: {len(matrix.entities)} series x {len(matrix.periods)} years "
+              f"({matrix.periods[0]}-{matrix.periods[-1]})")
+        summary, growth = growth_trends(matrix)
+        summary.round(6).to_csv(summary_file, index=False)
+        growth.round(6).to_csv(growth_file, index=False)
+        print(f"Trends saved as: {summary_file}\nYearly growth saved as: {growth_file}")
+        print(summary.head(5)[[entity_name, 'TrendTWhPerYear', 'R2', 'CAGRPercent']].to_string(index=False))
+        print()
+        if store:
+            store.write(summary, f'round2/consumption/{name}_trends')
+            store.write(growth, f'round2/consumption/{name}_growth')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consumption and renewable generation trends")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the inputs are unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the tables to the columnar store (default location: datastore/)")
+    args = parser.parse_args()
+
+    manifest = BuildManifest(os.path.join(DATASET_DIR, MANIFEST_FILENAME))
+    version = script_version(__file__, ['common.manifest', 'common.store', 'common.trends'])
+    params = {'store': args.store}
+    inputs = [table[1] for table in TABLES]
+    outputs = [path for table in TABLES for path in table[3:]]
+    if not args.force and manifest.is_current('consumption_trends', inputs, version, params):
+        print("Consumption trends are up to date, nothing to do.")
+    else:
+        main(store_dir=args.store)
+        manifest.record('consumption_trends', inputs, outputs, version, params)
+    manifest.save()
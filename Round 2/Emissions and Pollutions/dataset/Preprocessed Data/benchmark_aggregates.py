@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+from clean_air_pollution_data import REPORT_COLUMNS, normalize_country_names, summarize_air_quality
+
+RAW_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Raw Data', 'global_air_pollution_data.csv')
+
+POLLUTANTS = {
+    'Overall AQI': ('aqi_value', 'aqi_category'),
+    'Carbon Monoxide': ('co_aqi_value', 'co_aqi_category'),
+    'Ozone': ('ozone_aqi_value', 'ozone_aqi_category'),
+    'Nitrogen Dioxide': ('no2_aqi_value', 'no2_aqi_category'),
+    'PM2.5': ('pm2.5_aqi_value', 'pm2.5_aqi_category')
+}
+
+
+def reports_pandas(df):
+    """Reference implementation: the separate pandas scans summarize_air_quality replaced"""
+    country_summary = df.groupby('country_name').agg({
+        'city_name': 'count',
+        'aqi_value': ['mean', 'min', 'max', 'std'],
+        'co_aqi_value': 'mean',
+        'ozone_aqi_value': 'mean',
+        'no2_aqi_value': 'mean',
+        'pm2.5_aqi_value': 'mean'
+    })
+    category_counts = {category_col: df[category_col].value_counts() for _, category_col in POLLUTANTS.values()}
+    worst = df.nlargest(50, 'aqi_value')[REPORT_COLUMNS]
+    best = df.nsmallest(50, 'aqi_value')[REPORT_COLUMNS]
+    stats = {
+        'countries': df['country_name'].nunique(),
+        'mean': df['aqi_value'].mean(),
+        'median': df['aqi_value'].median(),
+        'good': len(df[df['aqi_category'] == 'Good']),
+        'moderate': len(df[df['aqi_category'] == 'Moderate']),
+        'unhealthy': len(df[df['aqi_category'].str.contains('Unhealthy', na=False)]),
+        'most_polluted': df.loc[df['aqi_value'].idxmax(), 'city_name'],
+        'cleanest': df.loc[df['aqi_value'].idxmin(), 'city_name'],
+    }
+    return country_summary, category_counts, worst, best, stats
+
+
+def blow_up(df, factor):
+    """factor copies of every city under new country and city names"""
+    copies = []
+    for copy in range(factor):
+        part = df.copy()
+        if copy:
+            part['country_name'] = part['country_name'] + f" #{copy}"
+            part['city_name'] = part['city_name'] + f" #{copy}"
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def check_same(engine, reference):
+    """The engine's reports hold the same values as the pandas ones"""
+    country_summary, category_counts, worst, best, stats = reference
+    pd.testing.assert_frame_equal(engine.top_rows(), worst.reset_index(drop=True))
+    pd.testing.assert_frame_equal(engine.bottom_rows(), best.reset_index(drop=True))
+    for category_col, counts in category_counts.items():
+        pd.testing.assert_series_equal(engine.value_counts(category_col), counts, check_names=False,
+                                       check_index_type=False)
+    groups = engine.group_frame()
+    pd.testing.assert_series_equal(groups[('aqi_value', 'std')], country_summary[('aqi_value', 'std')],
+                                   check_names=False, check_index_type=False)
+    summary = engine.summary()
+    assert summary['groups'] == stats['countries'] and summary['median'] == stats['median']
+    assert summary['max_row'][REPORT_COLUMNS.index('city_name')] == stats['most_polluted']
+
+
+def main(factor=50):
+    df = pd.read_csv(RAW_FILE)
+    df.columns = df.columns.str.strip().str.replace('\t', '')
+    df['country_name'] = normalize_country_names(df['country_name'])
+
+    print(f"{'Dataset':<10} {'Rows':>9} {'pandas scans':>13} {'Engine':>8} {'Speed-up':>9}")
+    for label, data in [('original', df), (f"{factor}x", blow_up(df, factor))]:
+        pandas_time, reference = timed(reports_pandas, data)
+        engine_time, engine = timed(summarize_air_quality, data, POLLUTANTS)
+        check_same(engine, reference)
+        print(f"{label:<10} {len(data):>9} {pandas_time:>12.3f}s {engine_time:>7.3f}s "
+              f"{pandas_time / engine_time:>8.1f}x")
+    print("Engine reports checked against the pandas ones on every dataset")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import contextlib
+import filecmp
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from clean_forest_carbon_data import fan_out_indicators, indicator_filename, indicator_pivot, indicator_stats, has_pivot
+
+
+def fan_out_indicators_loop(df_long, workers=1):
+    """Reference implementation: re-filter the long frame for every indicator, twice"""
+    indicators = df_long['Indicator'].unique()
+
+    for indicator in indicators:
+        indicator_data = df_long[df_long['Indicator'] == indicator].copy()
+        filename = indicator_filename(indicator)
+        if has_pivot(indicator):
+            indicator_pivot(indicator_data).to_csv(f"pivot_{filename}", index=False)
+        indicator_data.to_csv(filename, index=False)
+
+    summary_stats = []
+    for indicator in indicators:
+        indicator_data = df_long[df_long['Indicator'] == indicator]
+        summary_stats.append(indicator_stats(indicator, indicator_data))
+
+    return pd.DataFrame(summary_stats)
+
+
+def make_synthetic_long(indicators=200, countries=230, years=range(1992, 2023), seed=0):
+    """IMF-climate-shaped long frame: Country, ISO2, ISO3, Indicator, Unit, Year, Value"""
+    rng = np.random.default_rng(seed)
+    names = [f"Country {i:03d}" for i in range(countries)]
+    # Half the indicators get pivots, like the area / carbon stock series
+    indicator_names = [
+        f"{'Forest area' if i % 2 else 'Forest index'} {i:03d}" for i in range(indicators)
+    ]
+
+    index = pd.MultiIndex.from_product([names, indicator_names, list(years)], names=['Country', 'Indicator', 'Year'])
+    df_long = index.to_frame(index=False)
+    country_codes = df_long['Country'].str[-3:]
+    df_long.insert(1, 'ISO2', 'C' + country_codes.str[-1])
+    df_long.insert(2, 'ISO3', 'C' + country_codes)
+    df_long.insert(4, 'Unit', '1000 HA')
+    df_long['Value'] = rng.gamma(2.0, 500.0, size=len(df_long)).round(4)
+
+    # Drop a few observations, as dropna(subset=['Value']) would in the real pipeline
+    df_long = df_long[rng.random(len(df_long)) > 0.05]
+    return df_long.sort_values(['Country', 'Indicator', 'Year']).reset_index(drop=True)
+
+
+def run_in(directory, func, df_long, workers):
+    """Time func with directory as the working directory, output silenced"""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            summary = func(df_long, workers)
+            return time.perf_counter() - start, summary
+    finally:
+        os.chdir(cwd)
+
+
+def main(indicators=200, workers=4):
+    df_long = make_synthetic_long(indicators)
+    print(f"Synthetic long frame: {len(df_long)} rows, {indicators} indicators")
+
+    with tempfile.TemporaryDirectory() as loop_dir, \
+            tempfile.TemporaryDirectory() as groupby_dir, \
+            tempfile.TemporaryDirectory() as parallel_dir:
+        loop_time, loop_summary = run_in(loop_dir, fan_out_indicators_loop, df_long, 1)
+        groupby_time, groupby_summary = run_in(groupby_dir, fan_out_indicators, df_long, 1)
+        parallel_time, parallel_summary = run_in(parallel_dir, fan_out_indicators, df_long, workers)
+
+        pd.testing.assert_frame_equal(loop_summary, groupby_summary)
+        pd.testing.assert_frame_equal(loop_summary, parallel_summary)
+        files = sorted(os.listdir(loop_dir))
+        for other_dir in (groupby_dir, parallel_dir):
+            match, mismatch, errors = filecmp.cmpfiles(loop_dir, other_dir, files, shallow=False)
+            assert not mismatch and not errors, (mismatch, errors)
+        print(f"✓ {len(files)} output files and the summary are identical")
+
+    print(f"Filter per indicator:        {loop_time:.2f}s")
+    print(f"Single groupby:              {groupby_time:.2f}s")
+    print(f"Groupby + {workers} writer threads:  {parallel_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,107 @@
 import pandas as pd
 import numpy as np
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from common.aggregates import AggregateEngine
+from common.countries import attach_iso_codes, normalize_country_names
+from common.instrument import RunReport, add_report_arguments, instrumented, stage
+from common.manifest import BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+
+INPUT_FILE = 'global_air_pollution_data.csv'
+OUTPUT_FILES = [
+    'global_air_pollution_clean.csv',
+    'global_air_pollution_long.csv',
+    'country_air_pollution_summary.csv',
+    'aqi_category_analysis.csv',
+    'worst_air_quality_cities.csv',
+    'best_air_quality_cities.csv',
+    'air_pollution_statistics.csv',
+]
+
+# Columns carried by the worst / best cities reports
+REPORT_COLUMNS = [
+    'country_name', 'city_name', 'aqi_value', 'aqi_category',
+    'pm2.5_aqi_value', 'ozone_aqi_value', 'no2_aqi_value', 'co_aqi_value'
+]
+
+@instrumented('aggregate')
+def summarize_air_quality(df, pollutants, chunksize=None, median=None):
+    """
+    Aggregate engine over the wide city table (or a chunked reader of it):
+    overall AQI statistics, top/bottom 50 cities, category counts for every
+    pollutant and the per-country summary, all from a single pass.
+    The median is exact for an in-memory table and approximated from a
+    histogram for chunked input, unless median says otherwise.
+    """
+    if median is None:
+        median = 'exact' if isinstance(df, pd.DataFrame) and not chunksize else 'approx'
+    report = AggregateEngine(
+        'aqi_value',
+        label_cols=REPORT_COLUMNS,
+        category_cols=[category_col for _, category_col in pollutants.values()],
+        group_col='country_name',
+        group_count_cols=['city_name'],
+        group_cols=[value_col for value_col, _ in pollutants.values()],
+        k=50,
+        median=median,
+    )
+    if not isinstance(df, pd.DataFrame):
+        chunks = df
+    elif chunksize:
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    else:
+        chunks = [df]
+    
+    for chunk in chunks:
+        report.update(chunk)
+    return report
+
+@instrumented('melt')
+def build_long_format(df, pollutants):
+    """
+    One row per (city, pollutant), sorted by country, city and pollutant.
+    The value and category column pairs are stacked as NumPy blocks and the
+    sort runs on categorical codes, instead of copying a frame per pollutant
+    and sorting three string columns.
+    """
+    value_cols = [value_col for value_col, _ in pollutants.values()]
+    category_cols = [category_col for _, category_col in pollutants.values()]
+    n_rows = len(df)
+    n_pollutants = len(pollutants)
+    
+    # Stacked pollutant by pollutant, the same row order pd.concat would give;
+    # the key columns are encoded once per city row and only their codes repeated
+    def tiled(column):
+        encoded = pd.Categorical(df[column])
+        return pd.Categorical.from_codes(np.tile(encoded.codes, n_pollutants), encoded.categories)
+    
+    country = tiled('country_name')
+    city = tiled('city_name')
+    pollutant_names = pd.Index(sorted(pollutants))
+    pollutant = pd.Categorical.from_codes(
+        np.repeat(pollutant_names.get_indexer(list(pollutants)), n_rows), pollutant_names
+    )
+    values = df[value_cols].to_numpy().T.reshape(-1)
+    categories = pd.Categorical(df[category_cols].to_numpy(dtype=object).T.reshape(-1))
+    
+    # Categories are sorted, so code order is string order; missing (-1) sorts last
+    def sort_key(column):
+        codes = column.codes.astype(np.int64)
+        return np.where(codes < 0, len(column.categories), codes)
+    
+    order = np.lexsort((sort_key(pollutant), sort_key(city), sort_key(country)))
+    
+    return pd.DataFrame({
+        'country_name': country[order],
+        'city_name': city[order],
+        'pollutant': pollutant[order],
+        'aqi_value': values[order],
+        'aqi_category': categories[order],
+    })
 
 def clean_air_pollution_data():
     """
@@ -8,26 +110,31 @@ def clean_air_pollution_data():
     print("Loading air pollution data...")
     
     # Read the original CSV file
-    df = pd.read_csv('global_air_pollution_data.csv')
+    with stage('read') as s:
+        df = pd.read_csv(INPUT_FILE)
+        s.rows_out = len(df)
     
     print(f"Original data shape: {df.shape}")
     print(f"Columns: {list(df.columns)}")
     
-    # Clean column names - remove tabs and extra spaces
-    df.columns = df.columns.str.strip().str.replace('\t', '')
+    with stage('normalize', len(df)) as s:
+        # Clean column names - remove tabs and extra spaces
+        df.columns = df.columns.str.strip().str.replace('\t', '')
+        
+        # Clean up country names - remove formal titles and extra text
+        df['country_name'] = normalize_country_names(df['country_name'])
+        
+        # Create a cleaner main dataset, with ISO codes to join it to the IMF datasets
+        df_clean = attach_iso_codes(df)
+        s.rows_out = len(df_clean)
     
-    # Clean up country names - remove formal titles and extra text
-    df['country_name'] = df['country_name'].str.replace('United States of America', 'United States')
-    df['country_name'] = df['country_name'].str.replace('United Kingdom of Great Britain and Northern Ireland', 'United Kingdom')
-    df['country_name'] = df['country_name'].str.replace('Russian Federation', 'Russia')
-    df['country_name'] = df['country_name'].str.replace('Republic of North Macedonia', 'North Macedonia')
-    df['country_name'] = df['country_name'].str.replace('United Republic of Tanzania', 'Tanzania')
-    
-    # Create a cleaner main dataset
-    df_clean = df.copy()
+    unmatched = df_clean.loc[df_clean['ISO3'].isna(), 'country_name'].dropna().unique()
+    print(f"ISO codes found for {df_clean['country_name'].nunique() - len(unmatched)} countries; "
+          f"none for {len(unmatched)}: {', '.join(sorted(unmatched))}")
     
     # Save the cleaned wide format
-    df_clean.to_csv('global_air_pollution_clean.csv', index=False)
+    with stage('write_clean', len(df_clean)):
+        df_clean.to_csv('global_air_pollution_clean.csv', index=False)
     print("Cleaned wide format saved as: global_air_pollution_clean.csv")
     
     # Transform to long format for better analysis
@@ -42,45 +149,34 @@ def clean_air_pollution_data():
         'PM2.5': ('pm2.5_aqi_value', 'pm2.5_aqi_category')
     }
     
-    # Create long format dataset
-    long_data = []
-    
-    for pollutant_name, (value_col, category_col) in pollutants.items():
-        temp_df = df_clean[['country_name', 'city_name', value_col, category_col]].copy()
-        temp_df['pollutant'] = pollutant_name
-        temp_df['aqi_value'] = temp_df[value_col]
-        temp_df['aqi_category'] = temp_df[category_col]
-        temp_df = temp_df[['country_name', 'city_name', 'pollutant', 'aqi_value', 'aqi_category']]
-        long_data.append(temp_df)
-    
-    df_long = pd.concat(long_data, ignore_index=True)
-    
-    # Sort the data logically
-    df_long = df_long.sort_values(['country_name', 'city_name', 'pollutant']).reset_index(drop=True)
+    df_long = build_long_format(df_clean, pollutants)
     
     # Save long format
-    df_long.to_csv('global_air_pollution_long.csv', index=False)
+    with stage('write_long', len(df_long)):
+        df_long.to_csv('global_air_pollution_long.csv', index=False)
     print("Long format saved as: global_air_pollution_long.csv")
     
+    # Every report below comes from one scan of the value, category and group columns
+    report = summarize_air_quality(df_clean, pollutants)
+    
     # Create country-level summaries
     print("Creating country-level summaries...")
     
-    country_summary = df_clean.groupby('country_name').agg({
-        'city_name': 'count',
-        'aqi_value': ['mean', 'min', 'max', 'std'],
-        'co_aqi_value': 'mean',
-        'ozone_aqi_value': 'mean',
-        'no2_aqi_value': 'mean',
-        'pm2.5_aqi_value': 'mean'
+    groups = report.group_frame()
+    country_summary = pd.DataFrame({
+        'cities_count': groups[('city_name', 'count')],
+        'avg_aqi': groups[('aqi_value', 'mean')],
+        'min_aqi': groups[('aqi_value', 'min')],
+        'max_aqi': groups[('aqi_value', 'max')],
+        'std_aqi': groups[('aqi_value', 'std')],
+        'avg_co_aqi': groups[('co_aqi_value', 'mean')],
+        'avg_ozone_aqi': groups[('ozone_aqi_value', 'mean')],
+        'avg_no2_aqi': groups[('no2_aqi_value', 'mean')],
+        'avg_pm25_aqi': groups[('pm2.5_aqi_value', 'mean')],
     }).round(2)
+    country_summary.index.name = 'country_name'
     
-    # Flatten column names
-    country_summary.columns = [
-        'cities_count', 'avg_aqi', 'min_aqi', 'max_aqi', 'std_aqi',
-        'avg_co_aqi', 'avg_ozone_aqi', 'avg_no2_aqi', 'avg_pm25_aqi'
-    ]
-    
-    country_summary = country_summary.reset_index()
+    country_summary = attach_iso_codes(country_summary.reset_index())
     country_summary.to_csv('country_air_pollution_summary.csv', index=False)
     print("Country summary saved as: country_air_pollution_summary.csv")
     
@@ -90,13 +186,13 @@ def clean_air_pollution_data():
     category_analysis = []
     
     for pollutant_name, (value_col, category_col) in pollutants.items():
-        category_counts = df_clean[category_col].value_counts()
+        category_counts = report.value_counts(category_col)
         for category, count in category_counts.items():
             category_analysis.append({
                 'pollutant': pollutant_name,
                 'aqi_category': category,
                 'city_count': count,
-                'percentage': round(count / len(df_clean) * 100, 2)
+                'percentage': round(count / report.rows * 100, 2)
             })
     
     category_df = pd.DataFrame(category_analysis)
@@ -106,19 +202,13 @@ def clean_air_pollution_data():
     # Create worst air quality cities report
     print("Creating worst air quality cities report...")
     
-    worst_cities = df_clean.nlargest(50, 'aqi_value')[
-        ['country_name', 'city_name', 'aqi_value', 'aqi_category', 
-         'pm2.5_aqi_value', 'ozone_aqi_value', 'no2_aqi_value', 'co_aqi_value']
-    ].copy()
+    worst_cities = report.top_rows()
     
     worst_cities.to_csv('worst_air_quality_cities.csv', index=False)
     print("Worst air quality cities saved as: worst_air_quality_cities.csv")
     
     # Create best air quality cities report
-    best_cities = df_clean.nsmallest(50, 'aqi_value')[
-        ['country_name', 'city_name', 'aqi_value', 'aqi_category',
-         'pm2.5_aqi_value', 'ozone_aqi_value', 'no2_aqi_value', 'co_aqi_value']
-    ].copy()
+    best_cities = report.bottom_rows()
     
     best_cities.to_csv('best_air_quality_cities.csv', index=False)
     print("Best air quality cities saved as: best_air_quality_cities.csv")
@@ -126,18 +216,21 @@ def clean_air_pollution_data():
     # Create overall statistics summary
     print("Creating overall statistics...")
     
+    aqi = report.summary()
+    overall_categories = report.value_counts('aqi_category')
+    city_index = REPORT_COLUMNS.index('city_name')
     stats_summary = {
-        'Total Cities': len(df_clean),
-        'Total Countries': df_clean['country_name'].nunique(),
-        'Average Overall AQI': df_clean['aqi_value'].mean().round(2),
-        'Median Overall AQI': df_clean['aqi_value'].median(),
-        'Cities with Good Air Quality': len(df_clean[df_clean['aqi_category'] == 'Good']),
-        'Cities with Moderate Air Quality': len(df_clean[df_clean['aqi_category'] == 'Moderate']),
-        'Cities with Unhealthy Air Quality': len(df_clean[df_clean['aqi_category'].str.contains('Unhealthy', na=False)]),
-        'Worst AQI Value': df_clean['aqi_value'].max(),
-        'Best AQI Value': df_clean['aqi_value'].min(),
-        'Most Polluted City': df_clean.loc[df_clean['aqi_value'].idxmax(), 'city_name'],
-        'Cleanest City': df_clean.loc[df_clean['aqi_value'].idxmin(), 'city_name']
+        'Total Cities': aqi['rows'],
+        'Total Countries': aqi['groups'],
+        'Average Overall AQI': round(aqi['mean'], 2),
+        'Median Overall AQI': aqi['median'],
+        'Cities with Good Air Quality': int(overall_categories.get('Good', 0)),
+        'Cities with Moderate Air Quality': int(overall_categories.get('Moderate', 0)),
+        'Cities with Unhealthy Air Quality': int(overall_categories[overall_categories.index.str.contains('Unhealthy')].sum()),
+        'Worst AQI Value': aqi['max'],
+        'Best AQI Value': aqi['min'],
+        'Most Polluted City': aqi['max_row'][city_index],
+        'Cleanest City': aqi['min_row'][city_index]
     }
     
     stats_df = pd.DataFrame(list(stats_summary.items()), columns=['Metric', 'Value'])
@@ -147,7 +240,32 @@ def clean_air_pollution_data():
     return df_clean, df_long, country_summary, stats_df
 
 if __name__ == "__main__":
-    clean_data, long_data, country_data, stats = clean_air_pollution_data()
+    parser = argparse.ArgumentParser(description="Reshape and summarise the global air pollution dataset")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the input is unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the tables to the columnar store (default location: datastore/)")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    
+    with RunReport.from_args('air_pollution', args):
+        manifest = BuildManifest()
+        version = script_version(__file__, ['common.aggregates', 'common.countries', 'common.instrument',
+                                              'common.manifest', 'common.store'])
+        params = {'store': args.store}
+        if not args.force and manifest.is_current('air_pollution', [INPUT_FILE], version, params):
+            print(f"Outputs for {INPUT_FILE} are up to date, nothing to do.")
+            manifest.save()
+            sys.exit(0)
+        
+        clean_data, long_data, country_data, stats = clean_air_pollution_data()
+        if args.store:
+            with stage('store', len(clean_data)):
+                store = DataStore(args.store)
+                store.write(clean_data, 'round2/emissions/air_pollution')
+                store.write(long_data, 'round2/emissions/air_pollution_long', partition_by='pollutant')
+                store.write(country_data, 'round2/emissions/air_pollution_by_country')
+        manifest.record('air_pollution', [INPUT_FILE], OUTPUT_FILES, version, params)
+        manifest.save()
     print("\nAir pollution data transformation completed successfully!")
     print("\nFiles created:")
     print("1. global_air_pollution_clean.csv - Main cleaned dataset (wide format)")
@@ -1,127 +1,208 @@
 import pandas as pd
 import numpy as np
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
-def clean_forest_carbon_data():
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from common.countries import normalize_country_names
+from common.instrument import RunReport, add_report_arguments, instrumented, stage
+from common.manifest import BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+
+INPUT_FILE = 'Forest_and_Carbon.csv'
+MAIN_OUTPUT_FILE = 'Forest_and_Carbon_Clean.csv'
+SUMMARY_OUTPUT_FILE = 'Forest_Carbon_Summary.csv'
+
+def indicator_filename(indicator):
+    """Readable per-indicator file name, e.g. 'Carbon stocks in forests' -> carbon_stocks_in_forests_data.csv"""
+    filename = indicator.lower().replace(' ', '_').replace(',', '').replace('(', '').replace(')', '')
+    return f"{filename}_data.csv"
+
+def has_pivot(indicator):
+    """Area and carbon stock indicators also get a wide pivot with change columns"""
+    return 'area' in indicator.lower() or 'carbon' in indicator.lower()
+
+def output_files(indicators):
+    """Every file clean_forest_carbon_data writes for the given indicators"""
+    files = [MAIN_OUTPUT_FILE, SUMMARY_OUTPUT_FILE]
+    for indicator in indicators:
+        files.append(indicator_filename(indicator))
+        if has_pivot(indicator):
+            files.append(f"pivot_{indicator_filename(indicator)}")
+    return files
+
+def indicator_pivot(indicator_data):
+    """Years as columns per country, with the change from first to last year"""
+    # Pivot to have years as columns for easier comparison
+    pivot_data = indicator_data.pivot_table(
+        index=['Country', 'ISO2', 'ISO3', 'Unit'],
+        columns='Year',
+        values='Value',
+        fill_value=np.nan
+    )
+    
+    # Calculate change from first to last available year
+    first_year = pivot_data.columns.min()
+    last_year = pivot_data.columns.max()
+    
+    if first_year in pivot_data.columns and last_year in pivot_data.columns:
+        pivot_data['Change_Absolute'] = pivot_data[last_year] - pivot_data[first_year]
+        pivot_data['Change_Percent'] = ((pivot_data[last_year] - pivot_data[first_year]) / pivot_data[first_year] * 100).round(2)
+    
+    # Reset index to make it a regular dataframe
+    return pivot_data.reset_index()
+
+def indicator_stats(indicator, indicator_data):
+    """Summary statistics row for one indicator"""
+    return {
+        'Indicator': indicator,
+        'Unit': indicator_data['Unit'].iloc[0],
+        'Countries_Count': indicator_data['Country'].nunique(),
+        'Years_Available': f"{indicator_data['Year'].min()}-{indicator_data['Year'].max()}",
+        'Total_Records': len(indicator_data),
+        'Missing_Values': indicator_data['Value'].isna().sum(),
+        'Min_Value': indicator_data['Value'].min(),
+        'Max_Value': indicator_data['Value'].max(),
+        'Mean_Value': indicator_data['Value'].mean().round(2)
+    }
+
+@instrumented('fan_out_indicators')
+def fan_out_indicators(df_long, workers=1):
+    """
+    Write the long-format file and (for area and carbon indicators) the pivot
+    for every indicator, and return the summary statistics frame.
+    The long frame is split once with groupby instead of being re-filtered
+    per indicator; with workers > 1 the CSV writes run on a thread pool.
+    """
+    writes = []
+    summary_stats = []
+    
+    # sort=False keeps indicators in order of first appearance, like unique()
+    for indicator, indicator_data in df_long.groupby('Indicator', sort=False):
+        # Create a more readable filename
+        filename = indicator_filename(indicator)
+        
+        # For area and carbon stock data, add some calculated columns
+        if has_pivot(indicator):
+            writes.append((indicator_pivot(indicator_data), f"pivot_{filename}",
+                           f"Pivot table for {indicator} saved as: pivot_{filename}"))
+        
+        # Save the long format version
+        writes.append((indicator_data, filename, f"Data for '{indicator}' saved as: {filename}"))
+        
+        summary_stats.append(indicator_stats(indicator, indicator_data))
+    
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda write: write[0].to_csv(write[1], index=False), writes))
+    else:
+        for data, path, _ in writes:
+            data.to_csv(path, index=False)
+    for _, _, message in writes:
+        print(message)
+    
+    print("Creating summary statistics...")
+    return pd.DataFrame(summary_stats)
+
+def clean_forest_carbon_data(input_file=INPUT_FILE, workers=1):
     """
     Transform the Forest_and_Carbon.csv file into a cleaner, more readable format.
     """
     print("Loading original data...")
     
     # Read the original CSV file
-    df = pd.read_csv('Forest_and_Carbon.csv')
+    with stage('read') as s:
+        df = pd.read_csv(input_file)
+        s.rows_out = len(df)
     
     print(f"Original data shape: {df.shape}")
     print(f"Columns: {list(df.columns)}")
     
-    # Remove redundant columns that add clutter
-    columns_to_remove = ['ObjectId', 'CTS_Code', 'CTS_Name', 'CTS_Full_Descriptor', 'Source']
-    df_clean = df.drop(columns=[col for col in columns_to_remove if col in df.columns])
-    
-    # Clean up country names - remove formal titles and extra text
-    df_clean['Country'] = df_clean['Country'].str.replace(r', Kingdom of.*', '', regex=True)
-    df_clean['Country'] = df_clean['Country'].str.replace(r', Republic of.*', '', regex=True)
-    df_clean['Country'] = df_clean['Country'].str.replace(r', Islamic Rep\. of', '', regex=True)
-    df_clean['Country'] = df_clean['Country'].str.replace(r', Principality of', '', regex=True)
-    df_clean['Country'] = df_clean['Country'].str.replace(r', Fed\. Sts\.', '', regex=True)
-    df_clean['Country'] = df_clean['Country'].str.replace(r', People\'s Rep\. of', '', regex=True)
+    with stage('normalize', len(df)) as s:
+        # Remove redundant columns that add clutter
+        columns_to_remove = ['ObjectId', 'CTS_Code', 'CTS_Name', 'CTS_Full_Descriptor', 'Source']
+        df_clean = df.drop(columns=[col for col in columns_to_remove if col in df.columns])
+        
+        # Clean up country names - remove formal titles and extra text
+        df_clean['Country'] = normalize_country_names(df_clean['Country'])
+        s.rows_out = len(df_clean)
     
     # Get year columns (F1992 to F2022)
     year_columns = [col for col in df_clean.columns if col.startswith('F')]
     
     # Melt the dataframe to convert from wide to long format
     print("Converting from wide to long format...")
-    df_long = pd.melt(
-        df_clean,
-        id_vars=['Country', 'ISO2', 'ISO3', 'Indicator', 'Unit'],
-        value_vars=year_columns,
-        var_name='Year',
-        value_name='Value'
-    )
-    
-    # Clean up the Year column - remove 'F' prefix and convert to integer
-    df_long['Year'] = df_long['Year'].str.replace('F', '').astype(int)
-    
-    # Remove rows with missing values
-    df_long = df_long.dropna(subset=['Value'])
+    with stage('melt', len(df_clean)) as s:
+        df_long = pd.melt(
+            df_clean,
+            id_vars=['Country', 'ISO2', 'ISO3', 'Indicator', 'Unit'],
+            value_vars=year_columns,
+            var_name='Year',
+            value_name='Value'
+        )
+        
+        # Clean up the Year column - remove 'F' prefix and convert to integer
+        df_long['Year'] = df_long['Year'].str.replace('F', '').astype(int)
+        
+        # Remove rows with missing values
+        df_long = df_long.dropna(subset=['Value'])
+        s.rows_out = len(df_long)
     
     # Sort the data logically
-    df_long = df_long.sort_values(['Country', 'Indicator', 'Year']).reset_index(drop=True)
+    with stage('sort', len(df_long)) as s:
+        df_long = df_long.sort_values(['Country', 'Indicator', 'Year']).reset_index(drop=True)
+        s.rows_out = len(df_long)
     
     print(f"Cleaned data shape: {df_long.shape}")
     
     # Create separate datasets for different indicators for better organization
-    indicators = df_long['Indicator'].unique()
-    print(f"Available indicators: {indicators}")
+    print(f"Available indicators: {df_long['Indicator'].unique()}")
     
     # Save the main cleaned dataset
-    output_file = 'Forest_and_Carbon_Clean.csv'
-    df_long.to_csv(output_file, index=False)
+    output_file = MAIN_OUTPUT_FILE
+    with stage('write', len(df_long)):
+        df_long.to_csv(output_file, index=False)
     print(f"Main cleaned dataset saved as: {output_file}")
     
-    # Create separate files for each indicator type for easier analysis
-    for indicator in indicators:
-        indicator_data = df_long[df_long['Indicator'] == indicator].copy()
-        
-        # Create a more readable filename
-        filename = indicator.lower().replace(' ', '_').replace(',', '').replace('(', '').replace(')', '')
-        filename = f"{filename}_data.csv"
-        
-        # For area and carbon stock data, add some calculated columns
-        if 'area' in indicator.lower() or 'carbon' in indicator.lower():
-            # Pivot to have years as columns for easier comparison
-            pivot_data = indicator_data.pivot_table(
-                index=['Country', 'ISO2', 'ISO3', 'Unit'],
-                columns='Year',
-                values='Value',
-                fill_value=np.nan
-            )
-            
-            # Calculate change from first to last available year
-            first_year = pivot_data.columns.min()
-            last_year = pivot_data.columns.max()
-            
-            if first_year in pivot_data.columns and last_year in pivot_data.columns:
-                pivot_data['Change_Absolute'] = pivot_data[last_year] - pivot_data[first_year]
-                pivot_data['Change_Percent'] = ((pivot_data[last_year] - pivot_data[first_year]) / pivot_data[first_year] * 100).round(2)
-            
-            # Reset index to make it a regular dataframe
-            pivot_data = pivot_data.reset_index()
-            
-            pivot_data.to_csv(f"pivot_{filename}", index=False)
-            print(f"Pivot table for {indicator} saved as: pivot_{filename}")
-        
-        # Save the long format version
-        indicator_data.to_csv(filename, index=False)
-        print(f"Data for '{indicator}' saved as: {filename}")
-    
-    # Create a summary statistics file
-    print("Creating summary statistics...")
-    summary_stats = []
-    
-    for indicator in indicators:
-        indicator_data = df_long[df_long['Indicator'] == indicator]
-        
-        stats = {
-            'Indicator': indicator,
-            'Unit': indicator_data['Unit'].iloc[0],
-            'Countries_Count': indicator_data['Country'].nunique(),
-            'Years_Available': f"{indicator_data['Year'].min()}-{indicator_data['Year'].max()}",
-            'Total_Records': len(indicator_data),
-            'Missing_Values': indicator_data['Value'].isna().sum(),
-            'Min_Value': indicator_data['Value'].min(),
-            'Max_Value': indicator_data['Value'].max(),
-            'Mean_Value': indicator_data['Value'].mean().round(2)
-        }
-        summary_stats.append(stats)
-    
-    summary_df = pd.DataFrame(summary_stats)
-    summary_df.to_csv('Forest_Carbon_Summary.csv', index=False)
-    print("Summary statistics saved as: Forest_Carbon_Summary.csv")
+    # One groupby pass produces every per-indicator output and summary row
+    summary_df = fan_out_indicators(df_long, workers)
+    with stage('write_summary', len(summary_df)):
+        summary_df.to_csv(SUMMARY_OUTPUT_FILE, index=False)
+    print(f"Summary statistics saved as: {SUMMARY_OUTPUT_FILE}")
     
     return df_long, summary_df
 
 if __name__ == "__main__":
-    cleaned_data, summary = clean_forest_carbon_data()
+    parser = argparse.ArgumentParser(description="Reshape the IMF forest and carbon dataset")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the input is unchanged")
+    parser.add_argument('--workers', type=int, default=1, help="Threads writing per-indicator files")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the tables to the columnar store (default location: datastore/)")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    
+    with RunReport.from_args('forest_carbon', args):
+        manifest = BuildManifest()
+        version = script_version(__file__, ['common.countries', 'common.instrument', 'common.manifest',
+                                              'common.store'])
+        params = {'store': args.store}
+        if not args.force and manifest.is_current('forest_carbon', [INPUT_FILE], version, params):
+            print(f"Outputs for {INPUT_FILE} are up to date, nothing to do.")
+            manifest.save()
+            sys.exit(0)
+        
+        cleaned_data, summary = clean_forest_carbon_data(workers=args.workers)
+        if args.store:
+            # One partition per indicator, so reading one indicator only opens its files
+            with stage('store', len(cleaned_data)):
+                store = DataStore(args.store)
+                store.write(cleaned_data, 'round2/emissions/forest_carbon', partition_by='Indicator')
+                store.write(summary, 'round2/emissions/forest_carbon_summary')
+        manifest.record('forest_carbon', [INPUT_FILE], output_files(cleaned_data['Indicator'].unique()), version,
+                        params)
+        manifest.save()
     print("\nData transformation completed successfully!")
     print("\nFiles created:")
     print("1. Forest_and_Carbon_Clean.csv - Main cleaned dataset (long format)")
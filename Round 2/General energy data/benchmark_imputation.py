@@ -0,0 +1,97 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocess import ENTITY_COLUMN, IMPUTERS, INPUT_FILE, TIME_COLUMN, value_columns
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def impute_entity_mean_loop(df):
+    """Reference implementation: one filter and fillna per entity"""
+    columns = value_columns(df)
+    result = df.copy()
+    for entity in df[ENTITY_COLUMN].unique():
+        rows = df[ENTITY_COLUMN] == entity
+        result.loc[rows, columns] = df.loc[rows, columns].fillna(df.loc[rows, columns].mean())
+    result[columns] = result[columns].fillna(df[columns].mean())
+    return result
+
+
+def impute_entity_interpolate_loop(df):
+    """Reference implementation: per-entity interpolate over the time index"""
+    columns = value_columns(df)
+    result = df.copy()
+    for entity in df[ENTITY_COLUMN].unique():
+        rows = df.index[df[ENTITY_COLUMN] == entity]
+        series = df.loc[rows, [TIME_COLUMN] + columns].sort_values(TIME_COLUMN, kind='stable')
+        filled = series.set_index(TIME_COLUMN)[columns].interpolate(method='index', limit_direction='both')
+        result.loc[series.index, columns] = filled.to_numpy()
+    result[columns] = result[columns].fillna(df[columns].mean())
+    return result
+
+
+# global-mean is already a single vectorized fillna, it has no loop counterpart
+REFERENCES = {
+    'entity-mean': impute_entity_mean_loop,
+    'entity-interpolate': impute_entity_interpolate_loop,
+}
+
+
+def blow_up(df, factor, seed=0):
+    """factor copies of the dataset under new entity names, rows shuffled, with some extra gaps"""
+    rng = np.random.default_rng(seed)
+    copies = []
+    for copy in range(factor):
+        part = df.copy()
+        part[ENTITY_COLUMN] = part[ENTITY_COLUMN] + f" #{copy}"
+        copies.append(part)
+    big = pd.concat(copies, ignore_index=True)
+    columns = value_columns(big)
+    gaps = rng.random((len(big), len(columns))) < 0.05
+    big[columns] = big[columns].mask(gaps)
+    return big.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return time.perf_counter() - start, result
+
+
+def main(factor=100, reference_rows=40_000):
+    df = pd.read_csv(os.path.join(SCRIPT_DIR, 'dataset', INPUT_FILE), na_values=["NaN", "NULL", "NA"])
+    datasets = [('original', df), (f"{factor}x", blow_up(df, factor))]
+
+    print(f"{'Dataset':<10} {'Rows':>8} {'Mode':<20} {'Vectorized':>11} {'Loop':>9} {'Speed-up':>9}")
+    for label, data in datasets:
+        columns = value_columns(data)
+        for mode, imputer in IMPUTERS.items():
+            fast_time, fast = timed(imputer, data)
+            assert not fast[columns].isna().any().any(), mode
+            if mode not in REFERENCES:
+                print(f"{label:<10} {len(data):>8} {mode:<20} {fast_time:>10.3f}s {'-':>9} {'-':>9}")
+                continue
+
+            # The per-entity loops are too slow for the full blow-up; check on a slice of entities
+            sample = data
+            if len(data) > reference_rows:
+                entities = data[ENTITY_COLUMN].unique()
+                keep = entities[:reference_rows * len(entities) // len(data)]
+                sample = data[data[ENTITY_COLUMN].isin(keep)]
+            slow_time, slow = timed(REFERENCES[mode], sample)
+            check = imputer(sample) if sample is not data else fast
+            np.testing.assert_allclose(check[columns].to_numpy(), slow[columns].to_numpy(), rtol=1e-9, atol=1e-9)
+
+            if sample is not data:
+                slow_time *= len(data) / len(sample)
+            note = '' if sample is data else '*'
+            print(f"{label:<10} {len(data):>8} {mode:<20} {fast_time:>10.3f}s {slow_time:>8.2f}s{note}"
+                  f" {slow_time / fast_time:>8.1f}x")
+    print("* loop time extrapolated from a subset of entities; results checked on that subset")
+
+
+if __name__ == "__main__":
+    main()
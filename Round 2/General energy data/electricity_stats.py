@@ -0,0 +1,136 @@
+"""
+Loader for the EIA-style "Global Electricity Statistics.csv".
+
+The file is wide: one row per (Country, Features) pair with a Region and
+one column per year 1980-2021. Country names are padded with spaces, the
+header starts with a BOM, and the year cells mix numbers with the "--"
+(not available) and "ie" (insufficient evidence) markers.
+
+read_electricity_stats parses the year block straight to float64 (the
+markers are treated as missing by the CSV parser itself) and stores the
+keys as stripped categoricals. ElectricityCube scatters the year block
+into a country x feature x year NumPy array once, so a country's time
+series is a slice of that array instead of a boolean filter over the frame.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.instrument import stage
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, 'dataset', 'Global Electricity Statistics.csv')
+LONG_OUTPUT_FILE = os.path.join(SCRIPT_DIR, 'dataset', 'global-electricity-statistics-long.csv')
+
+KEY_COLUMNS = ['Country', 'Features', 'Region']
+MISSING_MARKERS = ['--', 'ie']
+
+
+def read_electricity_stats(input_file=INPUT_FILE):
+    """Wide table with stripped categorical keys and a float64 year block"""
+    df = pd.read_csv(input_file, encoding='utf-8-sig', na_values=MISSING_MARKERS,
+                     dtype={col: str for col in KEY_COLUMNS})
+    df.columns = df.columns.str.strip()
+
+    for col in KEY_COLUMNS:
+        df[col] = df[col].str.strip().astype('category')
+
+    year_columns = [col for col in df.columns if col not in KEY_COLUMNS]
+    # Any marker the parser did not know about leaves its column as text
+    leftover = [col for col in year_columns if not pd.api.types.is_float_dtype(df[col])]
+    if leftover:
+        df[leftover] = df[leftover].apply(pd.to_numeric, errors='coerce')
+    df[year_columns] = df[year_columns].astype(np.float64)
+    return df
+
+
+class ElectricityCube:
+    """
+    Country x feature x year array of the statistics, with label lookups.
+    series(), country() and feature() return slices of the array.
+    """
+
+    def __init__(self, countries, features, years, values, regions):
+        self.countries = pd.Index(countries, name='Country')
+        self.features = pd.Index(features, name='Features')
+        self.years = pd.Index(years, name='Year')
+        self.values = values
+        self.regions = pd.Series(regions, index=self.countries, name='Region')
+        self._country_pos = {name: i for i, name in enumerate(self.countries)}
+        self._feature_pos = {name: i for i, name in enumerate(self.features)}
+        self._year_pos = {year: i for i, year in enumerate(self.years)}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Scatter the wide rows into the cube in one assignment"""
+        year_columns = [col for col in df.columns if col not in KEY_COLUMNS]
+        country_codes, countries = pd.factorize(df['Country'], sort=True)
+        feature_codes, features = pd.factorize(df['Features'], sort=True)
+
+        values = np.full((len(countries), len(features), len(year_columns)), np.nan)
+        values[country_codes, feature_codes] = df[year_columns].to_numpy(dtype=np.float64)
+
+        regions = np.empty(len(countries), dtype=object)
+        regions[country_codes] = df['Region'].astype(str).to_numpy()
+        return cls(countries.astype(str), features.astype(str), [int(year) for year in year_columns],
+                   values, regions)
+
+    @classmethod
+    def from_csv(cls, input_file=INPUT_FILE):
+        return cls.from_frame(read_electricity_stats(input_file))
+
+    def value(self, country, feature, year):
+        return self.values[self._country_pos[country], self._feature_pos[feature], self._year_pos[year]]
+
+    def series(self, country, feature):
+        """One country's yearly series for a feature"""
+        return pd.Series(self.values[self._country_pos[country], self._feature_pos[feature]],
+                         index=self.years, name=feature)
+
+    def country(self, country):
+        """Features x years table for one country"""
+        return pd.DataFrame(self.values[self._country_pos[country]], index=self.features, columns=self.years)
+
+    def feature(self, feature, year=None):
+        """Countries x years for a feature, or one column of it for a single year"""
+        table = self.values[:, self._feature_pos[feature]]
+        if year is not None:
+            return pd.Series(table[:, self._year_pos[year]], index=self.countries, name=year)
+        return pd.DataFrame(table, index=self.countries, columns=self.years)
+
+    def to_long(self, dropna=True):
+        """Country, Region, Features, Year, Value rows, sorted by country, feature and year"""
+        n_countries, n_features, n_years = self.values.shape
+        country_codes = np.repeat(np.arange(n_countries), n_features * n_years)
+        feature_codes = np.tile(np.repeat(np.arange(n_features), n_years), n_countries)
+        long = pd.DataFrame({
+            'Country': pd.Categorical.from_codes(country_codes, self.countries),
+            'Region': self.regions.to_numpy()[country_codes],
+            'Features': pd.Categorical.from_codes(feature_codes, self.features),
+            'Year': np.tile(self.years.to_numpy(dtype=np.int16), n_countries * n_features),
+            'Value': self.values.reshape(-1),
+        })
+        if dropna:
+            long = long[long['Value'].notna()].reset_index(drop=True)
+        return long
+
+
+def preprocess_electricity(input_file=INPUT_FILE, output_file=LONG_OUTPUT_FILE):
+    """Write the long form of the electricity statistics and return the cube"""
+    with stage('electricity_read') as s:
+        df = read_electricity_stats(input_file)
+        s.rows_out = len(df)
+    with stage('electricity_cube', len(df)) as s:
+        cube = ElectricityCube.from_frame(df)
+        s.rows_out = len(cube.countries) * len(cube.features)
+    with stage('electricity_melt', s.rows_out) as s:
+        long = cube.to_long()
+        s.rows_out = len(long)
+    with stage('electricity_write', len(long)):
+        long.to_csv(output_file, index=False)
+    print(f"{len(cube.countries)} countries x {len(cube.features)} features x {len(cube.years)} years; "
+          f"{len(long)} observed values saved as: {output_file}")
+    return cube, long
@@ -1,9 +1,159 @@
+import argparse
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
-# Read file, letting pandas recognize 'NaN' or blanks as missing
-df = pd.read_csv("./global-data-on-sustainable-energy (1).csv", na_values=["NaN", "NULL", "NA"])
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.instrument import RunReport, add_report_arguments, stage
+from common.manifest import BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+from electricity_stats import INPUT_FILE as ELECTRICITY_INPUT_FILE, LONG_OUTPUT_FILE, preprocess_electricity
+
+INPUT_FILE = "./global-data-on-sustainable-energy (1).csv"
+OUTPUT_FILE = "./global-data-on-sustainable-energy-preprocessed.csv"
+
+ENTITY_COLUMN = 'Entity'
+TIME_COLUMN = 'Year'
+
+
+def value_columns(df):
+    """Numeric columns to impute: everything numeric except the entity/time keys"""
+    return [col for col in df.select_dtypes('number').columns if col not in (ENTITY_COLUMN, TIME_COLUMN)]
+
+
+def impute_global_mean(df):
+    """Every gap gets its column's mean over the whole dataset"""
+    return df.fillna(df.mean(numeric_only=True))
+
+
+def impute_entity_mean(df):
+    """
+    Every gap gets the mean of its column within the same entity; entities
+    with no observation of a column fall back to the global mean
+    """
+    columns = value_columns(df)
+    entity_means = df.groupby(ENTITY_COLUMN, sort=False)[columns].transform('mean')
+    result = df.copy()
+    result[columns] = df[columns].fillna(entity_means).fillna(df[columns].mean())
+    return result
+
+
+def impute_entity_interpolate(df):
+    """
+    Linear interpolation in time within each entity. Gaps before the first
+    or after the last observation take the nearest observed value, as
+    interpolate(limit_direction='both') would; entities with no observation
+    of a column fall back to the global mean.
+
+    One stable sort by (entity, time) puts every entity's series next to each
+    other; a grouped ffill/bfill of row positions then finds, for all
+    columns at once, the observations on either side of each gap.
+    """
+    columns = value_columns(df)
+    order = np.lexsort((df[TIME_COLUMN].to_numpy(), pd.factorize(df[ENTITY_COLUMN])[0]))
+    entities = pd.factorize(df[ENTITY_COLUMN])[0][order]
+    times = df[TIME_COLUMN].to_numpy(dtype=np.float64)[order]
+    values = df[columns].to_numpy(dtype=np.float64)[order]
+
+    observed = ~np.isnan(values)
+    positions = np.where(observed, np.arange(len(values))[:, None], np.nan)
+    grouped = pd.DataFrame(positions).groupby(entities, sort=False)
+    previous = grouped.ffill().to_numpy()
+    following = grouped.bfill().to_numpy()
+
+    # Edge gaps use their single neighbour on both sides
+    previous = np.where(np.isnan(previous), following, previous)
+    following = np.where(np.isnan(following), previous, following)
+    has_neighbour = ~np.isnan(previous)
+    prev_idx = np.where(has_neighbour, previous, 0).astype(np.int64)
+    next_idx = np.where(has_neighbour, following, 0).astype(np.int64)
+
+    column_idx = np.arange(len(columns))
+    prev_values = values[prev_idx, column_idx]
+    next_values = values[next_idx, column_idx]
+    span = times[next_idx] - times[prev_idx]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, (times[:, None] - times[prev_idx]) / span, 0.0)
+    filled = np.where(observed, values, prev_values + weight * (next_values - prev_values))
+    filled = np.where(has_neighbour | observed, filled, np.nanmean(values, axis=0))
+
+    result = df.copy()
+    unsorted = np.empty_like(filled)
+    unsorted[order] = filled
+    result[columns] = unsorted
+    return result
+
+
+# Imputation modes selectable with --mode
+IMPUTERS = {
+    'global-mean': impute_global_mean,
+    'entity-mean': impute_entity_mean,
+    'entity-interpolate': impute_entity_interpolate,
+}
+
+
+def preprocess(input_file=INPUT_FILE, output_file=OUTPUT_FILE, mode='global-mean'):
+    # Read file, letting pandas recognize 'NaN' or blanks as missing
+    with stage('read') as s:
+        df = pd.read_csv(input_file, na_values=["NaN", "NULL", "NA"])
+        s.rows_out = len(df)
+
+    # Fill missing values with the selected imputation mode
+    with stage(f'impute:{mode}', len(df)) as s:
+        df_filled = IMPUTERS[mode](df)
+        s.rows_out = len(df_filled)
+
+    with stage('write', len(df_filled)):
+        df_filled.to_csv(output_file, index=False)
+    return df_filled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill missing values in the sustainable-energy dataset")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the inputs are unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the table to the columnar store (default location: datastore/)")
+    parser.add_argument('--mode', choices=sorted(IMPUTERS), default='global-mean',
+                        help="How missing values are filled (default: global column means)")
+    parser.add_argument('--electricity-input', default=ELECTRICITY_INPUT_FILE,
+                        help="Global Electricity Statistics CSV (default: dataset/Global Electricity Statistics.csv)")
+    parser.add_argument('--electricity-output', default=LONG_OUTPUT_FILE,
+                        help="Where its long form is written (default: next to the input)")
+    add_report_arguments(parser)
+    args = parser.parse_args()
 
-# Fill missing values with column means
-df_filled = df.fillna(df.mean(numeric_only=True))
+    with RunReport.from_args('general_energy', args):
+        manifest = BuildManifest()
+        version = script_version(__file__, ['common.instrument', 'common.manifest', 'common.store'])
+        params = {'store': args.store, 'mode': args.mode}
+        if not args.force and manifest.is_current('sustainable_energy', [INPUT_FILE], version, params):
+            print(f"{OUTPUT_FILE} is up to date, nothing to do.")
+        else:
+            df_filled = preprocess(mode=args.mode)
+            if args.store:
+                with stage('store', len(df_filled)):
+                    DataStore(args.store).write(df_filled, 'round2/general_energy/sustainable_energy')
+            manifest.record('sustainable_energy', [INPUT_FILE], [OUTPUT_FILE], version, params)
 
-df_filled.to_csv("./global-data-on-sustainable-energy-preprocessed.csv", index=False)
+        electricity_version = script_version(sys.modules['electricity_stats'].__file__,
+                                             [__file__, 'common.instrument', 'common.manifest', 'common.store'])
+        # A different output path is a different build, even when the input is unchanged
+        params = {
+            'store': args.store,
+            'electricity_input': os.path.abspath(args.electricity_input),
+            'electricity_output': os.path.abspath(args.electricity_output),
+        }
+        if not args.force and manifest.is_current('electricity_statistics', [args.electricity_input],
+                                                  electricity_version, params):
+            print(f"{os.path.basename(args.electricity_output)} is up to date, nothing to do.")
+        else:
+            cube, long = preprocess_electricity(args.electricity_input, args.electricity_output)
+            if args.store:
+                with stage('electricity_store', len(long)):
+                    DataStore(args.store).write(long, 'round2/general_energy/electricity_statistics',
+                                                partition_by='Features')
+            manifest.record('electricity_statistics', [args.electricity_input], [args.electricity_output],
+                            electricity_version, params)
+        manifest.save()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import DEFAULT_INPUT, PlantIndex, haversine_km
+
+
+def capacity_within_brute_force(df, lat, lon, km):
+    """Reference implementation: distance to every plant, filter, group by fuel"""
+    distances = haversine_km(lat, lon, df['latitude'], df['longitude'])
+    return df[distances <= km].groupby('primary_fuel')['capacity in MW'].sum()
+
+
+def nearest_brute_force(df, lat, lon, k):
+    distances = haversine_km(lat, lon, df['latitude'], df['longitude'])
+    return distances.sort_values(kind='stable').index[:k].to_numpy()
+
+
+def bbox_capacity_brute_force(df, min_lat, min_lon, max_lat, max_lon):
+    inside = df['latitude'].between(min_lat, max_lat) & df['longitude'].between(min_lon, max_lon)
+    return df[inside].groupby('primary_fuel')['capacity in MW'].sum()
+
+
+def make_sites(df, n, seed=0):
+    """Siting-study-like query points: jittered around existing plants"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(df), size=n)
+    lats = np.clip(df['latitude'].to_numpy()[picks] + rng.normal(0, 0.5, n), -89.9, 89.9)
+    lons = (df['longitude'].to_numpy()[picks] + rng.normal(0, 0.5, n) + 180) % 360 - 180
+    return lats, lons
+
+
+def check_antimeridian(df, n=300, km=100.0, k=10, seed=2):
+    """
+    Brute-force comparison on the seam: plants copied to longitude +180 and
+    -180, query sites on and around it, and boxes ending exactly on +180.
+    """
+    rng = np.random.default_rng(seed)
+    seam = df.sample(n, random_state=seed).assign(longitude=rng.choice([180.0, -180.0], n))
+    near = df.sample(n, random_state=seed + 1).assign(longitude=rng.uniform(175, 180, n) * rng.choice([1, -1], n))
+    df = pd.concat([df, seam, near], ignore_index=True)
+    index = PlantIndex.from_frame(df)
+    fuels = pd.Index(index.fuels, name='primary_fuel')
+
+    lats = np.clip(seam['latitude'].to_numpy() + rng.normal(0, 0.5, n), -89.9, 89.9)
+    lons = np.concatenate([rng.choice([180.0, -180.0], n // 2), rng.uniform(178, 180, n - n // 2)])
+    brute = [capacity_within_brute_force(df, lat, lon, km).reindex(fuels, fill_value=0.0).to_numpy()
+             for lat, lon in zip(lats, lons)]
+    assert np.allclose(np.array(brute), index.capacity_within_sites(lats, lons, km)[index.fuels].to_numpy(),
+                       rtol=1e-9, atol=1e-6)
+    assert all(np.array_equal(nearest_brute_force(df, lat, lon, k), index.nearest(lat, lon, k)['plant_id'])
+               for lat, lon in zip(lats, lons))
+
+    boxes = [(lat - 5, lon, lat + 5, 180.0) for lat, lon in zip(lats, rng.uniform(150, 180, n))]
+    boxes += [(lat - 5, -180.0, lat + 5, lon) for lat, lon in zip(lats, rng.uniform(-180, -150, n))]
+    brute_box = [bbox_capacity_brute_force(df, *box).reindex(fuels, fill_value=0.0).to_numpy() for box in boxes]
+    assert np.allclose(np.array(brute_box), np.array([index.bbox_capacity(*box).to_numpy() for box in boxes]),
+                       rtol=1e-9, atol=1e-6)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(sites=2000, km=100.0, k=10):
+    df = pd.read_csv(DEFAULT_INPUT)
+    print(f"{len(df)} plants, {sites} query sites, radius {km:g} km")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_path = os.path.join(index_dir, 'index.npz')
+        build_time, index = timed(PlantIndex.load_or_build, DEFAULT_INPUT, index_path)
+        load_time, index = timed(PlantIndex.load_or_build, DEFAULT_INPUT, index_path)
+    print(f"Index build (CSV parse included): {build_time:.3f}s, reload: {load_time:.3f}s")
+
+    lats, lons = make_sites(df, sites)
+    fuels = pd.Index(index.fuels, name='primary_fuel')
+
+    brute_time, brute = timed(lambda: [
+        capacity_within_brute_force(df, lat, lon, km).reindex(fuels, fill_value=0.0).to_numpy()
+        for lat, lon in zip(lats, lons)
+    ])
+    indexed_time, indexed = timed(index.capacity_within_sites, lats, lons, km)
+    assert np.allclose(np.array(brute), indexed[index.fuels].to_numpy(), rtol=1e-9, atol=1e-6)
+
+    knn_sites = min(sites, 500)
+    brute_knn_time, brute_knn = timed(lambda: [
+        nearest_brute_force(df, lat, lon, k) for lat, lon in zip(lats[:knn_sites], lons[:knn_sites])
+    ])
+    indexed_knn_time, indexed_knn = timed(lambda: [
+        index.nearest(lat, lon, k)['plant_id'].to_numpy() for lat, lon in zip(lats[:knn_sites], lons[:knn_sites])
+    ])
+    assert all(np.array_equal(a, b) for a, b in zip(brute_knn, indexed_knn))
+
+    rng = np.random.default_rng(1)
+    boxes = [(lat - h, lon - w, lat + h, lon + w)
+             for lat, lon, h, w in zip(lats[:knn_sites], lons[:knn_sites],
+                                       rng.uniform(0.5, 15, knn_sites), rng.uniform(0.5, 25, knn_sites))]
+    boxes = [(a, max(b, -180.0), c, min(d, 180.0)) for a, b, c, d in boxes]
+    brute_box_time, brute_box = timed(lambda: [
+        bbox_capacity_brute_force(df, *box).reindex(fuels, fill_value=0.0).to_numpy() for box in boxes
+    ])
+    indexed_box_time, indexed_box = timed(lambda: [index.bbox_capacity(*box).to_numpy() for box in boxes])
+    assert np.allclose(np.array(brute_box), np.array(indexed_box), rtol=1e-9, atol=1e-6)
+    check_antimeridian(df, km=km, k=k)
+    print("✓ Indexed results match the brute-force pandas filters, on the antimeridian too")
+
+    print(f"\n{'Query':<34} {'Brute force':>12} {'Indexed':>10} {'Speed-up':>9}")
+    for label, slow, fast in [
+        (f"capacity within {km:g} km x{sites}", brute_time, indexed_time),
+        (f"{k} nearest x{knn_sites}", brute_knn_time, indexed_knn_time),
+        (f"bbox capacity by fuel x{knn_sites}", brute_box_time, indexed_box_time),
+    ]:
+        print(f"{label:<34} {slow:>11.2f}s {fast:>9.2f}s {slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Power plant preprocessing: compact typed load, the preprocessed plant
+table for the dashboard, and country x fuel capacity rollups.
+
+The raw export is read straight into compact dtypes (categorical codes,
+float32 coordinates) and every rollup comes from a single groupby over
+the categorical (country, fuel) codes; the share pivot is an unstack of
+that result rather than a second scan of the plants.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.instrument import RunReport, add_report_arguments, stage
+from common.manifest import MANIFEST_FILENAME, BuildManifest, script_version
+from common.store import DEFAULT_STORE_DIR, DataStore
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(SCRIPT_DIR, 'dataset')
+INPUT_FILE = os.path.join(DATASET_DIR, 'powerplants (global) - global_power_plants.csv')
+OUTPUT_FILE = os.path.join(DATASET_DIR, 'Global_Power_plants_Preprocessed.csv')
+ROLLUP_FILE = os.path.join(DATASET_DIR, 'Country_Fuel_Capacity.csv')
+SHARE_FILE = os.path.join(DATASET_DIR, 'Country_Fuel_Capacity_Share.csv')
+
+RAW_DTYPES = {
+    'country code': 'category',
+    'country_long': 'category',
+    'name of powerplant': 'string',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'primary_fuel': 'category',
+}
+
+# Significant digits that round-trip each float width through text
+FLOAT_DIGITS = {np.dtype('float32'): 7, np.dtype('float64'): 15}
+
+
+def load_plants(input_file=INPUT_FILE):
+    """
+    Raw power plants with compact dtypes. Capacity becomes int32 when every
+    value is a whole number of MW and stays float64 otherwise (the WRI
+    export has fractional solar capacities that float32 would round).
+    """
+    df = pd.read_csv(input_file, dtype=RAW_DTYPES)
+    capacity = df['capacity in MW']
+    if (capacity == np.floor(capacity)).all() and capacity.abs().max() < np.iinfo(np.int32).max:
+        df['capacity in MW'] = capacity.astype(np.int32)
+    return df.rename(columns={'country_long': 'Country'})
+
+
+def default_dtypes(df):
+    """The frame with the dtypes a plain read_csv would have given it"""
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+            dtypes[col] = 'str'
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = np.float64
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = np.int64
+    return df.astype(dtypes)
+
+
+def memory_report(after):
+    """Deep memory use per column of the compact load and of the same table with default dtypes"""
+    before = default_dtypes(after)
+    report = pd.DataFrame({
+        'default_dtype': before.dtypes.astype(str),
+        'default_bytes': before.memory_usage(deep=True, index=False),
+        'compact_dtype': after.dtypes.astype(str),
+        'compact_bytes': after.memory_usage(deep=True, index=False),
+    })
+    report.loc['Total'] = ['', report['default_bytes'].sum(), '', report['compact_bytes'].sum()]
+    return report
+
+
+def to_text(df):
+    """
+    CSV-ready copy: whole numbers print without a decimal point and float32
+    columns with 7 significant digits, so the file matches the source text
+    """
+    text = df.copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if dtype in FLOAT_DIGITS:
+            values = df[col].to_numpy(dtype=np.float64)
+            formatted = np.char.mod(f"%.{FLOAT_DIGITS[dtype]}g", values).astype(object)
+            formatted[np.isnan(values)] = ''
+            text[col] = formatted
+    return text
+
+
+def capacity_rollups(df):
+    """
+    Plants and MW per country and fuel from one groupby on the categorical
+    codes, with each fuel's share of the country's capacity; the wide share
+    pivot is reshaped from the same result
+    """
+    grouped = df.groupby(['country code', 'Country', 'primary_fuel'], observed=True, sort=True)
+    rollup = grouped['capacity in MW'].agg(plants='size', capacity_mw='sum').reset_index()
+    rollup['capacity_mw'] = rollup['capacity_mw'].astype(np.float64)
+
+    country_total = rollup.groupby('country code', observed=True)['capacity_mw'].transform('sum')
+    rollup['share_percent'] = (rollup['capacity_mw'] / country_total * 100).round(2)
+
+    share = rollup.pivot(index=['country code', 'Country'], columns='primary_fuel', values='share_percent')
+    share = share.fillna(0.0)
+    share.columns = share.columns.astype(str)
+    share['Total_MW'] = rollup.groupby(['country code', 'Country'], observed=True)['capacity_mw'].sum().round(3)
+    return rollup, share.reset_index()
+
+
+def preprocess(input_file=INPUT_FILE, output_file=OUTPUT_FILE, rollup_file=ROLLUP_FILE, share_file=SHARE_FILE):
+    print("Loading power plants...")
+    with stage('read') as s:
+        df = load_plants(input_file)
+        s.rows_out = len(df)
+    print(f"Plants: {len(df)}, countries: {df['country code'].nunique()}, fuels: {df['primary_fuel'].nunique()}")
+
+    report = memory_report(df)
+    print("\nMemory footprint (bytes):")
+    print(report.to_string())
+    saved = 1 - report.loc['Total', 'compact_bytes'] / report.loc['Total', 'default_bytes']
+    print(f"Compact dtypes use {saved:.0%} less memory")
+
+    with stage('write', len(df)):
+        to_text(df).to_csv(output_file, index=False)
+    print(f"\nPreprocessed plants saved as: {output_file}")
+
+    with stage('rollups', len(df)) as s:
+        rollup, share = capacity_rollups(df)
+        s.rows_out = len(rollup)
+    with stage('write_rollups', len(rollup)):
+        to_text(rollup).to_csv(rollup_file, index=False)
+        share.to_csv(share_file, index=False)
+    print(f"Country x fuel capacity saved as: {rollup_file}")
+    print(f"Fuel share pivot saved as: {share_file}")
+
+    return df, rollup, share
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess the global power plants dataset")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the input is unchanged")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_DIR, default=None,
+                        help="Also write the tables to the columnar store (default location: datastore/)")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with RunReport.from_args('power_plants', args):
+        manifest = BuildManifest(os.path.join(DATASET_DIR, MANIFEST_FILENAME))
+        version = script_version(__file__, ['common.instrument', 'common.manifest', 'common.store'])
+        params = {'store': args.store}
+        inputs = [INPUT_FILE]
+        outputs = [OUTPUT_FILE, ROLLUP_FILE, SHARE_FILE]
+        if not args.force and manifest.is_current('power_plants', inputs, version, params):
+            print("Power plant outputs are up to date, nothing to do.")
+        else:
+            plants, rollup, share = preprocess()
+            if args.store:
+                with stage('store', len(plants)):
+                    store = DataStore(args.store)
+                    store.write(plants, 'round2/powerplants/plants')
+                    store.write(rollup, 'round2/powerplants/country_fuel_capacity')
+            manifest.record('power_plants', inputs, outputs, version, params)
+        manifest.save()
@@ -0,0 +1,309 @@
+"""
+Spatial index over the global power plants dataset.
+
+Plants are bucketed into a regular latitude/longitude grid and stored
+sorted by cell, row-major, so every grid row that a query touches is one
+or two contiguous slices of the coordinate arrays (two when the query
+wraps around the antimeridian). Queries:
+
+- radius(lat, lon, km): plants within a great-circle distance, nearest first
+- nearest(lat, lon, k): the k closest plants
+- capacity_within(lat, lon, km) / capacity_within_sites(...): MW by fuel
+  around one or many sites
+- bbox_capacity(min_lat, min_lon, max_lat, max_lon): MW by fuel inside a box;
+  cells fully inside the box are read from a per-fuel summed-area table,
+  only the plants in the box's edge cells are tested one by one
+
+The index is persisted as an .npz file keyed by the source file's hash, so
+later runs load it instead of re-parsing the CSV.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.manifest import file_sha256
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(SCRIPT_DIR, 'dataset', 'powerplants (global) - global_power_plants.csv')
+DEFAULT_INDEX = os.path.join(SCRIPT_DIR, 'dataset', 'powerplants_index.npz')
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+DEFAULT_CELL_DEGREES = 1.0
+
+COLUMNS = {
+    'country': 'country code',
+    'name': 'name of powerplant',
+    'capacity': 'capacity in MW',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'fuel': 'primary_fuel',
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in degrees (broadcasts)"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class PlantIndex:
+    """Grid index of plant coordinates, capacity, fuel, country and name"""
+
+    def __init__(self, latitude, longitude, capacity, fuel_codes, fuels, country_codes, countries, names,
+                 cell_degrees=DEFAULT_CELL_DEGREES, source_hash=None, _sorted=False):
+        self.cell_degrees = float(cell_degrees)
+        self.n_rows = int(np.ceil(180 / self.cell_degrees))
+        self.n_cols = int(np.ceil(360 / self.cell_degrees))
+        self.fuels = np.asarray(fuels)
+        self.countries = np.asarray(countries)
+        self.source_hash = source_hash
+
+        arrays = [np.asarray(latitude, dtype=np.float64), np.asarray(longitude, dtype=np.float64),
+                  np.asarray(capacity, dtype=np.float64), np.asarray(fuel_codes, dtype=np.int16),
+                  np.asarray(country_codes, dtype=np.int16), np.asarray(names)]
+        if _sorted:
+            self.plant_ids = np.arange(len(arrays[0]))
+        else:
+            # Plant ids are row positions in the source file; the arrays are kept in cell order
+            cells = self._cell_of(arrays[0], arrays[1])
+            self.plant_ids = np.argsort(cells, kind='stable')
+            arrays = [array[self.plant_ids] for array in arrays]
+        self.latitude, self.longitude, self.capacity, self.fuel_codes, self.country_codes, self.names = arrays
+
+        cells = self._cell_of(self.latitude, self.longitude)
+        counts = np.bincount(cells, minlength=self.n_rows * self.n_cols)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+        # Summed-area table of capacity per fuel: sat[r, c, f] = MW in rows < r, columns < c
+        cell_fuel = np.zeros((self.n_rows * self.n_cols, len(self.fuels)))
+        np.add.at(cell_fuel, (cells, self.fuel_codes), self.capacity)
+        self.sat = np.zeros((self.n_rows + 1, self.n_cols + 1, len(self.fuels)))
+        self.sat[1:, 1:] = cell_fuel.reshape(self.n_rows, self.n_cols, -1).cumsum(axis=0).cumsum(axis=1)
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def _row_of(self, latitude):
+        return np.clip(((np.asarray(latitude) + 90) // self.cell_degrees).astype(np.int64), 0, self.n_rows - 1)
+
+    def _col_of(self, longitude):
+        longitude = np.asarray(longitude, dtype=np.float64)
+        # +180 is the east edge of the last column, not the start of the first
+        wrapped = np.where(longitude == 180, 360 - self.cell_degrees / 2, (longitude + 180) % 360)
+        return np.clip((wrapped // self.cell_degrees).astype(np.int64), 0, self.n_cols - 1)
+
+    def _cell_of(self, latitude, longitude):
+        return self._row_of(latitude) * self.n_cols + self._col_of(longitude)
+
+    @classmethod
+    def from_frame(cls, df, cell_degrees=DEFAULT_CELL_DEGREES, source_hash=None):
+        """Build from a frame with the raw power plant columns"""
+        fuel_codes, fuels = pd.factorize(df[COLUMNS['fuel']], sort=True)
+        country_codes, countries = pd.factorize(df[COLUMNS['country']], sort=True)
+        return cls(df[COLUMNS['latitude']].to_numpy(), df[COLUMNS['longitude']].to_numpy(),
+                   df[COLUMNS['capacity']].to_numpy(), fuel_codes, np.asarray(fuels, dtype=str),
+                   country_codes, np.asarray(countries, dtype=str),
+                   df[COLUMNS['name']].to_numpy(dtype=str), cell_degrees, source_hash)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_INPUT, cell_degrees=DEFAULT_CELL_DEGREES):
+        return cls.from_frame(pd.read_csv(path), cell_degrees, file_sha256(path))
+
+    def save(self, path=DEFAULT_INDEX):
+        np.savez(
+            path,
+            latitude=self.latitude, longitude=self.longitude, capacity=self.capacity,
+            fuel_codes=self.fuel_codes, fuels=self.fuels,
+            country_codes=self.country_codes, countries=self.countries,
+            names=self.names, plant_ids=self.plant_ids,
+            cell_degrees=self.cell_degrees, source_hash=str(self.source_hash or ''),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX):
+        with np.load(path) as data:
+            index = cls(data['latitude'], data['longitude'], data['capacity'], data['fuel_codes'], data['fuels'],
+                        data['country_codes'], data['countries'], data['names'],
+                        float(data['cell_degrees']), str(data['source_hash']) or None, _sorted=True)
+            index.plant_ids = data['plant_ids']
+        return index
+
+    @classmethod
+    def load_or_build(cls, csv_path=DEFAULT_INPUT, index_path=DEFAULT_INDEX, cell_degrees=DEFAULT_CELL_DEGREES):
+        """The persisted index when it was built from the current CSV, otherwise a fresh (saved) one"""
+        source_hash = file_sha256(csv_path)
+        if os.path.exists(index_path):
+            index = cls.load(index_path)
+            if index.source_hash == source_hash and index.cell_degrees == cell_degrees:
+                return index
+        index = cls.from_frame(pd.read_csv(csv_path), cell_degrees, source_hash)
+        index.save(index_path)
+        return index
+
+    def _candidates(self, rows, col_ranges):
+        """Positions of the plants in the given grid rows and (first, last) column ranges"""
+        slices = []
+        for row in rows:
+            for first, last in col_ranges:
+                start = self.cell_start[row * self.n_cols + first]
+                stop = self.cell_start[row * self.n_cols + last + 1]
+                if stop > start:
+                    slices.append(np.arange(start, stop))
+        return np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+
+    def _col_ranges(self, min_lon, max_lon):
+        """Column ranges covering a longitude interval, split at the antimeridian"""
+        if max_lon - min_lon >= 360:
+            return [(0, self.n_cols - 1)]
+        first, last = int(self._col_of(min_lon)), int(self._col_of(max_lon))
+        col_ranges = [(first, last)] if first <= last else [(first, self.n_cols - 1), (0, last)]
+        # An interval starting on -180 also reaches the plants at +180, kept in the last column
+        if (min_lon + 180) % 360 == 0 and all(end < self.n_cols - 1 for _, end in col_ranges):
+            col_ranges.append((self.n_cols - 1, self.n_cols - 1))
+        return col_ranges
+
+    def _within(self, lat, lon, km):
+        """Positions and distances of the plants within km of (lat, lon)"""
+        dlat = km / KM_PER_DEGREE
+        min_lat, max_lat = lat - dlat, lat + dlat
+        rows = range(int(self._row_of(min_lat)), int(self._row_of(max_lat)) + 1)
+
+        # Widest longitude span of the circle over its latitude band
+        widest = max(abs(min_lat), abs(max_lat))
+        if widest >= 90 or km >= np.pi * EARTH_RADIUS_KM / 2:
+            col_ranges = [(0, self.n_cols - 1)]
+        else:
+            dlon = min(dlat / np.cos(np.radians(widest)), 180.0)
+            col_ranges = self._col_ranges(lon - dlon, lon + dlon)
+
+        positions = self._candidates(rows, col_ranges)
+        distances = haversine_km(lat, lon, self.latitude[positions], self.longitude[positions])
+        inside = distances <= km
+        return positions[inside], distances[inside]
+
+    def _frame(self, positions, distances=None):
+        result = pd.DataFrame({
+            'plant_id': self.plant_ids[positions],
+            'name': self.names[positions],
+            'country_code': self.countries[self.country_codes[positions]],
+            'primary_fuel': self.fuels[self.fuel_codes[positions]],
+            'capacity_mw': self.capacity[positions],
+            'latitude': self.latitude[positions],
+            'longitude': self.longitude[positions],
+        })
+        if distances is not None:
+            result['distance_km'] = distances
+        return result
+
+    def radius(self, lat, lon, km):
+        """Plants within km of (lat, lon), nearest first"""
+        positions, distances = self._within(lat, lon, km)
+        order = np.lexsort((self.plant_ids[positions], distances))
+        return self._frame(positions[order], distances[order])
+
+    def nearest(self, lat, lon, k=10):
+        """
+        The k nearest plants, nearest first. The search radius doubles until
+        it holds k plants; every plant inside a radius is found, so the k
+        closest among them are the k closest overall.
+        """
+        km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            positions, distances = self._within(lat, lon, km)
+            if len(positions) >= k or km >= np.pi * EARTH_RADIUS_KM:
+                break
+            km *= 2
+        order = np.lexsort((self.plant_ids[positions], distances))[:k]
+        return self._frame(positions[order], distances[order])
+
+    def _fuel_series(self, capacity):
+        return pd.Series(capacity, index=pd.Index(self.fuels, name='primary_fuel'), name='capacity_mw')
+
+    def capacity_within(self, lat, lon, km):
+        """MW by fuel within km of (lat, lon)"""
+        positions, _ = self._within(lat, lon, km)
+        capacity = np.bincount(self.fuel_codes[positions], weights=self.capacity[positions],
+                               minlength=len(self.fuels))
+        return self._fuel_series(capacity)
+
+    def capacity_within_sites(self, latitudes, longitudes, km):
+        """MW by fuel within km of each site: one row per site, one column per fuel"""
+        rows = [self.capacity_within(lat, lon, km).to_numpy() for lat, lon in zip(latitudes, longitudes)]
+        result = pd.DataFrame(np.array(rows).reshape(len(rows), len(self.fuels)), columns=self.fuels)
+        result['Total'] = result.sum(axis=1)
+        return result
+
+    def bbox_capacity(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        MW by fuel of the plants with min_lat <= latitude <= max_lat and
+        min_lon <= longitude <= max_lon; min_lon > max_lon wraps across the antimeridian
+        """
+        if min_lon > max_lon:
+            return (self.bbox_capacity(min_lat, min_lon, max_lat, 180.0)
+                    + self.bbox_capacity(min_lat, -180.0, max_lat, max_lon))
+
+        capacity = np.zeros(len(self.fuels))
+        # Block of cells lying completely inside the box
+        inner_rows = (max(int(np.ceil((min_lat + 90) / self.cell_degrees)), 0),
+                      min(int((max_lat + 90) // self.cell_degrees), self.n_rows))
+        inner_cols = (max(int(np.ceil((min_lon + 180) / self.cell_degrees)), 0),
+                      min(int((max_lon + 180) // self.cell_degrees), self.n_cols))
+        has_inner = inner_rows[0] < inner_rows[1] and inner_cols[0] < inner_cols[1]
+        if has_inner:
+            (r0, r1), (c0, c1) = inner_rows, inner_cols
+            capacity += self.sat[r1, c1] - self.sat[r0, c1] - self.sat[r1, c0] + self.sat[r0, c0]
+
+        # Plants in the box's edge cells are tested one by one
+        first_row, last_row = int(self._row_of(min_lat)), int(self._row_of(max_lat))
+        first_col, last_col = int(self._col_of(min_lon)), int(self._col_of(max_lon))
+        if max_lon >= 180:
+            last_col = self.n_cols - 1
+        slices = []
+        for row in range(first_row, last_row + 1):
+            if has_inner and inner_rows[0] <= row < inner_rows[1]:
+                col_ranges = [(first_col, inner_cols[0] - 1), (inner_cols[1], last_col)]
+            else:
+                col_ranges = [(first_col, last_col)]
+            slices.append(self._candidates([row], [(a, b) for a, b in col_ranges if a <= b]))
+        positions = np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+        lat, lon = self.latitude[positions], self.longitude[positions]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        positions = positions[inside]
+        capacity += np.bincount(self.fuel_codes[positions], weights=self.capacity[positions],
+                                minlength=len(self.fuels))
+        return self._fuel_series(capacity)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the power plant spatial index and run a query")
+    parser.add_argument('--input', default=DEFAULT_INPUT, help="Raw power plants CSV")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help="Where the index is persisted")
+    parser.add_argument('--cell-degrees', type=float, default=DEFAULT_CELL_DEGREES, help="Grid cell size")
+    parser.add_argument('--site', type=float, nargs=2, metavar=('LAT', 'LON'), help="Query location")
+    parser.add_argument('--km', type=float, default=100.0, help="Search radius for --site")
+    parser.add_argument('--k', type=int, default=5, help="Nearest plants listed for --site")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = PlantIndex.load_or_build(args.input, args.index, args.cell_degrees)
+    print(f"Index of {len(index)} plants ready in {time.perf_counter() - start:.3f}s ({args.index})")
+
+    if args.site:
+        lat, lon = args.site
+        capacity = index.capacity_within(lat, lon, args.km)
+        print(f"\nCapacity within {args.km:g} km of ({lat}, {lon}): {capacity.sum():.1f} MW")
+        print(capacity[capacity > 0].sort_values(ascending=False).to_string())
+        print(f"\n{args.k} nearest plants:")
+        print(index.nearest(lat, lon, args.k).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, INPUT_FILE
+from predict import ID_COLUMNS, MODEL_DIR, Predictor, fit_model, iter_input, make_server, score_file
+
+
+def scenario_rows(n_rows, seed=0):
+    """n_rows resampled from the pollution stats with +/-20% noise on the features and 5% extra gaps"""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(INPUT_FILE, usecols=ID_COLUMNS + FEATURE_COLUMNS)
+    rows = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    values = rows[FEATURE_COLUMNS].to_numpy(dtype=np.float64) * rng.uniform(0.8, 1.2, (n_rows, len(FEATURE_COLUMNS)))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    rows[FEATURE_COLUMNS] = values
+    return rows
+
+
+def check_malformed_requests(url):
+    """Bad payloads get a 400, never an imputed prediction"""
+    row = dict.fromkeys(FEATURE_COLUMNS, 1.0)
+    malformed = [
+        {'rows': [{}]},
+        {'rows': [{'populaton_typo': 5}]},
+        {'rows': [{**row, 'populaton_typo': 5}]},
+        {'rows': [row, {col: value for col, value in row.items() if col != FEATURE_COLUMNS[0]}]},
+        {'rows': [{**row, FEATURE_COLUMNS[0]: 'many'}]},
+        {'rows': 'not a list'},
+        [1, 2],
+    ]
+    for payload in malformed:
+        request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request).read()
+        except urllib.error.HTTPError as e:
+            assert e.code == 400, (payload, e.code)
+            assert 'error' in json.loads(e.read())
+        else:
+            raise AssertionError(f"Accepted malformed payload: {payload}")
+
+    request = urllib.request.Request(url, data=json.dumps({'rows': [{**row, 'country_name': 'Peru'}]}).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        assert len(json.loads(response.read())['predicted_gdp']) == 1
+
+
+def latency_ms(call, repeats):
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        call()
+        times[i] = (time.perf_counter() - start) * 1000
+    return np.percentile(times, [50, 95, 99])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput and latency of batch GDP prediction")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Synthetic scenario rows (default: 1M)")
+    parser.add_argument('--repeats', type=int, default=200, help="Requests per latency measurement")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(MODEL_DIR, 'model.joblib')):
+        fit_model()
+    predictor = Predictor.load(MODEL_DIR)
+    rows = scenario_rows(args.rows)
+    print(f"Model: {predictor.meta['model']}; {len(rows)} synthetic scenario rows\n")
+
+    print(f"{'In-memory chunk size':<22} {'Seconds':>8} {'Rows/s':>12}")
+    reference = None
+    for chunk_size in (1_000, 10_000, 100_000):
+        start = time.perf_counter()
+        predictions = np.concatenate([predictor.predict(chunk) for chunk in iter_input(rows, chunk_size)])
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = predictions
+        np.testing.assert_allclose(predictions, reference)
+        print(f"{chunk_size:<22} {seconds:>8.2f} {len(rows) / seconds:>12,.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\n{'File input':<22} {'Seconds':>8} {'Rows/s':>12}")
+        rows.to_csv(os.path.join(tmp, 'scenarios.csv'), index=False)
+        paths = [os.path.join(tmp, 'scenarios.csv')]
+        try:
+            rows.to_parquet(os.path.join(tmp, 'scenarios.parquet'), index=False)
+            rows.to_feather(os.path.join(tmp, 'scenarios.arrow'))
+            paths += [os.path.join(tmp, 'scenarios.parquet'), os.path.join(tmp, 'scenarios.arrow')]
+        except ImportError:
+            print("(pyarrow not installed; Parquet and Arrow inputs skipped)")
+        for path in paths:
+            output = os.path.join(tmp, 'scored.csv')
+            start = time.perf_counter()
+            score_file(predictor, path, output)
+            seconds = time.perf_counter() - start
+            scored = pd.read_csv(output)['predicted_gdp'].to_numpy()
+            np.testing.assert_allclose(scored, reference, rtol=1e-9)
+            print(f"{os.path.splitext(path)[1]:<22} {seconds:>8.2f} {len(rows) / seconds:>12,.0f}")
+
+    one_row = rows.head(1)
+    request_rows = {size: json.dumps({'rows': rows.head(size).replace({np.nan: None}).to_dict('records')}).encode()
+                    for size in (1, 100)}
+    server = make_server(predictor, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/predict"
+    check_malformed_requests(url)
+    print("✓ Malformed /predict payloads are rejected with 400")
+
+    def post(size):
+        request = urllib.request.Request(url, data=request_rows[size], headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+    print(f"\n{'Latency (ms)':<22} {'p50':>8} {'p95':>8} {'p99':>8}")
+    measurements = [
+        ('in-process, 1 row', lambda: predictor.predict(one_row)),
+        ('HTTP, 1 row', lambda: post(1)),
+        ('HTTP, 100 rows', lambda: post(100)),
+    ]
+    for label, call in measurements:
+        p50, p95, p99 = latency_ms(call, args.repeats)
+        print(f"{label:<22} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
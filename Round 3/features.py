@@ -0,0 +1,230 @@
+"""
+Feature preparation for the Round 3 GDP model, extracted from l3.ipynb.
+
+The notebook fills every numeric column's gaps (and the gdp target's) with
+its mean and then replaces the waste composition / special waste columns
+(and the gdp target) by their category codes, i.e. the position of each value among
+the column's sorted distinct values. PollutionPreprocessor learns those
+means and sorted values once (fit) and applies them to any frame
+(transform), so training and prediction encode rows the same way. It
+serializes to plain JSON.
+
+load_feature_matrix builds the model matrix from the CSV once and keeps
+it in a .npz sidecar keyed by the file's hash and this module's source;
+load_training_rows does the same for the typed raw columns, which
+cross-validation encodes fold by fold.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.manifest import file_sha256, script_version
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, 'Country_Pollution_Stats.csv')
+CACHE_DIR = os.path.join(SCRIPT_DIR, '.feature_cache')
+
+TARGET = 'gdp'
+
+# Columns whose gaps the notebook fills with the column mean
+FILL_MEAN_COLUMNS = [
+    'composition_food_organic_waste_percent',
+    'composition_glass_percent',
+    'composition_metal_percent',
+    'composition_other_percent',
+    'composition_paper_cardboard_percent',
+    'composition_plastic_percent',
+    'composition_rubber_leather_percent',
+    'composition_wood_percent',
+    'composition_yard_garden_green_waste_percent',
+    'population_population_number_of_people',
+    'special_waste_agricultural_waste_tons_year',
+    'special_waste_construction_and_demolition_waste_tons_year',
+    'special_waste_e_waste_tons_year',
+    'special_waste_hazardous_waste_tons_year',
+    'special_waste_industrial_waste_tons_year',
+    'special_waste_medical_waste_tons_year',
+    'Temprature Change',
+    TARGET,
+]
+
+# Columns the notebook replaces by their category codes (columns_to_convert)
+CODED_COLUMNS = [
+    'composition_food_organic_waste_percent',
+    'composition_glass_percent',
+    'composition_metal_percent',
+    'composition_other_percent',
+    'composition_paper_cardboard_percent',
+    'composition_plastic_percent',
+    'composition_rubber_leather_percent',
+    'composition_wood_percent',
+    'composition_yard_garden_green_waste_percent',
+    'special_waste_agricultural_waste_tons_year',
+    'special_waste_construction_and_demolition_waste_tons_year',
+    'special_waste_e_waste_tons_year',
+    'special_waste_hazardous_waste_tons_year',
+    'special_waste_industrial_waste_tons_year',
+    'special_waste_medical_waste_tons_year',
+    'Temprature Change',
+    TARGET,
+]
+
+# Model inputs (numerical_columns in the notebook)
+FEATURE_COLUMNS = [
+    'composition_food_organic_waste_percent',
+    'composition_glass_percent',
+    'composition_other_percent',
+    'composition_paper_cardboard_percent',
+    'composition_plastic_percent',
+    'composition_wood_percent',
+    'population_population_number_of_people',
+    'special_waste_construction_and_demolition_waste_tons_year',
+    'special_waste_e_waste_tons_year',
+    'special_waste_hazardous_waste_tons_year',
+    'special_waste_medical_waste_tons_year',
+]
+
+# Every column the preprocessor reads
+RAW_COLUMNS = list(dict.fromkeys(FEATURE_COLUMNS + FILL_MEAN_COLUMNS + CODED_COLUMNS))
+
+
+class PollutionPreprocessor:
+    """Mean imputation and category coding learned from the training rows"""
+
+    def __init__(self, means=None, categories=None):
+        self.means = means or {}
+        self.categories = {col: np.asarray(values, dtype=np.float64) for col, values in (categories or {}).items()}
+
+    def fit(self, df):
+        self.means = {col: float(df[col].mean()) for col in FILL_MEAN_COLUMNS}
+        filled = df[list(self.means)].fillna(self.means)
+        self.categories = {
+            col: np.unique((filled[col] if col in filled else df[col]).dropna().to_numpy(dtype=np.float64))
+            for col in CODED_COLUMNS
+        }
+        return self
+
+    def encode(self, col, values):
+        """
+        Position among the fitted sorted values, as cat.codes gives for seen
+        values; unseen values get the position they would be inserted at, so
+        the coding stays monotone. Missing values become -1.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.searchsorted(self.categories[col], values).astype(np.float64)
+        codes[np.isnan(values)] = -1
+        return codes
+
+    def decode_target(self, codes):
+        """GDP values for (possibly fractional) target codes, interpolated between the fitted values"""
+        categories = self.categories[TARGET]
+        return np.interp(codes, np.arange(len(categories)), categories)
+
+    def transform(self, df):
+        """Model matrix (float64, FEATURE_COLUMNS order) for the rows of df"""
+        columns = {}
+        for col in FEATURE_COLUMNS:
+            values = df[col].to_numpy(dtype=np.float64)
+            if col in self.means:
+                values = np.where(np.isnan(values), self.means[col], values)
+            columns[col] = self.encode(col, values) if col in self.categories else values
+        return np.column_stack([columns[col] for col in FEATURE_COLUMNS])
+
+    def transform_target(self, df):
+        values = df[TARGET].to_numpy(dtype=np.float64)
+        if TARGET in self.means:
+            values = np.where(np.isnan(values), self.means[TARGET], values)
+        return self.encode(TARGET, values)
+
+    def to_dict(self):
+        return {
+            'feature_columns': FEATURE_COLUMNS,
+            'means': self.means,
+            'categories': {col: values.tolist() for col, values in self.categories.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        if state['feature_columns'] != FEATURE_COLUMNS:
+            raise ValueError("Preprocessor was fitted for a different feature set")
+        return cls(state['means'], state['categories'])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def read_training_rows(input_file=INPUT_FILE):
+    """
+    The pollution stats rows. The one country without a gdp is kept: like
+    the notebook, the preprocessor fills its target with the mean gdp.
+    """
+    return pd.read_csv(input_file)
+
+
+def cache_path_for(input_file, cache_dir, prefix):
+    """Sidecar named after the input's hash and this module's version"""
+    key = f"{file_sha256(input_file)[:16]}.{script_version(__file__, ['common.manifest'])}"
+    return os.path.join(cache_dir, f"{prefix}.{key}.npz")
+
+
+def save_cache(cache_path, **arrays):
+    """Write a sidecar, removing the ones of older inputs or versions"""
+    cache_dir = os.path.dirname(cache_path)
+    prefix = os.path.basename(cache_path).split('.')[0] + '.'
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in os.listdir(cache_dir):
+        if stale.startswith(prefix) and stale.endswith('.npz'):
+            os.remove(os.path.join(cache_dir, stale))
+    np.savez(cache_path, **arrays)
+
+
+def load_training_rows(input_file=INPUT_FILE, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    The RAW_COLUMNS of the training rows as a float64 frame, cached in a
+    .npz sidecar like the feature matrix; the encoding is left to the
+    caller, so it can be fitted on a subset of the rows
+    """
+    if not use_cache:
+        values = read_training_rows(input_file)[RAW_COLUMNS].to_numpy(dtype=np.float64)
+        return pd.DataFrame(values, columns=RAW_COLUMNS)
+
+    cache_path = cache_path_for(input_file, cache_dir, 'rows')
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return pd.DataFrame(cached['values'], columns=RAW_COLUMNS)
+
+    rows = load_training_rows(input_file, use_cache=False)
+    save_cache(cache_path, values=rows.to_numpy())
+    return rows
+
+
+def load_feature_matrix(input_file=INPUT_FILE, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    (X, y, preprocessor) for the training rows. The arrays and the fitted
+    preprocessor are cached in a .npz sidecar named after the input's hash
+    and this module's version, so later runs skip parsing and fitting.
+    """
+    if not use_cache:
+        df = read_training_rows(input_file)
+        preprocessor = PollutionPreprocessor().fit(df)
+        return preprocessor.transform(df), preprocessor.transform_target(df), preprocessor
+
+    cache_path = cache_path_for(input_file, cache_dir, 'features')
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            state = json.loads(str(cached['preprocessor']))
+            return cached['X'], cached['y'], PollutionPreprocessor.from_dict(state)
+
+    X, y, preprocessor = load_feature_matrix(input_file, use_cache=False)
+    save_cache(cache_path, X=X, y=y, preprocessor=json.dumps(preprocessor.to_dict()))
+    return X, y, preprocessor
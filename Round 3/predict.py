@@ -0,0 +1,308 @@
+"""
+Batch GDP prediction with a persisted Round 3 model.
+
+`fit` trains one of the train.py models on the whole feature matrix and
+saves an artifact directory: the fitted estimator (joblib), the fitted
+PollutionPreprocessor (JSON) and a small meta.json. Predictor loads it
+and scores rows with exactly the training imputation and coding.
+
+Rows can come from a CSV, a Parquet / Arrow IPC file or any iterator of
+dicts or DataFrames; they are scored in fixed-size chunks, each one a
+single vectorized transform and predict call, so inputs of millions of
+rows stream in constant memory:
+
+    python predict.py fit --model "Random Forest"
+    python predict.py score scenarios.csv --output scored.csv
+    python predict.py serve --port 8000
+
+The model predicts the notebook's target, the gdp category code;
+predictions are also mapped back to a GDP value by interpolating between
+the GDP values seen in training.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from features import CACHE_DIR, FEATURE_COLUMNS, INPUT_FILE, PollutionPreprocessor, load_feature_matrix
+from train import available_models, make_model
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.manifest import file_sha256
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(SCRIPT_DIR, 'model')
+MODEL_FILE = 'model.joblib'
+PREPROCESSOR_FILE = 'preprocessor.json'
+META_FILE = 'meta.json'
+
+DEFAULT_MODEL = 'Random Forest'
+CHUNK_SIZE = 100_000
+# Columns copied from the input to the scored output when present
+ID_COLUMNS = ['region_id', 'country_name']
+
+
+def fit_model(name=DEFAULT_MODEL, model_dir=MODEL_DIR, input_file=INPUT_FILE, n_jobs=None):
+    """Train a model on every training row and save it with its preprocessor"""
+    X, y, preprocessor = load_feature_matrix(input_file, CACHE_DIR)
+    model = make_model(name, n_jobs=n_jobs or os.cpu_count() or 1)
+    start = time.perf_counter()
+    model.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(model_dir, MODEL_FILE))
+    preprocessor.save(os.path.join(model_dir, PREPROCESSOR_FILE))
+    meta = {
+        'model': name,
+        'feature_columns': FEATURE_COLUMNS,
+        'training_rows': int(len(y)),
+        'training_file_sha256': file_sha256(input_file),
+        'sklearn_version': sklearn.__version__,
+        'fit_seconds': round(fit_seconds, 4),
+    }
+    with open(os.path.join(model_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    print(f"{name} fitted on {len(y)} rows in {fit_seconds:.2f}s and saved in: {model_dir}")
+    return Predictor(model, preprocessor, meta)
+
+
+class Predictor:
+    """A fitted model and its preprocessor, scoring rows chunk by chunk"""
+
+    def __init__(self, model, preprocessor, meta=None):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, model_dir=MODEL_DIR, n_jobs=1):
+        """
+        Load an artifact saved by fit_model. n_jobs sets the estimator's own
+        parallelism (when it has one) for prediction.
+        """
+        with open(os.path.join(model_dir, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['sklearn_version'] != sklearn.__version__:
+            print(f"Warning: model saved with scikit-learn {meta['sklearn_version']}, "
+                  f"running {sklearn.__version__}")
+        model = joblib.load(os.path.join(model_dir, MODEL_FILE))
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = n_jobs
+        return cls(model, PollutionPreprocessor.load(os.path.join(model_dir, PREPROCESSOR_FILE)), meta)
+
+    def predict_codes(self, df):
+        """Predicted gdp category codes for the rows of a frame"""
+        missing = [col for col in FEATURE_COLUMNS if col not in df]
+        if missing:
+            raise ValueError(f"Input is missing feature columns: {missing}")
+        if len(df) == 0:
+            return np.empty(0)
+        return self.model.predict(self.preprocessor.transform(df))
+
+    def predict(self, df):
+        """Predicted GDP for the rows of a frame"""
+        return self.preprocessor.decode_target(self.predict_codes(df))
+
+    def score(self, df):
+        """ID columns of the frame with the predicted code and GDP"""
+        codes = self.predict_codes(df)
+        scored = df[[col for col in ID_COLUMNS if col in df]].reset_index(drop=True)
+        scored['predicted_gdp_code'] = codes
+        scored['predicted_gdp'] = self.preprocessor.decode_target(codes)
+        return scored
+
+    def score_batches(self, batches):
+        """Scored frames for an iterable of input frames"""
+        for batch in batches:
+            yield self.score(batch)
+
+
+def iter_csv(path, chunk_size=CHUNK_SIZE):
+    """Chunks of a CSV, reading only the feature and ID columns"""
+    wanted = set(FEATURE_COLUMNS + ID_COLUMNS)
+    yield from pd.read_csv(path, usecols=lambda col: col in wanted, chunksize=chunk_size)
+
+
+def iter_arrow(path, chunk_size=CHUNK_SIZE):
+    """Chunks of a Parquet or Arrow IPC (Feather v2) file"""
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    if path.endswith('.parquet'):
+        parquet = pq.ParquetFile(path, memory_map=True)
+        columns = [col for col in parquet.schema_arrow.names if col in FEATURE_COLUMNS + ID_COLUMNS]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with pyarrow.memory_map(path) as source:
+        try:
+            reader = pyarrow.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pyarrow.ArrowInvalid:
+            source.seek(0)
+            batches = iter(pyarrow.ipc.open_stream(source))
+        for batch in batches:
+            for start in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(start, chunk_size).to_pandas()
+
+
+def iter_rows(rows, chunk_size=CHUNK_SIZE):
+    """Chunk frames from an iterator of row dicts or DataFrames"""
+    pending = []
+    for item in rows:
+        if isinstance(item, pd.DataFrame):
+            if pending:
+                yield pd.DataFrame(pending)
+                pending = []
+            for start in range(0, len(item), chunk_size):
+                yield item.iloc[start:start + chunk_size]
+            continue
+        pending.append(item)
+        if len(pending) == chunk_size:
+            yield pd.DataFrame(pending)
+            pending = []
+    if pending:
+        yield pd.DataFrame(pending)
+
+
+def iter_input(source, chunk_size=CHUNK_SIZE):
+    """Chunk frames from a file path (by extension) or an in-memory iterable"""
+    if isinstance(source, pd.DataFrame):
+        return iter_rows([source], chunk_size)
+    if not isinstance(source, (str, os.PathLike)):
+        return iter_rows(source, chunk_size)
+    path = os.fspath(source)
+    if path.endswith(('.parquet', '.arrow', '.feather', '.ipc')):
+        return iter_arrow(path, chunk_size)
+    return iter_csv(path, chunk_size)
+
+
+def score_file(predictor, source, output_file, chunk_size=CHUNK_SIZE):
+    """Score an input chunk by chunk, appending each scored chunk to a CSV"""
+    rows = 0
+    start = time.perf_counter()
+    for i, scored in enumerate(predictor.score_batches(iter_input(source, chunk_size))):
+        scored.to_csv(output_file, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(scored)
+    seconds = time.perf_counter() - start
+    print(f"Scored {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s); saved as: {output_file}")
+    return rows
+
+
+def request_frame(payload):
+    """
+    The rows of a /predict payload as a frame. Keys must be feature or ID
+    columns and every row must carry every feature (null for a gap), so a
+    misspelt key is an error rather than a silently imputed feature.
+    """
+    rows = payload['rows'] if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise TypeError("Expected {\"rows\": [{column: value, ...}, ...]} or a list of such rows")
+    unknown = sorted({key for row in rows for key in row} - set(FEATURE_COLUMNS + ID_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+    incomplete = [i for i, row in enumerate(rows) if not set(FEATURE_COLUMNS) <= row.keys()]
+    if incomplete:
+        raise ValueError(f"Rows {incomplete[:10]} are missing feature columns; send null for a missing value")
+    return pd.DataFrame(rows)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for a prediction endpoint.
+    POST /predict with {"rows": [{column: value, ...}, ...]} (or a bare list)
+    answers {"predicted_gdp_code": [...], "predicted_gdp": [...]}, or 400
+    with {"error": ...} for a malformed payload (see request_frame);
+    GET /health returns the model's meta.json.
+    """
+    predictor = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.predictor.meta)
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            codes = self.predictor.predict_codes(request_frame(payload))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(200, {
+            'predicted_gdp_code': codes.tolist(),
+            'predicted_gdp': self.predictor.preprocessor.decode_target(codes).tolist(),
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(predictor, host='127.0.0.1', port=8000):
+    handler = type('BoundPredictionHandler', (PredictionHandler,), {'predictor': predictor})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit, batch-score or serve the Round 3 GDP model")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fit = commands.add_parser('fit', help="Train a model on all rows and save the artifact")
+    fit.add_argument('--model', default=DEFAULT_MODEL, choices=available_models())
+    fit.add_argument('--n-jobs', type=int, default=None, help="Threads for fitting (default: all cores)")
+
+    score = commands.add_parser('score', help="Score a CSV, Parquet or Arrow file")
+    score.add_argument('input', help="Rows to score")
+    score.add_argument('--output', default=None, help="Scored CSV (default: <input>_scored.csv)")
+    score.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    score.add_argument('--n-jobs', type=int, default=1, help="Threads used by the model while predicting")
+
+    serve = commands.add_parser('serve', help="Serve predictions over HTTP on this machine")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+
+    for command in (fit, score, serve):
+        command.add_argument('--model-dir', default=MODEL_DIR, help="Artifact directory")
+    args = parser.parse_args(argv)
+
+    if args.command == 'fit':
+        fit_model(args.model, args.model_dir, n_jobs=args.n_jobs)
+    elif args.command == 'score':
+        predictor = Predictor.load(args.model_dir, n_jobs=args.n_jobs)
+        output = args.output or os.path.splitext(args.input)[0] + '_scored.csv'
+        score_file(predictor, args.input, output, args.chunk_size)
+    else:
+        server = make_server(Predictor.load(args.model_dir), args.host, args.port)
+        print(f"Serving {server.RequestHandlerClass.predictor.meta['model']} on "
+              f"http://{args.host}:{server.server_port}/predict (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
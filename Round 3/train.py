@@ -0,0 +1,179 @@
+"""
+Cross-validated training of the l3.ipynb GDP regressors.
+
+The notebook fits its five models one after another on a single 60/40
+split. Here every (model, fold) pair of a shuffled k-fold split is an
+independent task fanned out over a process pool. The PollutionPreprocessor
+of features.py is fitted on each fold's training rows only, so the means
+and category codes never see the rows a fold is scored on. The typed raw
+rows come from the features.py sidecar cache, so the CSV is parsed once.
+
+--n-jobs is the total CPU budget: it is divided between the pool workers
+and the threads each model may use (n_jobs of the forest, BLAS threads),
+so a run never asks for more cores than it was given.
+
+    python train.py --folds 5 --n-jobs 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.tree import DecisionTreeRegressor
+from threadpoolctl import threadpool_limits
+
+from features import CACHE_DIR, INPUT_FILE, PollutionPreprocessor, load_training_rows
+
+try:
+    from xgboost import XGBRegressor
+except ImportError:
+    XGBRegressor = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(SCRIPT_DIR, 'results')
+RANDOM_STATE = 42
+
+
+def make_model(name, n_jobs=1):
+    """A fresh, unfitted instance of one of the notebook's models"""
+    if name == 'Linear Regression':
+        return LinearRegression()
+    if name == 'Random Forest':
+        return RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs)
+    if name == 'Decision Tree':
+        return DecisionTreeRegressor(random_state=RANDOM_STATE)
+    if name == 'Gradient Boosting':
+        return GradientBoostingRegressor(random_state=RANDOM_STATE)
+    if name == 'XGBRegressor':
+        return XGBRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs)
+    raise ValueError(f"Unknown model: {name}")
+
+
+def available_models():
+    models = ['Linear Regression', 'Random Forest', 'Decision Tree', 'Gradient Boosting']
+    if XGBRegressor is not None:
+        models.append('XGBRegressor')
+    return models
+
+
+def regression_metrics(y_true, y_pred):
+    mse = mean_squared_error(y_true, y_pred)
+    return {
+        'mse': mse,
+        'rmse': float(np.sqrt(mse)),
+        'mae': mean_absolute_error(y_true, y_pred),
+        'r2': r2_score(y_true, y_pred),
+    }
+
+
+def run_fold(task):
+    """Fit and score one model on one fold; runs in a pool worker"""
+    name, fold, (X_train, y_train, X_test, y_test), threads = task
+    with threadpool_limits(limits=threads):
+        model = make_model(name, n_jobs=threads)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - start
+
+    return {
+        'model': name,
+        'fold': fold,
+        'n_train': len(y_train),
+        'n_test': len(y_test),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        **regression_metrics(y_test, y_pred),
+    }
+
+
+def fold_matrices(rows, train_idx, test_idx):
+    """(X_train, y_train, X_test, y_test) with the preprocessor fitted on the training rows only"""
+    train, test = rows.iloc[train_idx], rows.iloc[test_idx]
+    preprocessor = PollutionPreprocessor().fit(train)
+    return (preprocessor.transform(train), preprocessor.transform_target(train),
+            preprocessor.transform(test), preprocessor.transform_target(test))
+
+
+def split_budget(n_tasks, n_jobs, workers=None):
+    """(pool workers, threads per task) that together stay within n_jobs cores"""
+    n_jobs = max(1, n_jobs)
+    workers = max(1, min(workers or n_jobs, n_tasks, n_jobs))
+    return workers, max(1, n_jobs // workers)
+
+
+def cross_validate(rows, models=None, folds=5, n_jobs=None, workers=None):
+    """
+    Per-fold results of every model, fitted in parallel over (model, fold)
+    tasks; each fold's matrices are encoded once and shared by its models
+    """
+    models = models or available_models()
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE).split(rows))
+    matrices = [fold_matrices(rows, train_idx, test_idx) for train_idx, test_idx in splits]
+    workers, threads = split_budget(len(models) * len(splits), n_jobs or os.cpu_count() or 1, workers)
+    tasks = [(name, fold, fold_matrix, threads) for name in models for fold, fold_matrix in enumerate(matrices)]
+
+    print(f"{len(tasks)} fits ({len(models)} models x {folds} folds) on {workers} worker(s) "
+          f"x {threads} thread(s)")
+    if workers == 1:
+        results = [run_fold(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_fold, tasks))
+    return pd.DataFrame(results)
+
+
+def summarize(fold_results):
+    """Mean and standard deviation of every timing and metric per model"""
+    columns = ['fit_seconds', 'predict_seconds', 'mse', 'rmse', 'mae', 'r2']
+    summary = fold_results.groupby('model', sort=False)[columns].agg(['mean', 'std'])
+    summary.columns = [f"{col}_{stat}" for col, stat in summary.columns]
+    return summary.sort_values('r2_mean', ascending=False).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate the Round 3 GDP models")
+    parser.add_argument('--folds', type=int, default=5, help="Number of CV folds (default: 5)")
+    parser.add_argument('--n-jobs', type=int, default=None, help="Total CPU budget (default: all cores)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Pool size; the rest of the budget goes to threads inside each model")
+    parser.add_argument('--models', nargs='+', default=None, choices=available_models(),
+                        help="Subset of models to run (default: all available)")
+    parser.add_argument('--no-cache', action='store_true', help="Re-read the training rows from the CSV")
+    parser.add_argument('--results-dir', default=RESULTS_DIR, help="Where the result tables are written")
+    args = parser.parse_args(argv)
+
+    if XGBRegressor is None:
+        print("xgboost is not installed; skipping XGBRegressor")
+
+    start = time.perf_counter()
+    rows = load_training_rows(INPUT_FILE, CACHE_DIR, use_cache=not args.no_cache)
+    print(f"Training rows {rows.shape} ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    fold_results = cross_validate(rows, args.models, args.folds, args.n_jobs, args.workers)
+    print(f"Cross-validation took {time.perf_counter() - start:.2f}s")
+
+    summary = summarize(fold_results)
+    print()
+    print(summary[['model', 'fit_seconds_mean', 'predict_seconds_mean', 'rmse_mean', 'mae_mean',
+                   'r2_mean', 'r2_std']].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    fold_results.to_csv(os.path.join(args.results_dir, 'cv_folds.csv'), index=False)
+    summary.to_csv(os.path.join(args.results_dir, 'cv_summary.csv'), index=False)
+    print(f"\nResults saved in: {args.results_dir}")
+    return fold_results, summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Helpers shared by the Climate-O-Metric preprocessing scripts."""
@@ -0,0 +1,286 @@
+"""
+Single-pass aggregate statistics over a value column.
+
+AggregateEngine folds chunks of a frame (a whole DataFrame, or the chunks
+of a pd.read_csv(chunksize=...) reader) into running state. Each column is
+scanned once as a NumPy array, and the engine produces:
+
+- count / sum / mean, and an exact (all values kept) or histogram-approximated
+  median
+- min / max and the rows holding them
+- the top-K and bottom-K rows, with ties kept in row order like
+  nlargest / nsmallest
+- value counts for category columns, in first-seen order
+- per-group count, mean, min, max and sample std, combined across chunks
+  with Chan's parallel variance update
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+class TopK:
+    """
+    The K rows with the largest keys, seen across chunks.
+    Ties are broken in favour of earlier rows, as in nlargest(keep='first').
+    """
+
+    def __init__(self, k, largest=True):
+        self.k = k
+        self.largest = largest
+        self.heap = []
+
+    def candidates(self, keys):
+        """
+        Indices of the at most K rows of a chunk that can enter the heap:
+        every key above the K-th largest, then the earliest rows tied with it
+        """
+        valid = np.flatnonzero(~np.isnan(keys))
+        if len(valid) <= self.k:
+            return valid
+        keys = keys[valid]
+        cut = len(keys) - self.k
+        threshold = keys[np.argpartition(keys, cut)[cut]]
+        above = np.flatnonzero(keys > threshold)
+        tied = np.flatnonzero(keys == threshold)[:self.k - len(above)]
+        return valid[np.sort(np.concatenate([above, tied]))]
+
+    def update(self, values, positions, labels):
+        """labels: the chunk's label columns; only the candidate rows are materialized"""
+        if self.k <= 0:
+            return
+        keys = values if self.largest else -values
+        candidates = self.candidates(keys)
+        if len(self.heap) == self.k:
+            candidates = candidates[keys[candidates] >= self.heap[0][0]]
+        rows = labels.iloc[candidates].itertuples(index=False, name=None)
+
+        for i, row in zip(candidates, rows):
+            item = (keys[i], -positions[i], row)
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, item)
+            elif item[:2] > self.heap[0][:2]:
+                heapq.heapreplace(self.heap, item)
+
+    def rows(self):
+        """Best first; equal keys in row order"""
+        ordered = sorted(self.heap, key=lambda item: (-item[0], -item[1]))
+        return [row for _, _, row in ordered]
+
+
+class GroupedMoments:
+    """
+    Per-group non-null counts, means, M2 (for the variance), min and max of
+    several columns; the count_only columns only get their counts
+    """
+
+    def __init__(self, columns, count_only=()):
+        self.columns = list(columns)
+        self.count_only = set(count_only)
+        self.group_ids = {}
+        self.count = np.zeros((len(self.columns), 0))
+        self.mean = np.zeros((len(self.columns), 0))
+        self.m2 = np.zeros((len(self.columns), 0))
+        self.min = np.zeros((len(self.columns), 0))
+        self.max = np.zeros((len(self.columns), 0))
+        self.rows = np.zeros(0)
+
+    def _grow(self, size):
+        extra = size - self.count.shape[1]
+        if extra <= 0:
+            return
+        pad = lambda array, fill: np.hstack([array, np.full((array.shape[0], extra), fill)])
+        self.count = pad(self.count, 0.0)
+        self.mean = pad(self.mean, 0.0)
+        self.m2 = pad(self.m2, 0.0)
+        self.min = pad(self.min, np.inf)
+        self.max = pad(self.max, -np.inf)
+        self.rows = np.append(self.rows, np.zeros(extra))
+
+    def update(self, keys, values):
+        """keys: group labels per row (missing keys are skipped); values: (columns, rows) array"""
+        codes, uniques = pd.factorize(keys)
+        present = codes >= 0
+        if not present.all():
+            codes, values = codes[present], values[:, present]
+        local_to_global = np.array([self.group_ids.setdefault(key, len(self.group_ids)) for key in uniques], dtype=np.int64)
+        self._grow(len(self.group_ids))
+        group = local_to_global[codes] if len(codes) else codes
+        size = len(self.group_ids)
+
+        self.rows += np.bincount(group, minlength=size)
+        for i, column in enumerate(values):
+            valid = ~np.isnan(column)
+            g, v = (group, column) if valid.all() else (group[valid], column[valid])
+            n_b = np.bincount(g, minlength=size).astype(np.float64)
+            if self.columns[i] in self.count_only:
+                self.count[i] += n_b
+                continue
+            sum_b = np.bincount(g, weights=v, minlength=size)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_b = np.where(n_b > 0, sum_b / n_b, 0.0)
+            m2_b = np.bincount(g, weights=(v - mean_b[g]) ** 2, minlength=size)
+
+            # Chan et al. combination of the running and chunk moments
+            n_a, mean_a = self.count[i], self.mean[i]
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.mean[i] = np.where(n > 0, mean_a + delta * n_b / n, 0.0)
+                self.m2[i] = self.m2[i] + m2_b + np.where(n > 0, delta ** 2 * n_a * n_b / n, 0.0)
+            self.count[i] = n
+            np.minimum.at(self.min[i], g, v)
+            np.maximum.at(self.max[i], g, v)
+
+    def frame(self):
+        """One row per group, sorted by group label like groupby"""
+        labels = list(self.group_ids)
+        result = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i, column in enumerate(self.columns):
+                empty = self.count[i] == 0
+                result[(column, 'count')] = self.count[i].astype(np.int64)
+                if column in self.count_only:
+                    continue
+                result[(column, 'mean')] = np.where(empty, np.nan, self.mean[i])
+                result[(column, 'min')] = np.where(empty, np.nan, self.min[i])
+                result[(column, 'max')] = np.where(empty, np.nan, self.max[i])
+                result[(column, 'std')] = np.where(self.count[i] > 1, np.sqrt(self.m2[i] / (self.count[i] - 1)), np.nan)
+        frame = pd.DataFrame(result, index=pd.Index(labels))
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns)
+        return frame.sort_index()
+
+
+class AggregateEngine:
+    """
+    Report statistics for value_col, computed in one pass over each chunk.
+
+    label_cols: columns kept for the top/bottom-K and min/max rows.
+    category_cols: columns to value-count.
+    group_col / group_cols: key and value columns for the per-group moments;
+    group_count_cols: columns whose non-null count per group is reported.
+    median: 'exact' keeps every non-null value (8 bytes a row) until the
+    end of the run, so memory grows with the input; 'approx' keeps a
+    fixed-width histogram over median_range instead, so memory stays
+    constant on chunked or unbounded feeds.
+    """
+
+    def __init__(self, value_col, label_cols=None, category_cols=(), group_col=None, group_cols=(),
+                 group_count_cols=(), k=50, median='exact', median_range=(0.0, 500.0), median_bins=5000):
+        self.value_col = value_col
+        self.label_cols = list(label_cols) if label_cols else [value_col]
+        self.category_cols = list(category_cols)
+        self.k = k
+        self.median_mode = median
+        self.rows = 0
+        self.count = 0
+        self.total = 0.0
+        self.top = TopK(k, largest=True)
+        self.bottom = TopK(k, largest=False)
+        self.category_counts = {col: {} for col in self.category_cols}
+        self.group_col = group_col
+        self.group_count_cols = list(group_count_cols)
+        self.groups = GroupedMoments(self.group_count_cols + list(group_cols), count_only=self.group_count_cols) \
+            if group_col else None
+        self.group_dtypes = {}
+        self.median_values = []
+        self.median_edges = np.linspace(median_range[0], median_range[1], median_bins + 1)
+        self.median_hist = np.zeros(median_bins, dtype=np.int64)
+        self.median_below = 0
+        self.median_above = 0
+
+    def update(self, chunk):
+        values = chunk[self.value_col].to_numpy(dtype=np.float64)
+        positions = np.arange(self.rows, self.rows + len(chunk))
+        valid = ~np.isnan(values)
+
+        self.count += int(valid.sum())
+        self.total += float(values[valid].sum())
+
+        labels = chunk[self.label_cols]
+        self.top.update(values, positions, labels)
+        self.bottom.update(values, positions, labels)
+
+        if self.median_mode == 'exact':
+            self.median_values.append(values[valid])
+        else:
+            observed = values[valid]
+            self.median_below += int((observed < self.median_edges[0]).sum())
+            self.median_above += int((observed > self.median_edges[-1]).sum())
+            self.median_hist += np.histogram(observed, bins=self.median_edges)[0]
+
+        for col in self.category_cols:
+            codes, uniques = pd.factorize(chunk[col])
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            running = self.category_counts[col]
+            for category, count in zip(uniques, counts):
+                running[category] = running.get(category, 0) + int(count)
+
+        if self.groups is not None:
+            for col in self.groups.columns[len(self.group_count_cols):]:
+                self.group_dtypes.setdefault(col, chunk[col].dtype)
+            # Count-only columns enter as 0 / NaN so their per-group count is the non-null count
+            presence = [np.where(chunk[col].notna(), 0.0, np.nan) for col in self.group_count_cols]
+            group_values = chunk[self.groups.columns[len(presence):]].to_numpy(dtype=np.float64).T
+            if presence:
+                group_values = np.vstack([np.array(presence).reshape(len(presence), -1), group_values])
+            self.groups.update(chunk[self.group_col], group_values)
+
+        self.rows += len(chunk)
+        return self
+
+    def median(self):
+        if self.median_mode == 'exact':
+            values = np.concatenate(self.median_values) if self.median_values else np.array([])
+            return float(np.median(values)) if len(values) else np.nan
+
+        # Linear interpolation inside the histogram bin holding the middle rank
+        n = self.median_below + self.median_hist.sum() + self.median_above
+        if n == 0:
+            return np.nan
+        rank = (n - 1) / 2 - self.median_below
+        cumulative = np.cumsum(self.median_hist)
+        if rank < 0 or rank >= cumulative[-1]:
+            return np.nan
+        b = int(np.searchsorted(cumulative, rank, side='right'))
+        before = cumulative[b - 1] if b else 0
+        fraction = (rank - before + 0.5) / self.median_hist[b]
+        return float(self.median_edges[b] + fraction * (self.median_edges[b + 1] - self.median_edges[b]))
+
+    def value_counts(self, col):
+        """Counts in descending order; equal counts stay in first-seen order"""
+        counts = self.category_counts[col]
+        return pd.Series(dict(sorted(counts.items(), key=lambda item: -item[1])), name='count', dtype=np.int64)
+
+    def top_rows(self):
+        return pd.DataFrame(self.top.rows(), columns=self.label_cols)
+
+    def bottom_rows(self):
+        return pd.DataFrame(self.bottom.rows(), columns=self.label_cols)
+
+    def summary(self):
+        """Scalar statistics of value_col"""
+        top, bottom = self.top.rows(), self.bottom.rows()
+        value_index = self.label_cols.index(self.value_col)
+        return {
+            'rows': self.rows,
+            'count': self.count,
+            'mean': self.total / self.count if self.count else np.nan,
+            'median': self.median(),
+            'max': top[0][value_index] if top else np.nan,
+            'min': bottom[0][value_index] if bottom else np.nan,
+            'max_row': top[0] if top else None,
+            'min_row': bottom[0] if bottom else None,
+            'groups': len(self.groups.group_ids) if self.groups is not None else None,
+        }
+
+    def group_frame(self):
+        """Per-group statistics; min and max keep an integer column's dtype, as groupby does"""
+        frame = self.groups.frame()
+        for col, dtype in self.group_dtypes.items():
+            if pd.api.types.is_integer_dtype(dtype):
+                for stat in ('min', 'max'):
+                    if frame[(col, stat)].notna().all():
+                        frame[(col, stat)] = frame[(col, stat)].astype(dtype)
+        return frame
@@ -0,0 +1,266 @@
+"""
+Performance regression check for the preprocessing pipelines.
+
+Every pipeline script is run on synthetic inputs: its real inputs with
+the data rows repeated `scale` times under renamed keys (country, city or
+entity names get a " #k" suffix), written to a scratch directory so the
+repository's outputs are never touched. Each run writes its JSON run report
+(common.instrument), and the per-stage timings are compared against a
+stored baseline report:
+
+    python -m common.benchmark_pipelines --scale 10 --update-baseline
+    python -m common.benchmark_pipelines --scale 10
+
+A stage regresses when it is more than --tolerance slower than its
+baseline and the difference exceeds --min-seconds (timer noise on the
+small stages). Changed row counts are reported too, since they mean the
+pipeline no longer does the same work. The exit status is 1 on any
+regression, so the check can gate a CI job. Timings only compare on the
+same machine, so the baseline lives in the git-ignored run_reports/.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from common.instrument import DEFAULT_REPORT_DIR, fit_label
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(DEFAULT_REPORT_DIR, 'baseline.json')
+
+ROUND1_DIR = os.path.join(REPO_ROOT, 'Round 1')
+CLIMATE_DIR = os.path.join(REPO_ROOT, 'Round 2', 'Climate & Temperatures')
+EMISSIONS_DIR = os.path.join(REPO_ROOT, 'Round 2', 'Emissions and Pollutions', 'dataset')
+ENERGY_DIR = os.path.join(REPO_ROOT, 'Round 2', 'General energy data')
+
+WDI_HEADER_LINES = 5
+
+
+def scale_csv(src, dst, scale, key_fields=(), header_lines=1):
+    """
+    Copy a CSV with its data rows repeated `scale` times; copy k > 0 gets
+    " #k" appended to the key fields so the copies are distinct entities.
+    Header lines (and a BOM) are kept verbatim.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    with open(src, encoding='utf-8', newline='') as f:
+        header = [f.readline() for _ in range(header_lines)]
+        rows = list(csv.reader(f))
+    with open(dst, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(header)
+        writer = csv.writer(f, lineterminator='\n')
+        for copy in range(scale):
+            for row in rows:
+                if copy and row:
+                    row = list(row)
+                    for field in key_fields:
+                        row[field] = f"{row[field].strip()} #{copy}"
+                writer.writerow(row)
+    return len(rows) * scale
+
+
+def prepare_round1(work_dir, scale):
+    sys.path.insert(0, ROUND1_DIR)
+    from preprocess import datasets
+
+    base_dir = os.path.join(work_dir, 'datasets')
+    for dataset in datasets:
+        scale_csv(os.path.join(ROUND1_DIR, 'datasets', dataset['path']), os.path.join(base_dir, dataset['path']),
+                  scale, key_fields=(0, 1), header_lines=WDI_HEADER_LINES)
+    return work_dir, ['--base-dir', base_dir, '--workers', '1']
+
+
+def prepare_temperature(work_dir, scale):
+    cleaned = os.path.join(CLIMATE_DIR, 'dataset', 'Cleaned')
+    input_dir = os.path.join(work_dir, 'Cleaned')
+    for name in sorted(os.listdir(cleaned)):
+        if name.endswith('.csv'):
+            # Repeated rows average back to the same yearly values
+            scale_csv(os.path.join(cleaned, name), os.path.join(input_dir, name), scale)
+    return work_dir, [input_dir, '-o', os.path.join(work_dir, 'Preprocessed'), '--workers', '1', '--force']
+
+
+def prepare_forest(work_dir, scale):
+    """
+    The raw IMF Forest_and_Carbon.csv is not in the repository; it is rebuilt
+    in its wide F1992..F2022 layout from the cleaned long file
+    """
+    keys = ['Country', 'ISO2', 'ISO3', 'Indicator', 'Unit']
+    long = pd.read_csv(os.path.join(EMISSIONS_DIR, 'Preprocessed Data', 'Forest_and_Carbon_Clean.csv'))
+    # Aggregates have no ISO2 code; blank keys keep them in the pivot and read back as missing
+    long[keys] = long[keys].fillna('')
+    wide = long.pivot_table(index=keys, columns='Year', values='Value').reset_index()
+    wide.columns = [f"F{col}" if isinstance(col, (int, float)) and not isinstance(col, bool) else col
+                    for col in wide.columns]
+    wide.insert(0, 'ObjectId', range(1, len(wide) + 1))
+    wide.insert(6, 'Source', 'Synthetic benchmark input')
+    for offset, col in enumerate(['CTS_Code', 'CTS_Name', 'CTS_Full_Descriptor']):
+        wide.insert(7 + offset, col, '')
+    seed = os.path.join(work_dir, 'seed.csv')
+    wide.to_csv(seed, index=False)
+    scale_csv(seed, os.path.join(work_dir, 'Forest_and_Carbon.csv'), scale, key_fields=(1,))
+    os.remove(seed)
+    return work_dir, ['--force']
+
+
+def prepare_air(work_dir, scale):
+    scale_csv(os.path.join(EMISSIONS_DIR, 'Raw Data', 'global_air_pollution_data.csv'),
+              os.path.join(work_dir, 'global_air_pollution_data.csv'), scale, key_fields=(0, 1))
+    return work_dir, ['--force']
+
+
+def prepare_energy(work_dir, scale):
+    scale_csv(os.path.join(ENERGY_DIR, 'dataset', 'global-data-on-sustainable-energy (1).csv'),
+              os.path.join(work_dir, 'global-data-on-sustainable-energy (1).csv'), scale, key_fields=(0,))
+    electricity = os.path.join(work_dir, 'Global Electricity Statistics.csv')
+    scale_csv(os.path.join(ENERGY_DIR, 'dataset', 'Global Electricity Statistics.csv'), electricity, scale,
+              key_fields=(0,))
+    return work_dir, ['--force', '--electricity-input', electricity,
+                      '--electricity-output', os.path.join(work_dir, 'global-electricity-statistics-long.csv')]
+
+
+# (report name, script, input preparation)
+PIPELINES = [
+    ('round1_preprocess', os.path.join(ROUND1_DIR, 'preprocess.py'), prepare_round1),
+    ('temperature_cleaner', os.path.join(CLIMATE_DIR, 'data_cleaner.py'), prepare_temperature),
+    ('forest_carbon', os.path.join(EMISSIONS_DIR, 'Preprocessed Data', 'clean_forest_carbon_data.py'),
+     prepare_forest),
+    ('air_pollution', os.path.join(EMISSIONS_DIR, 'Preprocessed Data', 'clean_air_pollution_data.py'),
+     prepare_air),
+    ('general_energy', os.path.join(ENERGY_DIR, 'preprocess.py'), prepare_energy),
+]
+
+
+def run_pipeline(name, script, prepare, work_dir, scale, trace_memory=False):
+    """Prepare the scaled inputs, run the script and return its run report"""
+    pipeline_dir = os.path.join(work_dir, name)
+    os.makedirs(pipeline_dir, exist_ok=True)
+    cwd, argv = prepare(pipeline_dir, scale)
+    report_path = os.path.join(pipeline_dir, 'report.json')
+    command = [sys.executable, script, *argv, '--report', report_path]
+    if trace_memory:
+        command.append('--trace-memory')
+
+    with open(os.path.join(pipeline_dir, 'output.log'), 'w', encoding='utf-8') as log:
+        completed = subprocess.run(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    if completed.returncode != 0 or not os.path.exists(report_path):
+        with open(os.path.join(pipeline_dir, 'output.log'), encoding='utf-8') as log:
+            raise RuntimeError(f"{name} failed (exit {completed.returncode}):\n{log.read()[-2000:]}")
+    with open(report_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def stage_table(report):
+    """stage -> seconds, rows and peaks; repeated stage names are summed"""
+    stages = {}
+    for record in report['stages']:
+        entry = stages.setdefault(record['stage'], {'seconds': 0.0, 'rows_out': None, 'traced_peak_mb': None})
+        entry['seconds'] += record['seconds']
+        if record.get('rows_out') is not None:
+            entry['rows_out'] = (entry['rows_out'] or 0) + record['rows_out']
+        if record.get('traced_peak_mb') is not None:
+            entry['traced_peak_mb'] = max(entry['traced_peak_mb'] or 0.0, record['traced_peak_mb'])
+    return stages
+
+
+def compare(current, baseline, tolerance, min_seconds):
+    """Print every stage against its baseline and return the regressions"""
+    regressions = []
+    print(f"\n{'Pipeline / stage':<62} {'Baseline':>9} {'Now':>9} {'Change':>8}  Status")
+    for name, run in current['pipelines'].items():
+        base = baseline['pipelines'].get(name)
+        if base is None:
+            print(f"{name:<62} {'-':>9} {run['wall_seconds']:>9.3f} {'':>8}  new pipeline")
+            continue
+        rows = [(name, base['wall_seconds'], run['wall_seconds'], None, None)]
+        rows += [(f"  {stage}", base['stages'][stage]['seconds'] if stage in base['stages'] else None,
+                  entry['seconds'], base['stages'].get(stage, {}).get('rows_out'), entry['rows_out'])
+                 for stage, entry in run['stages'].items()]
+        rows += [(f"  {stage}", entry['seconds'], None, None, None)
+                 for stage, entry in base['stages'].items() if stage not in run['stages']]
+
+        for label, before, now, rows_before, rows_now in rows:
+            if before is None or now is None:
+                status = 'new stage' if before is None else 'stage gone'
+                print(f"{fit_label(label, 62):<62} {'-' if before is None else f'{before:.3f}':>9} "
+                      f"{'-' if now is None else f'{now:.3f}':>9} {'':>8}  {status}")
+                continue
+            change = (now / before - 1) * 100 if before > 0 else 0.0
+            status = 'ok'
+            if now > before * (1 + tolerance) and now - before > min_seconds:
+                status = 'SLOWER'
+                regressions.append((label.strip(), name, before, now))
+            elif before > now * (1 + tolerance) and before - now > min_seconds:
+                status = 'faster'
+            if rows_before is not None and rows_now is not None and rows_before != rows_now:
+                status += f' (rows {rows_before} -> {rows_now})'
+            print(f"{fit_label(label, 62):<62} {before:>9.3f} {now:>9.3f} {change:>+7.0f}%  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every pipeline on scaled synthetic inputs and compare "
+                                                 "the run reports against a stored baseline")
+    parser.add_argument('--scale', type=int, default=10, help="Copies of each input's data rows (default: 10)")
+    parser.add_argument('--pipelines', nargs='+', choices=[name for name, _, _ in PIPELINES], default=None,
+                        help="Subset of pipelines to run (default: all)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report (default: %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown per stage as a fraction (default: 0.25)")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument('--trace-memory', action='store_true', help="Run the pipelines with tracemalloc on")
+    parser.add_argument('--keep', default=None, help="Keep the synthetic inputs and outputs in this directory")
+    args = parser.parse_args(argv)
+
+    selected = [pipeline for pipeline in PIPELINES if args.pipelines is None or pipeline[0] in args.pipelines]
+    current = {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'trace_memory': args.trace_memory,
+        'pipelines': {},
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        work_dir = args.keep or scratch
+        for name, script, prepare in selected:
+            start = time.perf_counter()
+            report = run_pipeline(name, script, prepare, work_dir, args.scale, args.trace_memory)
+            current['pipelines'][name] = {
+                'wall_seconds': report['wall_seconds'],
+                'max_rss_mb': report['max_rss_mb'],
+                'stages': stage_table(report),
+            }
+            print(f"{name:<22} {report['wall_seconds']:>8.2f}s in the script, "
+                  f"{time.perf_counter() - start:>6.2f}s with input preparation; "
+                  f"peak RSS {report['max_rss_mb']:.0f} MB")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    regressions = []
+    if baseline is not None and baseline['scale'] != args.scale:
+        print(f"\nBaseline was recorded at scale {baseline['scale']}, not {args.scale}; nothing compared")
+    elif baseline is not None:
+        regressions = compare(current, baseline, args.tolerance, args.min_seconds)
+        print(f"\n{len(regressions)} stage(s) slower than the baseline of {baseline['created_at']}")
+
+    if args.update_baseline or baseline is None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1)
+        print(f"Baseline saved as: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,347 @@
+"""
+Country-name normalization shared by the Round 2 cleaners.
+
+Source datasets spell countries differently: IMF files use "Korea, Rep. of"
+and "Netherlands, The", UN-style files use "Republic of Korea" and
+"Netherlands". normalize_country_names maps both onto one canonical name.
+It works on the distinct values of a column, not on every row: the names
+are factorized, each distinct name goes through an exact alias lookup and
+a single compiled suffix pattern, and the results are broadcast back
+through the codes. attach_iso_codes adds the ISO2 / ISO3 codes of the
+canonical names from a static table.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Exact spellings that the generic suffix pattern cannot resolve, either because
+# the short name differs ("Viet Nam") or because stripping would collide
+# ("Congo, Rep. of" vs "Congo, Dem. Rep. of the")
+COUNTRY_ALIASES = {
+    'United States of America': 'United States',
+    'United Kingdom of Great Britain and Northern Ireland': 'United Kingdom',
+    'Russian Federation': 'Russia',
+    'Republic of North Macedonia': 'North Macedonia',
+    'United Republic of Tanzania': 'Tanzania',
+    'Tanzania, United Rep. of': 'Tanzania',
+    'Republic of Korea': 'South Korea',
+    'Korea, Rep. of': 'South Korea',
+    "Democratic People's Republic of Korea": 'North Korea',
+    "Korea, Dem. People's Rep. of": 'North Korea',
+    'Congo, Dem. Rep. of the': 'Democratic Republic of the Congo',
+    'Congo, Rep. of': 'Congo',
+    'China, P.R.: Mainland': 'China',
+    'China, P.R.: Hong Kong': 'Hong Kong',
+    'China, P.R.: Macao': 'Macao',
+    'Czech Rep.': 'Czechia',
+    'Slovak Rep.': 'Slovakia',
+    'Kyrgyz Rep.': 'Kyrgyzstan',
+    'Central African Rep.': 'Central African Republic',
+    'Dominican Rep.': 'Dominican Republic',
+    'Syrian Arab Rep.': 'Syrian Arab Republic',
+    "Lao People's Dem. Rep.": "Lao People's Democratic Republic",
+    'Türkiye, Rep. of': 'Turkey',
+    'Türkiye': 'Turkey',
+    'Viet Nam': 'Vietnam',
+    'Kingdom of Eswatini': 'Eswatini',
+    'Republic of Moldova': 'Moldova',
+    'State of Palestine': 'West Bank and Gaza',
+    'Guiana, French': 'French Guiana',
+    'St. Kitts and Nevis': 'Saint Kitts and Nevis',
+    'St. Lucia': 'Saint Lucia',
+    'St. Vincent and the Grenadines': 'Saint Vincent and the Grenadines',
+    'Micronesia, Federated States of': 'Micronesia',
+    'Venezuela, Rep. Bolivariana de': 'Venezuela',
+}
+
+# ISO 3166-1 alpha-2 / alpha-3 codes by canonical name, as the IMF datasets
+# code them (so any cleaned table joins them on ISO3); the withdrawn codes of
+# Netherlands Antilles and Serbia and Montenegro are kept for their history
+COUNTRY_ISO_CODES = {
+    'Afghanistan': ('AF', 'AFG'),
+    'Albania': ('AL', 'ALB'),
+    'Algeria': ('DZ', 'DZA'),
+    'American Samoa': ('AS', 'ASM'),
+    'Andorra': ('AD', 'AND'),
+    'Angola': ('AO', 'AGO'),
+    'Anguilla': ('AI', 'AIA'),
+    'Antigua and Barbuda': ('AG', 'ATG'),
+    'Argentina': ('AR', 'ARG'),
+    'Armenia': ('AM', 'ARM'),
+    'Aruba': ('AW', 'ABW'),
+    'Australia': ('AU', 'AUS'),
+    'Austria': ('AT', 'AUT'),
+    'Azerbaijan': ('AZ', 'AZE'),
+    'Bahamas': ('BS', 'BHS'),
+    'Bahrain': ('BH', 'BHR'),
+    'Bangladesh': ('BD', 'BGD'),
+    'Barbados': ('BB', 'BRB'),
+    'Belarus': ('BY', 'BLR'),
+    'Belgium': ('BE', 'BEL'),
+    'Belize': ('BZ', 'BLZ'),
+    'Benin': ('BJ', 'BEN'),
+    'Bermuda': ('BM', 'BMU'),
+    'Bhutan': ('BT', 'BTN'),
+    'Bolivia': ('BO', 'BOL'),
+    'Bosnia and Herzegovina': ('BA', 'BIH'),
+    'Botswana': ('BW', 'BWA'),
+    'Brazil': ('BR', 'BRA'),
+    'British Virgin Islands': ('VG', 'VGB'),
+    'Brunei Darussalam': ('BN', 'BRN'),
+    'Bulgaria': ('BG', 'BGR'),
+    'Burkina Faso': ('BF', 'BFA'),
+    'Burundi': ('BI', 'BDI'),
+    'Cabo Verde': ('CV', 'CPV'),
+    'Cambodia': ('KH', 'KHM'),
+    'Cameroon': ('CM', 'CMR'),
+    'Canada': ('CA', 'CAN'),
+    'Cayman Islands': ('KY', 'CYM'),
+    'Central African Republic': ('CF', 'CAF'),
+    'Chad': ('TD', 'TCD'),
+    'Chile': ('CL', 'CHL'),
+    'China': ('CN', 'CHN'),
+    'Colombia': ('CO', 'COL'),
+    'Comoros': ('KM', 'COM'),
+    'Congo': ('CG', 'COG'),
+    'Cook Islands': ('CK', 'COK'),
+    'Costa Rica': ('CR', 'CRI'),
+    'Croatia': ('HR', 'HRV'),
+    'Cuba': ('CU', 'CUB'),
+    'Cyprus': ('CY', 'CYP'),
+    'Czechia': ('CZ', 'CZE'),
+    "Côte d'Ivoire": ('CI', 'CIV'),
+    'Democratic Republic of the Congo': ('CD', 'COD'),
+    'Denmark': ('DK', 'DNK'),
+    'Djibouti': ('DJ', 'DJI'),
+    'Dominica': ('DM', 'DMA'),
+    'Dominican Republic': ('DO', 'DOM'),
+    'Ecuador': ('EC', 'ECU'),
+    'Egypt': ('EG', 'EGY'),
+    'El Salvador': ('SV', 'SLV'),
+    'Equatorial Guinea': ('GQ', 'GNQ'),
+    'Eritrea': ('ER', 'ERI'),
+    'Estonia': ('EE', 'EST'),
+    'Eswatini': ('SZ', 'SWZ'),
+    'Ethiopia': ('ET', 'ETH'),
+    'Faroe Islands': ('FO', 'FRO'),
+    'Fiji': ('FJ', 'FJI'),
+    'Finland': ('FI', 'FIN'),
+    'France': ('FR', 'FRA'),
+    'French Guiana': ('GF', 'GUF'),
+    'French Polynesia': ('PF', 'PYF'),
+    'Gabon': ('GA', 'GAB'),
+    'Gambia': ('GM', 'GMB'),
+    'Georgia': ('GE', 'GEO'),
+    'Germany': ('DE', 'DEU'),
+    'Ghana': ('GH', 'GHA'),
+    'Greece': ('GR', 'GRC'),
+    'Greenland': ('GL', 'GRL'),
+    'Grenada': ('GD', 'GRD'),
+    'Guadeloupe': ('GP', 'GLP'),
+    'Guam': ('GU', 'GUM'),
+    'Guatemala': ('GT', 'GTM'),
+    'Guinea': ('GN', 'GIN'),
+    'Guinea-Bissau': ('GW', 'GNB'),
+    'Guyana': ('GY', 'GUY'),
+    'Haiti': ('HT', 'HTI'),
+    'Honduras': ('HN', 'HND'),
+    'Hong Kong': ('HK', 'HKG'),
+    'Hungary': ('HU', 'HUN'),
+    'Iceland': ('IS', 'ISL'),
+    'India': ('IN', 'IND'),
+    'Indonesia': ('ID', 'IDN'),
+    'Iran': ('IR', 'IRN'),
+    'Iraq': ('IQ', 'IRQ'),
+    'Ireland': ('IE', 'IRL'),
+    'Isle of Man': ('IM', 'IMN'),
+    'Israel': ('IL', 'ISR'),
+    'Italy': ('IT', 'ITA'),
+    'Jamaica': ('JM', 'JAM'),
+    'Japan': ('JP', 'JPN'),
+    'Jordan': ('JO', 'JOR'),
+    'Kazakhstan': ('KZ', 'KAZ'),
+    'Kenya': ('KE', 'KEN'),
+    'Kiribati': ('KI', 'KIR'),
+    'Kuwait': ('KW', 'KWT'),
+    'Kyrgyzstan': ('KG', 'KGZ'),
+    "Lao People's Democratic Republic": ('LA', 'LAO'),
+    'Latvia': ('LV', 'LVA'),
+    'Lebanon': ('LB', 'LBN'),
+    'Lesotho': ('LS', 'LSO'),
+    'Liberia': ('LR', 'LBR'),
+    'Libya': ('LY', 'LBY'),
+    'Liechtenstein': ('LI', 'LIE'),
+    'Lithuania': ('LT', 'LTU'),
+    'Luxembourg': ('LU', 'LUX'),
+    'Macao': ('MO', 'MAC'),
+    'Madagascar': ('MG', 'MDG'),
+    'Malawi': ('MW', 'MWI'),
+    'Malaysia': ('MY', 'MYS'),
+    'Maldives': ('MV', 'MDV'),
+    'Mali': ('ML', 'MLI'),
+    'Malta': ('MT', 'MLT'),
+    'Marshall Islands': ('MH', 'MHL'),
+    'Martinique': ('MQ', 'MTQ'),
+    'Mauritania': ('MR', 'MRT'),
+    'Mauritius': ('MU', 'MUS'),
+    'Mayotte': ('YT', 'MYT'),
+    'Mexico': ('MX', 'MEX'),
+    'Micronesia': ('FM', 'FSM'),
+    'Moldova': ('MD', 'MDA'),
+    'Monaco': ('MC', 'MCO'),
+    'Mongolia': ('MN', 'MNG'),
+    'Montenegro': ('ME', 'MNE'),
+    'Montserrat': ('MS', 'MSR'),
+    'Morocco': ('MA', 'MAR'),
+    'Mozambique': ('MZ', 'MOZ'),
+    'Myanmar': ('MM', 'MMR'),
+    'Namibia': ('NA', 'NAM'),
+    'Nepal': ('NP', 'NPL'),
+    'Netherlands': ('NL', 'NLD'),
+    'Netherlands Antilles': ('AN', 'ANT'),
+    'New Caledonia': ('NC', 'NCL'),
+    'New Zealand': ('NZ', 'NZL'),
+    'Nicaragua': ('NI', 'NIC'),
+    'Niger': ('NE', 'NER'),
+    'Nigeria': ('NG', 'NGA'),
+    'Niue': ('NU', 'NIU'),
+    'Norfolk Island': ('NF', 'NFK'),
+    'North Korea': ('KP', 'PRK'),
+    'North Macedonia': ('MK', 'MKD'),
+    'Northern Mariana Islands': ('MP', 'MNP'),
+    'Norway': ('NO', 'NOR'),
+    'Oman': ('OM', 'OMN'),
+    'Pakistan': ('PK', 'PAK'),
+    'Palau': ('PW', 'PLW'),
+    'Panama': ('PA', 'PAN'),
+    'Papua New Guinea': ('PG', 'PNG'),
+    'Paraguay': ('PY', 'PRY'),
+    'Peru': ('PE', 'PER'),
+    'Philippines': ('PH', 'PHL'),
+    'Pitcairn Islands': ('PN', 'PCN'),
+    'Poland': ('PL', 'POL'),
+    'Portugal': ('PT', 'PRT'),
+    'Puerto Rico': ('PR', 'PRI'),
+    'Qatar': ('QA', 'QAT'),
+    'Romania': ('RO', 'ROU'),
+    'Russia': ('RU', 'RUS'),
+    'Rwanda': ('RW', 'RWA'),
+    'Réunion': ('RE', 'REU'),
+    'Saint Helena': ('SH', 'SHN'),
+    'Saint Kitts and Nevis': ('KN', 'KNA'),
+    'Saint Lucia': ('LC', 'LCA'),
+    'Saint Pierre and Miquelon': ('PM', 'SPM'),
+    'Saint Vincent and the Grenadines': ('VC', 'VCT'),
+    'Samoa': ('WS', 'WSM'),
+    'San Marino': ('SM', 'SMR'),
+    'Saudi Arabia': ('SA', 'SAU'),
+    'Senegal': ('SN', 'SEN'),
+    'Serbia': ('RS', 'SRB'),
+    'Serbia and Montenegro': ('CS', 'SCG'),
+    'Seychelles': ('SC', 'SYC'),
+    'Sierra Leone': ('SL', 'SLE'),
+    'Singapore': ('SG', 'SGP'),
+    'Slovakia': ('SK', 'SVK'),
+    'Slovenia': ('SI', 'SVN'),
+    'Solomon Islands': ('SB', 'SLB'),
+    'Somalia': ('SO', 'SOM'),
+    'South Africa': ('ZA', 'ZAF'),
+    'South Korea': ('KR', 'KOR'),
+    'South Sudan': ('SS', 'SSD'),
+    'Spain': ('ES', 'ESP'),
+    'Sri Lanka': ('LK', 'LKA'),
+    'Sudan': ('SD', 'SDN'),
+    'Suriname': ('SR', 'SUR'),
+    'Sweden': ('SE', 'SWE'),
+    'Switzerland': ('CH', 'CHE'),
+    'Syrian Arab Republic': ('SY', 'SYR'),
+    'São Tomé and Príncipe': ('ST', 'STP'),
+    'Tajikistan': ('TJ', 'TJK'),
+    'Tanzania': ('TZ', 'TZA'),
+    'Thailand': ('TH', 'THA'),
+    'Timor-Leste': ('TL', 'TLS'),
+    'Togo': ('TG', 'TGO'),
+    'Tonga': ('TO', 'TON'),
+    'Trinidad and Tobago': ('TT', 'TTO'),
+    'Tunisia': ('TN', 'TUN'),
+    'Turkey': ('TR', 'TUR'),
+    'Turkmenistan': ('TM', 'TKM'),
+    'Turks and Caicos Islands': ('TC', 'TCA'),
+    'Tuvalu': ('TV', 'TUV'),
+    'Uganda': ('UG', 'UGA'),
+    'Ukraine': ('UA', 'UKR'),
+    'United Arab Emirates': ('AE', 'ARE'),
+    'United Kingdom': ('GB', 'GBR'),
+    'United States': ('US', 'USA'),
+    'United States Virgin Islands': ('VI', 'VIR'),
+    'Uruguay': ('UY', 'URY'),
+    'Uzbekistan': ('UZ', 'UZB'),
+    'Vanuatu': ('VU', 'VUT'),
+    'Venezuela': ('VE', 'VEN'),
+    'Vietnam': ('VN', 'VNM'),
+    'Wallis and Futuna Islands': ('WF', 'WLF'),
+    'West Bank and Gaza': ('PS', 'PSE'),
+    'Western Sahara': ('EH', 'ESH'),
+    'Yemen': ('YE', 'YEM'),
+    'Zambia': ('ZM', 'ZMB'),
+    'Zimbabwe': ('ZW', 'ZWE'),
+}
+
+# Formal suffixes, in one alternation: "Armenia, Rep. of", "Bahamas, The",
+# "Iran (Islamic Republic of)", "Egypt, Arab Rep. of", "Comoros, Union of the" ...
+FORMAL_SUFFIX_PATTERN = re.compile(
+    r"""(?:
+        ,\s(?:The\s)?(?:Federal\s)?(?:Arab\s|Islamic\s|United\s|People's\s|Dem\.\s|Democratic\s)*
+            (?:Rep\.|Republic|Kingdom|Principality|Union|State|Fed\.\sSts\.)(?:\sof(?:\sthe)?)?.*
+      | ,\s(?:The|Fed\.\sSts\.)
+      | \s\((?:Plurinational\sState|Bolivarian\sRepublic|Islamic\sRepublic|Republic)\sof\)
+    )$""",
+    re.VERBOSE,
+)
+
+
+def normalize_country_name(name):
+    """Canonical spelling of one country name"""
+    name = name.strip()
+    if name in COUNTRY_ALIASES:
+        return COUNTRY_ALIASES[name]
+    stripped = FORMAL_SUFFIX_PATTERN.sub('', name)
+    return COUNTRY_ALIASES.get(stripped, stripped)
+
+
+def normalize_country_names(names):
+    """
+    Canonical spelling for a whole column, computed once per distinct name.
+    Missing values stay missing.
+    """
+    codes, uniques = pd.factorize(names)
+    canonical = np.array([normalize_country_name(str(name)) for name in uniques] + [np.nan], dtype=object)
+    return pd.Series(canonical[codes], index=names.index, name=names.name)
+
+
+def iso_lookup(names=None):
+    """
+    Canonical name -> ISO2 / ISO3 table from COUNTRY_ISO_CODES, one row per
+    name (only the given canonical names, when names is set)
+    """
+    lookup = pd.DataFrame.from_dict(COUNTRY_ISO_CODES, orient='index', columns=['ISO2', 'ISO3'])
+    lookup.index.name = 'Country'
+    if names is not None:
+        lookup = lookup[lookup.index.isin(names)]
+    return lookup
+
+
+def attach_iso_codes(df, lookup=None, country_col='country_name'):
+    """
+    Add ISO2 / ISO3 columns (missing for names not in the lookup, by default
+    the whole COUNTRY_ISO_CODES table) to a dataset keyed only by normalized
+    country name, so it can be joined on ISO3 with the IMF datasets
+    """
+    if lookup is None:
+        lookup = iso_lookup()
+    iso = lookup.reindex(df[country_col].to_numpy())
+    result = df.copy()
+    for col in lookup.columns:
+        result[col] = iso[col].to_numpy()
+    return result
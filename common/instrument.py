@@ -0,0 +1,342 @@
+"""
+Stage-level run metrics for the preprocessing scripts.
+
+A RunReport times the named stages of one script invocation (read,
+normalize, melt, pivot, groupby, write, ...) and records for each stage
+the wall time, rows in and out, the process RSS and, when memory tracing
+is on, the tracemalloc peak of the stage. Any stage can be run under
+cProfile. The report is written as JSON when the run ends:
+
+    report = RunReport.from_args('forest_carbon', args)
+    with report:
+        with stage('read') as s:
+            df = pd.read_csv(path)
+            s.rows_out = len(df)
+
+    @instrumented('melt')
+    def to_long(df): ...
+
+stage() and @instrumented record into the innermost active report and do
+nothing but time the block when no report is active. Pool workers open
+a worker_report, which inherits the parent's memory tracing and profiling
+settings through the environment, and send its stages back to the parent
+(add_stages).
+"""
+import cProfile
+import datetime
+import functools
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'run_reports')
+PROFILE_TOP = 15
+# Settings of the active report, inherited by pool worker processes
+WORKER_ENV = 'RUN_REPORT_SETTINGS'
+
+_active_reports = []
+
+
+def rows_of(obj):
+    """Row count of a frame, array or sized collection (first item of a tuple); None when unknown"""
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    if isinstance(obj, (bool, np.bool_)):
+        return None
+    if isinstance(obj, (int, np.integer)):
+        return int(obj)
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray, list)):
+        return len(obj)
+    return None
+
+
+def current_rss_mb():
+    """Resident set size of this process now (Linux), else its peak so far"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return max_rss_mb()
+
+
+def max_rss_mb():
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class Stage:
+    """Measurements of one stage; rows_out can be set inside the with block"""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        self.record = None
+
+
+class RunReport:
+    """
+    Stage records of one script run, written as JSON on exit.
+    trace_memory turns on tracemalloc for the run; profile is a collection
+    of stage names to run under cProfile ('*' for every stage).
+    """
+
+    def __init__(self, name, path=None, trace_memory=False, profile=None, report_dir=DEFAULT_REPORT_DIR):
+        self.name = name
+        self.started_at = datetime.datetime.now()
+        stamp = self.started_at.strftime('%Y%m%dT%H%M%S')
+        # Without a path or report_dir (e.g. a pool worker's report) nothing is written
+        self.path = path or (os.path.join(report_dir, f"{name}.{stamp}.json") if report_dir else None)
+        # Stage profiles are written as <profile_base>.<stage>.prof
+        self.profile_base = os.path.splitext(self.path)[0] if self.path else None
+        self.trace_memory = trace_memory
+        self.profile = set(profile) if profile is not None else set()
+        self.stages = []
+        self.extra = {}
+        self._open = []
+        self._profiling = False
+        self._started_tracing = False
+        self._saved_env = None
+        self._start = None
+
+    @classmethod
+    def from_args(cls, name, args):
+        """Report configured by the options of add_report_arguments"""
+        profile = None if args.profile is None else (args.profile or ['*'])
+        return cls(name, path=args.report, trace_memory=args.trace_memory, profile=profile)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._saved_env = os.environ.get(WORKER_ENV)
+        os.environ[WORKER_ENV] = json.dumps({
+            'trace_memory': self.trace_memory,
+            'profile': sorted(self.profile),
+            'profile_base': self.profile_base,
+        })
+        _active_reports.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active_reports.remove(self)
+        if self._saved_env is None:
+            os.environ.pop(WORKER_ENV, None)
+        else:
+            os.environ[WORKER_ENV] = self._saved_env
+        self.wall_seconds = time.perf_counter() - self._start
+        if exc_type is not None and not issubclass(exc_type, SystemExit):
+            self.extra['error'] = f"{exc_type.__name__}: {exc}"
+        if self.path:
+            self.save()
+            self.print_summary()
+        if self._started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def stage(self, name, rows_in=None):
+        return _StageContext(self, Stage(name, rows_in))
+
+    def add_stages(self, stages, prefix=None):
+        """Merge stage records produced elsewhere (e.g. by a pool worker's report)"""
+        for record in stages:
+            record = dict(record)
+            if prefix:
+                record['stage'] = f"{prefix}/{record['stage']}"
+            self.stages.append(record)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'wall_seconds': round(getattr(self, 'wall_seconds', time.perf_counter() - self._start), 6),
+            'max_rss_mb': max_rss_mb(),
+            'trace_memory': self.trace_memory,
+            **self.extra,
+            'stages': self.stages,
+        }
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+        return path
+
+    def print_summary(self):
+        print(f"\n{'Stage':<55} {'Seconds':>9} {'Rows in':>10} {'Rows out':>10} {'Peak MB':>9}")
+        for record in self.stages:
+            peak = record.get('traced_peak_mb')
+            print(f"{fit_label(record['stage'], 55):<55} {record['seconds']:>9.3f} "
+                  f"{'' if record['rows_in'] is None else record['rows_in']:>10} "
+                  f"{'' if record['rows_out'] is None else record['rows_out']:>10} "
+                  f"{'' if peak is None else f'{peak:.1f}':>9}")
+        print(f"Run took {self.wall_seconds:.3f}s; report saved as: {self.path}")
+
+
+class _StageContext:
+    def __init__(self, report, stage):
+        self.report = report
+        self.stage = stage
+
+    def __enter__(self):
+        report = self.report
+        self.parent = report._open[-1] if report and report._open else None
+        if report is not None:
+            report._open.append(self)
+
+        self.tracing = report is not None and tracemalloc.is_tracing()
+        self.running_peak = 0
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.running_peak = max(self.parent.running_peak, peak)
+            tracemalloc.reset_peak()
+            self.traced_start = current
+
+        self.profiler = None
+        if report is not None and not report._profiling and \
+                ('*' in report.profile or self.stage.name in report.profile):
+            self.profiler = cProfile.Profile()
+            report._profiling = True
+            self.profiler.enable()
+
+        self.start = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        stage = self.stage
+        stage.seconds = time.perf_counter() - self.start
+        report = self.report
+        if report is None:
+            return False
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            report._profiling = False
+
+        record = {
+            'stage': stage.name,
+            'seconds': round(stage.seconds, 6),
+            'rows_in': stage.rows_in,
+            'rows_out': stage.rows_out,
+            'rss_mb': current_rss_mb(),
+        }
+        if self.tracing:
+            peak = max(self.running_peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_mb'] = round((peak - self.traced_start) / 2 ** 20, 3)
+            if self.parent is not None:
+                self.parent.running_peak = max(self.parent.running_peak, peak)
+        if self.profiler is not None:
+            record['profile'] = self._profile_summary(report)
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc}"
+        stage.record = record
+
+        report._open.remove(self)
+        report.stages.append(record)
+        return False
+
+    def _profile_summary(self, report):
+        """Dump the stage's profile next to the report and keep its top functions"""
+        prof_path = f"{report.profile_base or stage_slug(report.name)}.{stage_slug(self.stage.name)}.prof"
+        os.makedirs(os.path.dirname(os.path.abspath(prof_path)), exist_ok=True)
+        self.profiler.dump_stats(prof_path)
+
+        stats = pstats.Stats(self.profiler, stream=io.StringIO()).sort_stats('cumulative')
+        top = []
+        for func in stats.fcn_list[:PROFILE_TOP]:
+            primitive_calls, calls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, function = func
+            top.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'tottime': round(tottime, 6),
+                'cumtime': round(cumtime, 6),
+            })
+        return {'file': prof_path, 'top': top}
+
+
+def fit_label(label, width):
+    """Label cut to width from the left, so the stage name at its end stays readable"""
+    return label if len(label) <= width else '...' + label[-(width - 3):]
+
+
+def stage_slug(name):
+    return ''.join(ch if ch.isalnum() else '_' for ch in name.lower()).strip('_')
+
+
+def active_report():
+    return _active_reports[-1] if _active_reports else None
+
+
+def worker_report(name):
+    """
+    Unsaved report for one job of a pool, with the tracing and profiling
+    settings of the report active in the parent process; its stages are
+    merged back with RunReport.add_stages
+    """
+    settings = json.loads(os.environ.get(WORKER_ENV) or '{}')
+    report = RunReport(name, report_dir=None, trace_memory=settings.get('trace_memory', False),
+                       profile=settings.get('profile'))
+    if settings.get('profile_base'):
+        report.profile_base = f"{settings['profile_base']}.{stage_slug(name)}"
+    return report
+
+
+def stage(name, rows_in=None):
+    """Context manager recording a stage into the innermost active report"""
+    return _StageContext(active_report(), Stage(name, rows_in))
+
+
+def instrumented(name=None):
+    """
+    Decorator running the function as a stage; rows in and out are taken
+    from the first argument and the return value when they have a length
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, rows_of(args[0]) if args else None) as s:
+                result = func(*args, **kwargs)
+                s.rows_out = rows_of(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def add_report_arguments(parser):
+    """The --report, --trace-memory and --profile options shared by the scripts"""
+    group = parser.add_argument_group('run report')
+    group.add_argument('--report', default=None,
+                       help="Where the JSON run report is written (default: run_reports/<script>.<time>.json)")
+    group.add_argument('--trace-memory', action='store_true',
+                       help="Record each stage's peak Python memory with tracemalloc (slower)")
+    group.add_argument('--profile', nargs='*', default=None, metavar='STAGE',
+                       help="Run these stages (all stages if none are named) under cProfile")
+    return parser
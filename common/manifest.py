@@ -0,0 +1,125 @@
+"""
+Content-hash build manifest for incremental reprocessing.
+
+Each pipeline step is recorded as its input file hashes, the hash of the
+script that produced it, its parameters and the output files it wrote.
+A step is current when all of those still match, so re-running a script
+after nothing changed costs a few stat() calls instead of a full rebuild.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+MANIFEST_FILENAME = '.build_manifest.json'
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def module_file(dependency):
+    """Source file of a dependency given as a file path or an importable module name"""
+    if dependency.endswith('.py'):
+        return dependency
+    module = sys.modules.get(dependency)
+    if module is not None:
+        return module.__file__
+    return importlib.util.find_spec(dependency).origin
+
+
+def script_version(script_path, dependencies=()):
+    """
+    A script's version is the hash of its source and of the repo modules it
+    imports (module names such as 'common.store', or file paths), so an
+    edit to any of them forces a rebuild
+    """
+    if not dependencies:
+        return file_sha256(script_path)[:16]
+    digest = hashlib.sha256(file_sha256(script_path).encode())
+    for path in sorted(os.path.abspath(module_file(dependency)) for dependency in dependencies):
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()[:16]
+
+
+class BuildManifest:
+    """
+    JSON manifest mapping step name -> inputs, version, params and outputs.
+    Paths are stored relative to the manifest's directory.
+    """
+
+    def __init__(self, path=MANIFEST_FILENAME):
+        self.path = os.path.abspath(path)
+        self.base_dir = os.path.dirname(self.path)
+        self.steps = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.steps = json.load(f)
+
+    def _key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.base_dir)
+
+    def _fingerprint(self, path, previous=None):
+        """Size, mtime and hash of a file; the hash is reused while size and mtime are unchanged"""
+        stat = os.stat(path)
+        if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            return previous
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+
+    def is_current(self, step, inputs, version, params=None):
+        """True when the step's inputs, version and params match and its outputs are intact"""
+        entry = self.steps.get(step)
+        if entry is None:
+            return False
+        if entry['version'] != version or entry['params'] != (params or {}):
+            return False
+        if sorted(entry['inputs']) != sorted(self._key(path) for path in inputs):
+            return False
+
+        for path in inputs:
+            if not os.path.exists(path):
+                return False
+            recorded = entry['inputs'][self._key(path)]
+            fingerprint = self._fingerprint(path, recorded)
+            if fingerprint['sha256'] != recorded['sha256']:
+                return False
+            # Touched but identical: remember the new mtime so the next check skips hashing
+            entry['inputs'][self._key(path)] = fingerprint
+
+        for key, recorded in entry['outputs'].items():
+            path = os.path.join(self.base_dir, key)
+            if not os.path.exists(path):
+                return False
+            stat = os.stat(path)
+            if stat.st_size != recorded['size'] or stat.st_mtime_ns != recorded['mtime_ns']:
+                return False
+
+        return True
+
+    def record(self, step, inputs, outputs, version, params=None):
+        """Store the state of a step that has just been rebuilt"""
+        previous = self.steps.get(step, {}).get('inputs', {})
+        self.steps[step] = {
+            'version': version,
+            'params': params or {},
+            'inputs': {
+                self._key(path): self._fingerprint(path, previous.get(self._key(path)))
+                for path in inputs
+            },
+            'outputs': {
+                self._key(path): self._fingerprint(path)
+                for path in outputs
+            },
+        }
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.steps, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
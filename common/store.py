@@ -0,0 +1,313 @@
+"""
+Local columnar store shared by the preprocessing scripts.
+
+Cleaned tables are kept under one directory, keyed as round/theme/table
+(e.g. "round2/emissions/forest_carbon"). Tables are written as Parquet
+when pyarrow is installed, so reads are column-pruned and memory-mapped
+instead of re-parsing CSV text; a table can also be split into one
+directory per value of a column (hive partitioning, e.g. Indicator=...),
+so a filter on that column only opens the matching files (rows then come
+back grouped by partition). Without pyarrow the store falls back to pandas
+pickles, with the same API.
+
+CSV stays the hand-off format for the .pbix dashboards: export_csv writes
+any stored table back out.
+
+    python -m common.store list
+    python -m common.store export round2/emissions/forest_carbon out.csv
+"""
+import argparse
+import json
+import operator
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    STORE_FORMAT = 'parquet'
+except ImportError:
+    STORE_FORMAT = 'pkl'
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datastore')
+SCHEMA_FILENAME = '_schema.json'
+
+FILTER_OPS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+
+def compact_dtypes(df, max_category_ratio=0.5):
+    """
+    Typed copy of a frame for storage: repeated strings become categoricals
+    (stored as dictionary-encoded columns). Numeric columns keep their dtype
+    so stored values round-trip exactly.
+    """
+    result = df.copy()
+    for col in result.columns:
+        series = result[col]
+        if not len(series) or not pd.api.types.is_string_dtype(series.dtype):
+            continue
+        if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+            continue
+        if series.nunique(dropna=True) <= max_category_ratio * len(series):
+            result[col] = series.astype('category')
+    return result
+
+
+def apply_filters(df, filters):
+    """pyarrow-style filters ([(column, op, value), ...], all must hold) on a pandas frame"""
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters or []:
+        if op == 'in':
+            mask &= df[col].isin(value).to_numpy()
+        elif op == 'not in':
+            mask &= ~df[col].isin(value).to_numpy()
+        else:
+            mask &= FILTER_OPS[op](df[col], value).to_numpy(dtype=bool)
+    return df[mask]
+
+
+class DataStore:
+    """Directory of typed tables, one Parquet file (or partitioned directory) per key"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, key):
+        if STORE_FORMAT == 'parquet':
+            return os.path.join(self.root, *key.split('/'))
+        return os.path.join(self.root, *key.split('/')) + '.pkl'
+
+    def _file_for(self, key):
+        """The single-file location of an unpartitioned Parquet table"""
+        return self.path_for(key) + '.parquet'
+
+    def exists(self, key):
+        if STORE_FORMAT == 'parquet':
+            return os.path.isdir(self.path_for(key)) or os.path.exists(self._file_for(key))
+        return os.path.exists(self.path_for(key))
+
+    def write(self, df, key, partition_by=None, compact=True):
+        """
+        Store a frame under key, replacing any previous version.
+        partition_by names a column to split the table on; the new version is
+        written next to the old one and swapped in when complete.
+        """
+        if compact:
+            df = compact_dtypes(df)
+        partition_cols = [partition_by] if isinstance(partition_by, str) else list(partition_by or [])
+
+        if STORE_FORMAT == 'parquet':
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            target = self.path_for(key) if partition_cols else self._file_for(key)
+            staging = target + '.tmp'
+            self._remove(staging)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if partition_cols:
+                pq.write_to_dataset(table, staging, partition_cols=partition_cols)
+                # Directory names carry no type, so the partition key types are kept with the table
+                key_types = {col: table.schema.field(col).type for col in partition_cols}
+                with open(os.path.join(staging, SCHEMA_FILENAME), 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'partition_by': partition_cols,
+                        'columns': list(df.columns),
+                        'partition_types': {col: str(getattr(key_type, 'value_type', key_type))
+                                            for col, key_type in key_types.items()},
+                        'categorical': [col for col, key_type in key_types.items()
+                                        if pa.types.is_dictionary(key_type)],
+                    }, f)
+            else:
+                pq.write_table(table, staging)
+            self.drop(key)
+            os.replace(staging, target)
+        else:
+            target = self.path_for(key)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            df.to_pickle(target + '.tmp')
+            os.replace(target + '.tmp', target)
+
+        print(f"Stored {len(df)} rows as {key}")
+        return key
+
+    def write_csv(self, csv_path, key, partition_by=None, chunksize=None, **read_csv_kwargs):
+        """
+        Load a CSV written by a cleaner into the store. With chunksize, the
+        file is appended one chunk at a time so it never has to fit in memory
+        (unpartitioned Parquet only; other layouts read the whole file).
+        Chunked loads pick the categorical columns from the first chunk and
+        keep them for the rest of the file, with 32-bit dictionary indices
+        since later chunks may bring new categories.
+        """
+        if not chunksize or partition_by or STORE_FORMAT != 'parquet':
+            return self.write(pd.read_csv(csv_path, **read_csv_kwargs), key, partition_by)
+
+        target = self._file_for(key)
+        staging = target + '.tmp'
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        writer = None
+        categorical = None
+        rows = 0
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, **read_csv_kwargs):
+                if categorical is None:
+                    categorical = [col for col, dtype in compact_dtypes(chunk).dtypes.items()
+                                   if isinstance(dtype, pd.CategoricalDtype)]
+                chunk = chunk.astype({col: 'category' for col in categorical})
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    for col in categorical:
+                        i = schema.get_field_index(col)
+                        schema = schema.set(i, schema.field(i).with_type(
+                            pa.dictionary(pa.int32(), schema.field(i).type.value_type)))
+                    writer = pq.ParquetWriter(staging, schema)
+                writer.write_table(table.cast(writer.schema))
+                rows += len(chunk)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # A column changed type after the first chunk (e.g. all-empty, then text)
+            rows = None
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None or rows is None:
+            self._remove(staging)
+            return self.write(pd.read_csv(csv_path, **read_csv_kwargs), key)
+        self.drop(key)
+        os.replace(staging, target)
+        print(f"Stored {rows} rows as {key}")
+        return key
+
+    def read(self, key, columns=None, filters=None):
+        """
+        Load a stored table. columns prunes what is read from disk; filters
+        ([(column, op, value), ...]) skips non-matching partitions and rows.
+        """
+        if not self.exists(key):
+            raise KeyError(f"No table {key!r} in {self.root}")
+
+        if STORE_FORMAT == 'parquet':
+            path = self.path_for(key) if os.path.isdir(self.path_for(key)) else self._file_for(key)
+            if not os.path.isdir(path):
+                return pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+
+            layout = self._layout(path)
+            df = pq.read_table(path, columns=columns, filters=filters, memory_map=True,
+                               partitioning=self._partitioning(layout)).to_pandas()
+            for col in layout.get('categorical', []):
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
+            # Partition columns come back last; restore the order the table was written in
+            return df[layout['columns']] if columns is None else df
+
+        df = apply_filters(pd.read_pickle(self.path_for(key)), filters)
+        return df[columns] if columns is not None else df
+
+    def schema(self, key):
+        """Column name -> stored type"""
+        if STORE_FORMAT == 'parquet':
+            path = self.path_for(key) if os.path.isdir(self.path_for(key)) else self._file_for(key)
+            if os.path.isdir(path):
+                partitioning = self._partitioning(self._layout(path))
+                arrow_schema = ds.dataset(path, format='parquet', partitioning=partitioning).schema
+            else:
+                arrow_schema = pq.read_schema(path)
+            return {field.name: str(field.type) for field in arrow_schema if field.name != '__index_level_0__'}
+        return {col: str(dtype) for col, dtype in pd.read_pickle(self.path_for(key)).dtypes.items()}
+
+    @staticmethod
+    def _layout(path):
+        """The _schema.json of a partitioned table"""
+        with open(os.path.join(path, SCHEMA_FILENAME), encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _partitioning(layout):
+        """
+        Hive partitioning with the key types the table was written with.
+        Inferred keys are dictionary-typed, and pyarrow cannot unify those
+        when a key is missing (__HIVE_DEFAULT_PARTITION__) in some files.
+        """
+        if 'partition_types' not in layout:
+            return 'hive'
+        return ds.partitioning(pa.schema([(col, pa.type_for_alias(layout['partition_types'][col]))
+                                          for col in layout['partition_by']]), flavor='hive')
+
+    def files(self, key):
+        """The files a stored table is kept in, e.g. as build-manifest inputs"""
+        if not self.exists(key):
+            raise KeyError(f"No table {key!r} in {self.root}")
+        if STORE_FORMAT != 'parquet':
+            return [self.path_for(key)]
+        if not os.path.isdir(self.path_for(key)):
+            return [self._file_for(key)]
+        return sorted(os.path.join(directory, name) for directory, _, names in os.walk(self.path_for(key))
+                      for name in names)
+
+    def tables(self):
+        """All stored keys, sorted"""
+        keys = []
+        for directory, subdirs, files in os.walk(self.root):
+            relative = os.path.relpath(directory, self.root)
+            if SCHEMA_FILENAME in files:
+                keys.append(relative.replace(os.sep, '/'))
+                subdirs.clear()
+                continue
+            subdirs[:] = [d for d in subdirs if not d.endswith('.tmp')]
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                if ext in ('.parquet', '.pkl'):
+                    keys.append(os.path.normpath(os.path.join(relative, stem)).replace(os.sep, '/'))
+        return sorted(keys)
+
+    def export_csv(self, key, csv_path, columns=None, filters=None):
+        """Write a stored table out as CSV, e.g. for a Power BI refresh"""
+        df = self.read(key, columns, filters)
+        df.to_csv(csv_path, index=False)
+        print(f"Exported {key} ({len(df)} rows) to {csv_path}")
+        return csv_path
+
+    def drop(self, key):
+        if STORE_FORMAT == 'parquet':
+            self._remove(self.path_for(key))
+            self._remove(self._file_for(key))
+        else:
+            self._remove(self.path_for(key))
+
+    @staticmethod
+    def _remove(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and export the shared columnar store")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Store directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List stored tables with their schemas")
+    export = commands.add_parser('export', help="Write a stored table as CSV")
+    export.add_argument('key')
+    export.add_argument('csv_path')
+    export.add_argument('--columns', nargs='+', default=None)
+    args = parser.parse_args(argv)
+
+    store = DataStore(args.store)
+    if args.command == 'list':
+        for key in store.tables():
+            schema = store.schema(key)
+            print(f"{key}  ({len(schema)} columns)")
+            for col, dtype in schema.items():
+                print(f"    {col}: {dtype}")
+    else:
+        store.export_csv(args.key, args.csv_path, args.columns)
+
+
+if __name__ == "__main__":
+    main()
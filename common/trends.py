@@ -0,0 +1,190 @@
+"""
+Batched trend statistics over an entity x period matrix.
+
+Every function takes a 2-D float array with one row per entity (country,
+generation source, ...) and one column per period, NaN where a value is
+missing, and computes its statistic for all rows at once from column-wise
+sums; there is no per-entity loop:
+
+- ols_trend: least-squares slope, intercept and R^2 of each row against
+  the period axis, over the row's observed cells
+- rolling_mean: trailing window mean from cumulative sums, with pandas'
+  rolling(window, min_periods) semantics
+- baseline_anomalies: departure from each row's mean over a baseline range
+- period_change: difference or relative growth against the previous period
+
+TrendMatrix scatters long (entity, period, value) rows into such a matrix
+and turns the results back into frames.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _masked(values):
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    return np.where(present, values, 0.0), present
+
+
+def ols_trend(values, periods):
+    """
+    Per-row least-squares fit of values against periods over the observed
+    cells. Returns a dict of slope, intercept, r2 and n arrays; rows with
+    fewer than two observations (or a constant period) get NaN.
+    """
+    y, present = _masked(values)
+    x = np.asarray(periods, dtype=np.float64)
+    # Centre the period axis so the sums stay well conditioned for calendar years
+    centre = x.mean()
+    x = x - centre
+    w = present.astype(np.float64)
+
+    n = w.sum(axis=1)
+    sum_x = w @ x
+    sum_xx = w @ (x * x)
+    sum_y = y.sum(axis=1)
+    sum_yy = (y * y).sum(axis=1)
+    sum_xy = y @ x
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = sum_xx - sum_x * sum_x / n
+        sxy = sum_xy - sum_x * sum_y / n
+        syy = sum_yy - sum_y * sum_y / n
+        slope = sxy / sxx
+        intercept = sum_y / n - slope * (sum_x / n + centre)
+        r2 = np.where(syy > 0, sxy * sxy / (sxx * syy), np.nan)
+
+    undefined = (n < 2) | ~(sxx > 0)
+    slope[undefined] = np.nan
+    intercept[undefined] = np.nan
+    r2[undefined] = np.nan
+    return {'slope': slope, 'intercept': intercept, 'r2': r2, 'n': n.astype(np.int64)}
+
+
+def rolling_mean(values, window, min_periods=None):
+    """Trailing mean over `window` periods, NaN where fewer than min_periods (default: window) are observed"""
+    y, present = _masked(values)
+    min_periods = window if min_periods is None else min_periods
+
+    def trailing_sum(array):
+        cumulative = np.cumsum(array, axis=1)
+        shifted = np.zeros_like(cumulative)
+        shifted[:, window:] = cumulative[:, :-window]
+        return cumulative - shifted
+
+    totals = trailing_sum(y)
+    counts = trailing_sum(present.astype(np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals / counts
+    means[(counts < max(min_periods, 1))] = np.nan
+    return means
+
+
+def baseline_anomalies(values, periods, baseline):
+    """
+    Values minus each row's mean over the (first, last) baseline periods,
+    and that baseline mean; rows with no baseline observation get NaN
+    """
+    periods = np.asarray(periods)
+    first, last = baseline
+    in_baseline = (periods >= first) & (periods <= last)
+    y, present = _masked(np.asarray(values)[:, in_baseline])
+    counts = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, y.sum(axis=1) / counts, np.nan)
+    return np.asarray(values, dtype=np.float64) - means[:, None], means
+
+
+def period_change(values, relative=False):
+    """
+    Change against the previous period (first column NaN): the difference,
+    or with relative=True the growth in percent (NaN after a zero)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    change = np.full(values.shape, np.nan)
+    if relative:
+        previous = values[:, :-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change[:, 1:] = np.where(previous != 0, (values[:, 1:] / previous - 1) * 100, np.nan)
+    else:
+        change[:, 1:] = np.diff(values, axis=1)
+    return change
+
+
+class TrendMatrix:
+    """Entity x period matrix with labels, built from long or wide tables"""
+
+    def __init__(self, entities, periods, values):
+        self.entities = pd.Index(entities)
+        self.periods = pd.Index(periods)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_long(cls, df, entity_col, period_col, value_col):
+        """One scatter of (entity, period, value) rows; later duplicates win"""
+        entity_codes, entities = pd.factorize(df[entity_col], sort=True)
+        period_codes, periods = pd.factorize(df[period_col], sort=True)
+        values = np.full((len(entities), len(periods)), np.nan)
+        values[entity_codes, period_codes] = df[value_col].to_numpy(dtype=np.float64)
+        entities.name, periods.name = entity_col, period_col
+        return cls(entities, periods, values)
+
+    @classmethod
+    def from_wide(cls, df, period_col, entity_name='Entity'):
+        """A table with one row per period and one column per entity"""
+        df = df[df[period_col].notna()].sort_values(period_col)
+        entity_cols = [col for col in df.columns if col != period_col]
+        periods = pd.Index(df[period_col].astype(np.int64), name=period_col)
+        return cls(pd.Index(entity_cols, name=entity_name), periods, df[entity_cols].to_numpy(dtype=np.float64).T)
+
+    def summary(self, baseline=None, slope_scale=1):
+        """
+        One row per entity: observed periods, the OLS slope (times slope_scale,
+        e.g. 10 for a per-decade trend), intercept and R^2, the first and last
+        values and, with a baseline range, the baseline mean and the latest
+        observed anomaly
+        """
+        fit = ols_trend(self.values, self.periods.to_numpy())
+        present = ~np.isnan(self.values)
+        has_any = present.any(axis=1)
+        rows = np.arange(len(self.entities))
+        first_pos = np.argmax(present, axis=1)
+        last_pos = self.values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        periods = self.periods.to_numpy()
+
+        summary = pd.DataFrame({
+            'n_periods': fit['n'],
+            'first_period': np.where(has_any, periods[first_pos], -1),
+            'last_period': np.where(has_any, periods[last_pos], -1),
+            'first_value': np.where(has_any, self.values[rows, first_pos], np.nan),
+            'last_value': np.where(has_any, self.values[rows, last_pos], np.nan),
+            'slope': fit['slope'] * slope_scale,
+            'intercept': fit['intercept'],
+            'r2': fit['r2'],
+        }, index=self.entities)
+        if baseline is not None:
+            anomalies, means = baseline_anomalies(self.values, periods, baseline)
+            summary['baseline_mean'] = means
+            summary['latest_anomaly'] = np.where(has_any, anomalies[rows, last_pos], np.nan)
+        return summary.reset_index()
+
+    def series_table(self, window, baseline=None, relative_change=False, min_periods=None, value_name='Value'):
+        """
+        Long (entity, period) table of the observed values with their trailing
+        rolling mean, period-over-period change and baseline anomaly
+        """
+        columns = {
+            value_name: self.values,
+            f'RollingMean{window}': rolling_mean(self.values, window, min_periods),
+            'GrowthPercent' if relative_change else 'Change': period_change(self.values, relative_change),
+        }
+        if baseline is not None:
+            columns['Anomaly'] = baseline_anomalies(self.values, self.periods.to_numpy(), baseline)[0]
+
+        n_entities, n_periods = self.values.shape
+        table = pd.DataFrame({
+            self.entities.name or 'Entity': np.repeat(self.entities.to_numpy(), n_periods),
+            self.periods.name or 'Period': np.tile(self.periods.to_numpy(), n_entities),
+            **{name: array.reshape(-1) for name, array in columns.items()},
+        })
+        return table[~np.isnan(self.values.reshape(-1))].reset_index(drop=True)